@@ -0,0 +1,91 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+import asyncio
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.access_log import AccessLogWriter
+from core.orm import create_access_log, update_analytic
+from core.types import AccessLog
+
+# Usage: python benchmarks/bench_access_log.py [requests] [concurrency]
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+
+def make_log(i: int) -> dict:
+    return {
+        "userAgent": "bench",
+        "uuid": f"request-{i}",
+        "ip": "127.0.0.1",
+        "port": 0,
+        "url": "/reservation/get",
+        "method": "GET",
+        "status": 200,
+        "payload": None,
+        "responseTime": 1,
+    }
+
+
+async def run(name: str, log_request) -> None:
+    samples: list[float] = []
+    counter = iter(range(REQUESTS))
+
+    async def worker() -> None:
+        for i in counter:
+            started = time.perf_counter()
+            await log_request(i)
+            samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    print(
+        f"{name:<10} p50={statistics.median(samples):8.3f}ms "
+        f"p99={samples[int(len(samples) * 0.99) - 1]:8.3f}ms "
+        f"throughput={REQUESTS / elapsed:9.1f} req/s"
+    )
+
+
+async def main() -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async def inline(i: int) -> None:
+        try:
+            async with AsyncSession(engine) as session:
+                await create_access_log(session, AccessLog(**make_log(i)))
+                await update_analytic(session, datetime.now(), 0, 0, 0, 0, 1)
+        except Exception:
+            pass
+
+    writer = AccessLogWriter()
+    writer.start(engine)
+
+    async def batched(i: int) -> None:
+        await writer.put(make_log(i))
+
+    print(f"{REQUESTS} requests, concurrency {CONCURRENCY}")
+    await run("inline", inline)
+    await run("batched", batched)
+    started = time.perf_counter()
+    await writer.stop()
+    print(f"drained on shutdown in {(time.perf_counter() - started) * 1000:.1f}ms, {writer.stats()}")
+    await engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+import asyncio
+import secrets
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from core.csrf import CSRFMiddleware, MemoryCSRFTokenStore, SQLCSRFTokenStore
+from core.types import ApiResponse
+
+# Usage: python benchmarks/bench_csrf.py [outstanding tokens] [requests]
+OUTSTANDING = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+REQUESTS = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+
+legacy_tokens: list[str] = []
+
+
+class LegacyCSRFMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if request.method in ("POST", "PUT", "DELETE", "PATCH"):
+            csrf_token = request.headers.get("x-csrf-token", "") or ""
+            if not csrf_token or csrf_token not in legacy_tokens:
+                return ApiResponse(
+                    success=False, message="CSRF token missing or invalid.", status_code=403
+                )
+            try:
+                legacy_tokens.remove(csrf_token)
+            except ValueError:
+                pass
+        return await call_next(request)
+
+
+async def endpoint(scope, receive, send) -> None:
+    await PlainTextResponse("ok")(scope, receive, send)
+
+
+def make_scope(token: str) -> dict:
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [(b"x-csrf-token", token.encode())],
+        "query_string": b"",
+    }
+
+
+async def receive() -> dict:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def run(name: str, middleware, issue) -> None:
+    for _ in range(OUTSTANDING):
+        await issue()
+    tokens = [await issue() for _ in range(REQUESTS)]
+    statuses: list[int] = []
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    started = time.perf_counter()
+    for token in tokens:
+        await middleware(make_scope(token), receive, send)
+    elapsed = time.perf_counter() - started
+    assert statuses == [200] * REQUESTS, name
+    print(f"{name:<24} {elapsed / REQUESTS * 1e6:10.1f}us/request")
+
+
+async def main() -> None:
+    async def legacy_issue() -> str:
+        token = secrets.token_hex(32)
+        legacy_tokens.append(token)
+        return token
+
+    memory = MemoryCSRFTokenStore()
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    sql = SQLCSRFTokenStore(engine)
+
+    print(f"{OUTSTANDING} outstanding tokens, {REQUESTS} requests")
+    await run("list + BaseHTTPMiddleware", LegacyCSRFMiddleware(endpoint), legacy_issue)
+    await run("memory + ASGI", CSRFMiddleware(endpoint, memory), memory.issue)
+    await run("sql + ASGI", CSRFMiddleware(endpoint, sql), sql.issue)
+    await engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
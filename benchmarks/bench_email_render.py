@@ -0,0 +1,65 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+import string
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from core.email_templates import email_template_dir, get_email_template
+
+# Usage: python benchmarks/bench_email_render.py [messages]
+MESSAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+VALUES = {
+    "title": "Your reservation has been approved!",
+    "details": "Hi Student! Your reservation #42 for Room 101 has been approved.",
+    "user": "Student",
+    "room": "Room 101",
+    "class": "Class 1",
+    "student_id": "GJ20230000",
+    "reason": "Group study",
+    "time": "2025-01-01 10:00 - 11:00",
+    "button_text": "View Reservation",
+    "link": "https://example.com/admin/reservation/?token=abc",
+}
+
+
+def legacy(source: str, i: int) -> str:
+    message = MIMEMultipart("alternative")
+    message["Subject"] = "[HFI-UC] Reservation Approval"
+    message["From"] = "HFI-UC <no-reply@example.com>"
+    message["To"] = f"user{i}@example.com"
+    mail_body = string.Template(source).safe_substitute(VALUES)
+    message.attach(MIMEText(mail_body, "html", "utf-8"))
+    return message.as_string()
+
+
+def registry(name: str, i: int) -> str:
+    return get_email_template(name).message(
+        "Reservation Approval", f"user{i}@example.com", VALUES
+    )
+
+
+def timed(fn, arg) -> float:
+    started = time.process_time()
+    for i in range(MESSAGES):
+        fn(arg, i)
+    return (time.process_time() - started) / MESSAGES * 1e6
+
+
+def main() -> None:
+    print(f"{MESSAGES} messages per template, CPU time per message")
+    print(f"{'template':<24}{'legacy us':>12}{'registry us':>14}{'size':>16}")
+    for name in ("normal_update", "reservation_approval", "external_link"):
+        with open(os.path.join(email_template_dir, f"{name}.html"), encoding="utf-8") as f:
+            source = f.read()
+        before = timed(legacy, source)
+        after = timed(registry, name)
+        size = f"{len(legacy(source, 0))}->{len(registry(name, 0))}"
+        print(f"{name:<24}{before:>12.1f}{after:>14.1f}{size:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+import random
+import secrets
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select, exists, and_
+from sqlmodel import SQLModel
+
+from core.types import *
+from core.migrations import apply_migrations, migrations
+
+# Usage: python benchmarks/bench_indexes.py [rows]
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+LOOKUPS = 200
+BATCH = 50_000
+
+
+def build_legacy_schema(conn) -> None:
+    SQLModel.metadata.create_all(conn)
+    for table in SQLModel.metadata.sorted_tables:
+        for index in list(table.indexes):
+            index.drop(conn)
+
+
+def populate(conn) -> tuple[list[str], list[tuple[int, datetime]]]:
+    now = datetime(2025, 1, 1)
+    cookies: list[str] = []
+    slots: list[tuple[int, datetime]] = []
+    for offset in range(0, ROWS, BATCH):
+        logins = []
+        reservations = []
+        logs = []
+        for i in range(offset, min(offset + BATCH, ROWS)):
+            cookie = secrets.token_hex(32)
+            start = now + timedelta(minutes=30 * i)
+            room = i % 50 + 1
+            logins.append(
+                {"email": f"admin{i % 20}@hfi.test", "cookie": cookie, "expiry": start}
+            )
+            reservations.append(
+                {
+                    "roomId": room,
+                    "startTime": start,
+                    "endTime": start + timedelta(hours=1),
+                    "studentName": "Student",
+                    "email": "student@hfi.test",
+                    "reason": "Benchmark",
+                    "classId": 1,
+                    "studentId": "GJ20230000",
+                    "status": random.choice(["pending", "approved", "rejected"]),
+                }
+            )
+            logs.append(
+                {
+                    "uuid": cookie[:36],
+                    "time": start,
+                    "userAgent": "bench",
+                    "url": "/reservation/get",
+                    "method": "GET",
+                    "status": 200,
+                }
+            )
+            if random.random() < 0.001:
+                cookies.append(cookie)
+                slots.append((room, start))
+        conn.execute(insert(AdminLogin), logins)
+        conn.execute(insert(Reservation), reservations)
+        conn.execute(insert(AccessLog), logs)
+    analytics = [
+        {"date": now + timedelta(days=d % (ROWS // 100 or 1))} for d in range(ROWS // 50)
+    ]
+    conn.execute(insert(Analytic), analytics)
+    return cookies, slots
+
+
+def measure(conn, cookies: list[str], slots: list[tuple[int, datetime]]) -> dict[str, float]:
+    def timed(fn) -> float:
+        samples = []
+        for i in range(LOOKUPS):
+            started = time.perf_counter()
+            fn(i)
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
+
+    def cookie_lookup(i: int) -> None:
+        conn.execute(
+            select(AdminLogin).where(AdminLogin.cookie == cookies[i % len(cookies)])
+        ).all()
+
+    def conflict_check(i: int) -> None:
+        room, start = slots[i % len(slots)]
+        conn.execute(
+            select(
+                exists().where(
+                    and_(
+                        Reservation.roomId == room,
+                        Reservation.startTime < start + timedelta(hours=1),
+                        Reservation.endTime > start,
+                        Reservation.status != "rejected",
+                    )
+                )
+            )
+        ).scalar()
+
+    def analytic_lookup(i: int) -> None:
+        conn.execute(
+            select(Analytic).where(Analytic.date == datetime(2025, 1, 1) + timedelta(days=i))
+        ).all()
+
+    return {
+        "AdminLogin.cookie lookup": timed(cookie_lookup),
+        "Reservation conflict check": timed(conflict_check),
+        "Analytic.date lookup": timed(analytic_lookup),
+    }
+
+
+def main() -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        build_legacy_schema(conn)
+        started = time.perf_counter()
+        cookies, slots = populate(conn)
+        print(f"populated {ROWS} rows per table in {time.perf_counter() - started:.1f}s")
+    with engine.begin() as conn:
+        before = measure(conn, cookies, slots)
+    with engine.begin() as conn:
+        started = time.perf_counter()
+        applied = apply_migrations(conn)
+        print(
+            f"applied migrations {applied} of {len(migrations)} "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+    with engine.begin() as conn:
+        after = measure(conn, cookies, slots)
+    print(f"{'query (median ms)':<30}{'before':>10}{'after':>10}")
+    for name in before:
+        print(f"{name:<30}{before[name]:>10.3f}{after[name]:>10.3f}")
+    with engine.begin() as conn:
+        assert apply_migrations(conn) == []
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
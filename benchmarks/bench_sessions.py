@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+import asyncio
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import core
+import core.orm
+from core.login_cache import login_cache
+from core.types import Campus, Class
+
+# Usage: python benchmarks/bench_sessions.py [requests per endpoint]
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+ENDPOINTS = [
+    "/campus/list",
+    "/class/list",
+    "/room/list",
+    "/reservation/get",
+    "/reservation/future",
+    "/admin/list",
+]
+
+
+async def setup(engine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        await core.orm.create_admin(
+            session, "admin@bench.test", "admin", core.password_hash("password")
+        )
+        session.add(Campus(name="Campus"))
+        session.add(Class(name="Class"))
+        await session.commit()
+
+
+def main() -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    asyncio.run(setup(engine))
+    core.orm.engine = engine
+    core.engine = engine
+    core.verify_turnstile_token = lambda token: True
+    core.domain = "testserver"
+    core.limiter.enabled = False
+    checkouts = 0
+
+    @event.listens_for(engine.sync_engine.pool, "checkout")
+    def on_checkout(*args) -> None:
+        nonlocal checkouts
+        checkouts += 1
+
+    client = TestClient(core.app, base_url="https://testserver")
+    token = client.get("/_csrf").cookies["_csrf"]
+    response = client.post(
+        "/admin/login",
+        json={
+            "email": "admin@bench.test",
+            "password": "password",
+            "turnstileToken": "x",
+            "token": None,
+        },
+        headers={"x-csrf-token": token},
+    )
+    assert response.status_code == 200, response.text
+    print(f"{'endpoint':<36}{'checkouts/request':>20}{'ms/request':>12}")
+    for cached in (False, True):
+        for url in ENDPOINTS:
+            checkouts = 0
+            started = time.perf_counter()
+            for _ in range(REQUESTS):
+                if not cached:
+                    login_cache.clear()
+                assert client.get(url).status_code == 200, url
+            elapsed = (time.perf_counter() - started) / REQUESTS * 1000
+            label = url + (" (cached login)" if cached else "")
+            print(f"{label:<36}{checkouts / REQUESTS:>20.2f}{elapsed:>12.2f}")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
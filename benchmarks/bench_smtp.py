@@ -0,0 +1,102 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+import asyncio
+import smtplib
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.smtp_pool import SMTPPool
+
+# Usage: python benchmarks/bench_smtp.py [messages] [concurrency] [handshake ms]
+MESSAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+# Stands in for the TCP + TLS handshake and AUTH round trips of a real server
+HANDSHAKE = (float(sys.argv[3]) if len(sys.argv) > 3 else 50) / 1000
+MESSAGE = "Subject: bench\r\n\r\n" + "x" * 20_000
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        self.server.connections += 1  # type: ignore[attr-defined]
+        time.sleep(HANDSHAKE)
+        self.wfile.write(b"220 stub ESMTP\r\n")
+        while line := self.rfile.readline():
+            command = line.decode().strip().upper()
+            if command.startswith("EHLO"):
+                self.wfile.write(b"250-stub\r\n250 AUTH PLAIN\r\n")
+            elif command.startswith("AUTH"):
+                self.wfile.write(b"235 OK\r\n")
+            elif command.startswith("DATA"):
+                self.wfile.write(b"354 go ahead\r\n")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.wfile.write(b"250 OK\r\n")
+            elif command.startswith("QUIT"):
+                self.wfile.write(b"221 Bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 OK\r\n")
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    connections = 0
+
+
+def report(name: str, server: Server, elapsed: float) -> None:
+    print(
+        f"{name:<20} {MESSAGES / elapsed:8.1f} msg/s "
+        f"{elapsed / MESSAGES * 1000:8.2f} ms/msg {server.connections:5d} connections"
+    )
+
+
+def main() -> None:
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+
+    def connect_per_message() -> None:
+        with smtplib.SMTP(host, port) as conn:
+            conn.login("no-reply@bench.test", "password")
+            conn.sendmail("no-reply@bench.test", "user@bench.test", MESSAGE)
+
+    pool = SMTPPool(
+        host=host,
+        port=port,
+        username="no-reply@bench.test",
+        password="password",
+        size=CONCURRENCY,
+        use_ssl=False,
+    )
+
+    async def pooled() -> None:
+        await asyncio.gather(
+            *(
+                pool.sendmail("no-reply@bench.test", "user@bench.test", MESSAGE)
+                for _ in range(MESSAGES)
+            )
+        )
+        await pool.close()
+
+    print(f"{MESSAGES} messages, {CONCURRENCY} concurrent, {HANDSHAKE * 1000:.0f}ms handshake")
+    server.connections = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(CONCURRENCY) as executor:
+        list(executor.map(lambda _: connect_per_message(), range(MESSAGES)))
+    report("connect per message", server, time.perf_counter() - started)
+    server.connections = 0
+    started = time.perf_counter()
+    asyncio.run(pooled())
+    report("async pool", server, time.perf_counter() - started)
+    print(pool.stats())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from io import BytesIO
+
+from openpyxl import Workbook
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.orm import get_reservations_by_time_range, stream_reservation_export_rows
+from core.types import Campus, Class, Reservation, Room
+from core.utils import reservation_export_chunks, reservation_export_headers, write_reservations_xlsx
+
+# Usage: python benchmarks/bench_xlsx_export.py [reservations]
+RESERVATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+ROOMS = 50
+BATCH = 20_000
+
+
+async def populate(engine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(insert(Campus), [{"name": "Campus"}])
+        await conn.execute(insert(Class), [{"name": "Class", "campusId": 1}])
+        await conn.execute(
+            insert(Room), [{"name": f"Room {i}", "campusId": 1} for i in range(ROOMS)]
+        )
+        now = datetime(2025, 1, 1)
+        for offset in range(0, RESERVATIONS, BATCH):
+            await conn.execute(
+                insert(Reservation),
+                [
+                    {
+                        "roomId": i % ROOMS + 1,
+                        "startTime": now + timedelta(minutes=30 * i),
+                        "endTime": now + timedelta(minutes=30 * i + 60),
+                        "studentName": "Student",
+                        "email": "student@hfi.test",
+                        "reason": "Benchmark reservation for the export",
+                        "classId": 1,
+                        "studentId": "GJ20230000",
+                        "status": "approved",
+                        "createdAt": now,
+                    }
+                    for i in range(offset, min(offset + BATCH, RESERVATIONS))
+                ],
+            )
+
+
+async def legacy_export(engine) -> int:
+    async with AsyncSession(engine) as session:
+        reservations = await get_reservations_by_time_range(session, None, None, "admin")
+        workbook = Workbook()
+        workbook.remove(workbook.active)
+        sheets = {}
+        for reservation in reservations:
+            if reservation.roomId not in sheets:
+                sheets[reservation.roomId] = workbook.create_sheet(title=reservation.room.name)
+                sheets[reservation.roomId].append(reservation_export_headers)
+            room = reservation.room
+            sheets[reservation.roomId].append(
+                [
+                    reservation.id,
+                    reservation.startTime,
+                    reservation.endTime,
+                    reservation.studentName,
+                    reservation.studentId,
+                    reservation.email,
+                    reservation.reason,
+                    room.name,
+                    reservation.class_.name,
+                    reservation.status.capitalize(),
+                    reservation.createdAt,
+                    room.campus.name,
+                ]
+            )
+    output = BytesIO()
+    workbook.save(output)
+    return len(output.getvalue())
+
+
+async def streaming_export(engine) -> int:
+    with tempfile.TemporaryFile() as output:
+        async with AsyncSession(engine) as session:
+            await write_reservations_xlsx(
+                stream_reservation_export_rows(session, None, None, by_room=True), output
+            )
+        return output.tell()
+
+
+async def csv_export(engine) -> int:
+    with tempfile.TemporaryFile() as output:
+        async with AsyncSession(engine) as session:
+            async for chunk in reservation_export_chunks(
+                stream_reservation_export_rows(session, None, None), "csv", "single-sheet"
+            ):
+                output.write(chunk)
+        return output.tell()
+
+
+async def measure(name: str, fn, engine) -> None:
+    queries = 0
+
+    def count(*args) -> None:
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = await fn(engine)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+    print(
+        f"{name:<10} {elapsed:7.2f}s  peak {peak / 1024 / 1024:8.1f} MiB  "
+        f"queries {queries:4d}  file {size / 1024 / 1024:6.1f} MiB"
+    )
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{directory}/bench.db")
+        await populate(engine)
+        print(f"{RESERVATIONS} reservations across {ROOMS} rooms")
+        await measure("in-memory", legacy_export, engine)
+        await measure("streaming", streaming_export, engine)
+        await measure("csv", csv_export, engine)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
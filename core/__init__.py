@@ -3,7 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import Receive, Scope, Send, Message
 from fastapi.requests import Request
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
 from slowapi import _rate_limit_exceeded_handler, Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -14,8 +14,15 @@ from core.types import *
 from core.email import *
 from core.utils import *
 from core.schedulers import *
+from core.access_log import *
+from core.csrf import *
+from core.login_cache import *
+from core.outbox import *
+from core.singleflight import *
+from core.cache_dir import *
+from core.export_jobs import *
 from datetime import datetime, timedelta
-from typing import Any
+from typing import IO, Any, AsyncIterator, Iterator
 
 import uuid
 import hashlib
@@ -27,14 +34,26 @@ import time
 import jieba
 import unicodedata
 import secrets
+import tempfile
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     await create_db_and_tables()
+    access_log_writer.start(engine)
+    analytic_counter.start(engine)
+    email_outbox.start(engine)
+    export_jobs.start(engine)
+    await browser_pool.start()
     scheduler.start()
     yield
     scheduler.shutdown()
+    await access_log_writer.stop()
+    await analytic_counter.stop()
+    await email_outbox.stop()
+    await export_jobs.stop()
+    await smtp_pool.close()
+    await browser_pool.close()
 
 
 
@@ -53,7 +72,9 @@ app.add_middleware(
 limiter = Limiter(key_func=get_remote_address, application_limits=["50/second"])
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)  # type: ignore
-csrf_tokens: list[str] = []
+csrf_tokens: CSRFTokenStore = (
+    SQLCSRFTokenStore(engine) if csrf_token_store == "sql" else MemoryCSRFTokenStore()
+)
 
 @app.exception_handler(Exception)
 async def generic_exception_handler(request: Request, exc: Exception) -> ApiResponse:
@@ -66,25 +87,6 @@ async def generic_exception_handler(request: Request, exc: Exception) -> ApiResp
     )
 
 
-class CSRFMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        if request.scope.get("type") != "http":
-            return await call_next(request)
-
-        if request.method in ("POST", "PUT", "DELETE", "PATCH"):
-            csrf_token = request.headers.get("x-csrf-token", "") or ""
-            if not csrf_token or csrf_token not in csrf_tokens:
-                return ApiResponse(
-                    success=False, message="CSRF token missing or invalid.", status_code=403
-                )
-            try:
-                csrf_tokens.remove(csrf_token)
-            except ValueError:
-                pass
-
-        response = await call_next(request)
-        return response
-
 class LogMiddleware(BaseHTTPMiddleware):
     def __init__(self, app: ASGIApp):
         self.app = app
@@ -99,16 +101,16 @@ class LogMiddleware(BaseHTTPMiddleware):
             scope["state"] = {}
         scope["state"]["request_id"] = _uuid
 
-        req_body = bytearray()
+        sampled = random.random() < access_log_sample_rate(scope.get("path", ""))
+        capture = PayloadCapture()
 
         async def recv_wrapper() -> Message:
             message = await receive()
-            if message["type"] == "http.request":
-                req_body.extend(message.get("body", b""))
+            if sampled and message["type"] == "http.request":
+                capture.feed(message.get("body", b""))
             return message
 
         status_code = 500
-        resp_chunks = []
         response_sent = False
 
         async def send_wrapper(message: Message) -> None:
@@ -116,8 +118,6 @@ class LogMiddleware(BaseHTTPMiddleware):
             if message["type"] == "http.response.start":
                 status_code = message["status"]
                 message["headers"].append((b"x-request-id", _uuid.encode()))
-            elif message["type"] == "http.response.body":
-                resp_chunks.append(message.get("body", b""))
             await send(message)
             response_sent = True
 
@@ -144,34 +144,29 @@ class LogMiddleware(BaseHTTPMiddleware):
                 )
                 await response(scope, receive, send)
         finally:
-            response_time_ms = int((time.time() - start_time) * 1000)
-            headers = dict((k.lower(), v) for k, v in scope.get("headers", []))
-            ua = headers.get(b"user-agent", b"").decode()
-            client = scope.get("client") or ("", 0)
-            ip = client[0]
-            try:
-                payload = req_body.decode("utf-8")
-            except UnicodeDecodeError:
-                payload = None
-            log = AccessLog(
-                userAgent=ua,
-                uuid=_uuid,
-                ip=ip,
-                port=client[1],
-                url=scope.get("path", ""),
-                method=scope.get("method", ""),
-                status=status_code,
-                payload=payload,
-                responseTime=response_time_ms,
-            )
-            try:
-                async with AsyncSession(engine) as session:
-                    await create_access_log(session, log)
-                    await update_analytic(session, datetime.now(), 0, 0, 0, 0, 1)
-            except Exception:
-                pass
+            analytic_counter.increment(datetime.now(), requests=1)
+        if not sampled:
+            return
+        response_time_ms = int((time.time() - start_time) * 1000)
+        headers = dict((k.lower(), v) for k, v in scope.get("headers", []))
+        ua = headers.get(b"user-agent", b"").decode()
+        client = scope.get("client") or ("", 0)
+        ip = client[0]
+        await access_log_writer.put(
+            {
+                "userAgent": ua,
+                "uuid": _uuid,
+                "ip": ip,
+                "port": client[1],
+                "url": scope.get("path", ""),
+                "method": scope.get("method", ""),
+                "status": status_code,
+                "payload": capture.text(),
+                "responseTime": response_time_ms,
+            }
+        )
 
-app.add_middleware(CSRFMiddleware)
+app.add_middleware(CSRFMiddleware, store=csrf_tokens)
 app.add_middleware(LogMiddleware)
 
 
@@ -185,18 +180,33 @@ def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode(), hashed.encode())
 
 
-async def get_current_user(request: Request) -> AdminLogin | None:
+async def get_current_login(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+) -> tuple[AdminLogin, Admin | None] | None:
     cookie = request.cookies.get("uc")
     if not cookie:
         return None
-    async with AsyncSession(engine) as session:
-        user_login = await get_admin_login_by_cookie(session, cookie)
-        if not user_login:
-            return None
-        if user_login.expiry < datetime.now():
-            return None
-        return user_login
-    
+    cached = login_cache.get(cookie)
+    if cached:
+        return cached
+    user_login = await get_admin_login_by_cookie(session, cookie)
+    if not user_login:
+        return None
+    if user_login.expiry < datetime.now():
+        return None
+    admin = await get_admin_by_email(session, user_login.email)
+    login_cache.put(cookie, user_login, admin)
+    return user_login, admin
+
+
+async def get_current_user(login=Depends(get_current_login)) -> AdminLogin | None:
+    return login[0] if login else None
+
+
+async def get_current_admin(login=Depends(get_current_login)) -> Admin | None:
+    return login[1] if login else None
+
 
 
 @app.get("/", response_model=ApiResponseBody[str])
@@ -208,8 +218,7 @@ async def root(request: Request) -> RedirectResponse:
 @app.get("/_csrf", response_model=ApiResponseBody[str])
 @limiter.limit("10/second")
 async def _csrf(request: Request) -> ApiResponse[str]:
-    token = secrets.token_hex(32)
-    csrf_tokens.append(token)
+    token = await csrf_tokens.issue()
     response = ApiResponse(success=True)
     response.set_cookie("_csrf", token, httponly=False, samesite="none", secure=True, domain=domain)
     return response
@@ -221,45 +230,46 @@ async def _csrf(request: Request) -> ApiResponse[str]:
 )
 @limiter.limit("5/second")
 async def room_list(
-    request: Request, user_login=Depends(get_current_user)
+    request: Request,
+    user_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[list[RoomResponse] | list[RoomAdminResponse]]:
-    async with AsyncSession(engine) as session:
-        rooms = await get_room(session)
-        if not user_login:
-            data = [
-                RoomResponse(
-                    id=room.id,
-                    name=room.name,
-                    campus=room.campusId,
-                    createdAt=room.createdAt,
-                    policies=[
-                        RoomPolicyResponseBase.model_validate(policy)
-                        for policy in room.policies
-                    ],
-                    enabled=room.enabled,
-                )
-                for room in rooms
-            ]
-        else:
-            data = [
-                RoomAdminResponse(
-                    id=room.id,
-                    name=room.name,
-                    campus=room.campusId,
-                    createdAt=room.createdAt,
-                    policies=[
-                        RoomPolicyResponseBase.model_validate(policy)
-                        for policy in room.policies
-                    ],
-                    approvers=[
-                        RoomApproverResponseBase.model_validate(approver)
-                        for approver in room.approvers
-                    ],
-                    enabled=room.enabled,
-                )
-                for room in rooms
-            ]
-        return ApiResponse(success=True, data=data)
+    rooms = await get_room(session, "admin" if user_login else "list")
+    if not user_login:
+        data = [
+            RoomResponse(
+                id=room.id,
+                name=room.name,
+                campus=room.campusId,
+                createdAt=room.createdAt,
+                policies=[
+                    RoomPolicyResponseBase.model_validate(policy)
+                    for policy in room.policies
+                ],
+                enabled=room.enabled,
+            )
+            for room in rooms
+        ]
+    else:
+        data = [
+            RoomAdminResponse(
+                id=room.id,
+                name=room.name,
+                campus=room.campusId,
+                createdAt=room.createdAt,
+                policies=[
+                    RoomPolicyResponseBase.model_validate(policy)
+                    for policy in room.policies
+                ],
+                approvers=[
+                    RoomApproverResponseBase.model_validate(approver)
+                    for approver in room.approvers
+                ],
+                enabled=room.enabled,
+            )
+            for room in rooms
+        ]
+    return ApiResponse(success=True, data=data)
 
 
 @app.get(
@@ -267,19 +277,21 @@ async def room_list(
     response_model=ApiResponseBody[list[CampusResponse]],
 )
 @limiter.limit("5/second")
-async def campus_list(request: Request) -> ApiResponse[list[CampusResponse]]:
-    async with AsyncSession(engine) as session:
-        campuses = await get_campus(session)
-        data = [
-            CampusResponse(
-                id=campus.id,
-                name=campus.name,
-                isPrivileged=campus.isPrivileged,
-                createdAt=campus.createdAt,
-            )
-            for campus in campuses
-        ]
-        return ApiResponse(success=True, data=data)
+async def campus_list(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+) -> ApiResponse[list[CampusResponse]]:
+    campuses = await get_campus(session)
+    data = [
+        CampusResponse(
+            id=campus.id,
+            name=campus.name,
+            isPrivileged=campus.isPrivileged,
+            createdAt=campus.createdAt,
+        )
+        for campus in campuses
+    ]
+    return ApiResponse(success=True, data=data)
 
 
 @app.get(
@@ -287,19 +299,21 @@ async def campus_list(request: Request) -> ApiResponse[list[CampusResponse]]:
     response_model=ApiResponseBody[list[ClassResponse]],
 )
 @limiter.limit("5/second")
-async def class_list(request: Request) -> ApiResponse[list[ClassResponse]]:
-    async with AsyncSession(engine) as session:
-        classes = await get_class(session)
-        data = [
-            ClassResponse(
-                id=class_.id,
-                name=class_.name,
-                campus=class_.campusId,
-                createdAt=class_.createdAt,
-            )
-            for class_ in classes
-        ]
-        return ApiResponse(success=True, data=data)
+async def class_list(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+) -> ApiResponse[list[ClassResponse]]:
+    classes = await get_class(session)
+    data = [
+        ClassResponse(
+            id=class_.id,
+            name=class_.name,
+            campus=class_.campusId,
+            createdAt=class_.createdAt,
+        )
+        for class_ in classes
+    ]
+    return ApiResponse(success=True, data=data)
 
 
 @app.post(
@@ -308,21 +322,23 @@ async def class_list(request: Request) -> ApiResponse[list[ClassResponse]]:
 )
 @limiter.limit("5/second")
 async def campus_delete(
-    request: Request, payload: CampusDeleteRequest, admin_login=Depends(get_current_user)
+    request: Request,
+    payload: CampusDeleteRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        campus = await get_campus_by_id(session, payload.id)
-        if not campus:
-            return ApiResponse(
-                success=False, message="Campus not found.", status_code=404
-            )
-        await delete_campus(session, campus)
-        return ApiResponse(success=True, message="Campus deleted successfully.")
+    campus = await get_campus_by_id(session, payload.id, "detail")
+    if not campus:
+        return ApiResponse(
+            success=False, message="Campus not found.", status_code=404
+        )
+    await delete_campus(session, campus)
+    return ApiResponse(success=True, message="Campus deleted successfully.")
 
 
 @app.post(
@@ -330,20 +346,24 @@ async def campus_delete(
     response_model=ApiResponseBody[Any],
 )
 @limiter.limit("5/second")
-async def room_delete(request: Request, payload: RoomDeleteRequest, admin_login=Depends(get_current_user)) -> ApiResponse[Any]:
+async def room_delete(
+    request: Request,
+    payload: RoomDeleteRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        room = await get_room_by_id(session, payload.id)
-        if not room:
-            return ApiResponse(
-                success=False, message="Room not found.", status_code=404
-            )
-        await delete_room(session, room)
-        return ApiResponse(success=True, message="Room deleted successfully.")
+    room = await get_room_by_id(session, payload.id)
+    if not room:
+        return ApiResponse(
+            success=False, message="Room not found.", status_code=404
+        )
+    await delete_room(session, room)
+    return ApiResponse(success=True, message="Room deleted successfully.")
 
 
 @app.post(
@@ -352,21 +372,23 @@ async def room_delete(request: Request, payload: RoomDeleteRequest, admin_login=
 )
 @limiter.limit("5/second")
 async def class_delete(
-    request: Request, payload: ClassDeleteRequest, admin_login=Depends(get_current_user)
+    request: Request,
+    payload: ClassDeleteRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        class_ = await get_class_by_id(session, payload.id)
-        if not class_:
-            return ApiResponse(
-                success=False, message="Class not found.", status_code=404
-            )
-        await delete_class(session, class_)
-        return ApiResponse(success=True, message="Class deleted successfully.")
+    class_ = await get_class_by_id(session, payload.id)
+    if not class_:
+        return ApiResponse(
+            success=False, message="Class not found.", status_code=404
+        )
+    await delete_class(session, class_)
+    return ApiResponse(success=True, message="Class deleted successfully.")
 
 
 @app.post(
@@ -378,193 +400,183 @@ async def reservation_create(
     request: Request,
     payload: ReservationCreateRequest,
     background_task: BackgroundTasks,
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[ReservationCreateResponse]:
-    async with AsyncSession(engine, expire_on_commit=False) as session:
-        reservations = await get_reservation_by_room_id(session, payload.room)
-        room = await get_room_by_id(session, payload.room)
-        if not room:
-            return ApiResponse(
-                success=False, message="Room not found.", status_code=404
-            )
-        errors = []
-        class_ = await get_class_by_id(session, payload.classId)
-        if not room or not room.enabled:
-            errors.append("Room not found or disabled.")
-        if not class_:
-            errors.append("Class not found.")
-        if errors:
-            return ApiResponse(
-                success=False, message="\n".join(errors), status_code=400
-            )
+    room = await get_room_by_id(session, payload.room, "detail")
+    if not room:
+        return ApiResponse(
+            success=False, message="Room not found.", status_code=404
+        )
+    errors = []
+    class_ = await get_class_by_id(session, payload.classId)
+    if not room or not room.enabled:
+        errors.append("Room not found or disabled.")
+    if not class_:
+        errors.append("Class not found.")
+    if errors:
+        return ApiResponse(
+            success=False, message="\n".join(errors), status_code=400
+        )
 
-        def validate_time_conflict(start_time: datetime, end_time: datetime) -> bool:
-            for reservation in reservations:
-                if reservation.status == "rejected":
+    def validate_policy(_start_time: int, _end_time: int) -> bool:
+        if room:
+            policies = room.policies
+            start_time_obj = datetime.fromtimestamp(_start_time)
+            end_time_obj = datetime.fromtimestamp(_end_time)
+            day = (start_time_obj.weekday() + 1) % 6 # for the freaking JavaScript Date().getDay()
+            for policy in policies:
+                if not policy.enabled:
                     continue
-                if reservation.startTime < end_time and reservation.endTime > start_time:
-                    return False
-            return True
-
-        def validate_policy(_start_time: int, _end_time: int) -> bool:
-            if room:
-                policies = room.policies
-                start_time_obj = datetime.fromtimestamp(_start_time)
-                end_time_obj = datetime.fromtimestamp(_end_time)
-                day = (start_time_obj.weekday() + 1) % 6 # for the freaking JavaScript Date().getDay()
-                for policy in policies:
-                    if not policy.enabled:
-                        continue
-                    if day in policy.days:
-                        start_hour, start_minute = policy.startTime
-                        end_hour, end_minute = policy.endTime
-                        start_time = datetime(
-                            start_time_obj.year,
-                            start_time_obj.month,
-                            start_time_obj.day,
-                            start_hour,
-                            start_minute,
-                        )
-                        end_time = datetime(
-                            end_time_obj.year,
-                            end_time_obj.month,
-                            end_time_obj.day,
-                            end_hour,
-                            end_minute,
-                        )
-                        if start_time_obj < end_time and end_time_obj > start_time:
-                            return False
-            return True
-
-        def validate_email_format(email: str) -> bool:
-            if not re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", email):
-                return False
-            return True
-
-        if not payload.studentId.startswith("GJ") and not len(payload.studentId) == 10 and not re.match(r"^\d{8}$", payload.studentId[2:]):
-            errors.append("Invalid student ID format.")
-        if not validate_email_format(payload.email):
-            errors.append("Invalid email format.")
-        if payload.startTime >= payload.endTime:
-            errors.append("Start time must be before end time.")
-        if payload.endTime - payload.startTime > 2 * 3600:
-            errors.append("Reservation duration must not exceed 2 hours.")
-        if payload.startTime < datetime.now().timestamp():
-            errors.append("Start time must be in the future.")
-        if payload.startTime > (datetime.now() + timedelta(days=30)).timestamp():
-            errors.append("Start time must be within 30 days.")
-        admin = await get_admin_by_email(session, payload.email)
-        if not admin:
-            if not validate_policy(payload.startTime, payload.endTime):
-                errors.append("Start or end time violates room policy.")
-            if not validate_time_conflict(
-                datetime.fromtimestamp(payload.startTime),
-                datetime.fromtimestamp(payload.endTime)
-            ):
-                errors.append("Start or end time conflicts with existing reservation.")
-        if errors:
-            return ApiResponse(
-                success=False, message="\n".join(errors), status_code=400
-            )
+                if day in policy.days:
+                    start_hour, start_minute = policy.startTime
+                    end_hour, end_minute = policy.endTime
+                    start_time = datetime(
+                        start_time_obj.year,
+                        start_time_obj.month,
+                        start_time_obj.day,
+                        start_hour,
+                        start_minute,
+                    )
+                    end_time = datetime(
+                        end_time_obj.year,
+                        end_time_obj.month,
+                        end_time_obj.day,
+                        end_hour,
+                        end_minute,
+                    )
+                    if start_time_obj < end_time and end_time_obj > start_time:
+                        return False
+        return True
 
-        if not room.approvers:
-            return ApiResponse(
-                success=False,
-                message="No approvers found, please contact support.",
-                status_code=404,
-            )
+    def validate_email_format(email: str) -> bool:
+        if not re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", email):
+            return False
+        return True
 
-        user_reservations = await get_reservation(session, keyword=payload.email, start_time=datetime.fromtimestamp(payload.startTime).replace(hour=0, minute=0, second=0, microsecond=0), end_time=datetime.fromtimestamp(payload.startTime).replace(hour=23, minute=59, second=59, microsecond=999999))
+    if not payload.studentId.startswith("GJ") and not len(payload.studentId) == 10 and not re.match(r"^\d{8}$", payload.studentId[2:]):
+        errors.append("Invalid student ID format.")
+    if not validate_email_format(payload.email):
+        errors.append("Invalid email format.")
+    if payload.startTime >= payload.endTime:
+        errors.append("Start time must be before end time.")
+    if payload.endTime - payload.startTime > 2 * 3600:
+        errors.append("Reservation duration must not exceed 2 hours.")
+    if payload.startTime < datetime.now().timestamp():
+        errors.append("Start time must be in the future.")
+    if payload.startTime > (datetime.now() + timedelta(days=30)).timestamp():
+        errors.append("Start time must be within 30 days.")
+    admin = await get_admin_by_email(session, payload.email)
+    if not admin:
+        if not validate_policy(payload.startTime, payload.endTime):
+            errors.append("Start or end time violates room policy.")
+        if await has_conflicting_reservation(
+            session,
+            payload.room,
+            datetime.fromtimestamp(payload.startTime),
+            datetime.fromtimestamp(payload.endTime),
+        ):
+            errors.append("Start or end time conflicts with existing reservation.")
+    if errors:
+        return ApiResponse(
+            success=False, message="\n".join(errors), status_code=400
+        )
 
-        if not admin and len(user_reservations) == 2:
-            return ApiResponse(
-                success=False,
-                message="You have reached your limit on reservation requests on this day.",
-                status_code=400,
-            )
+    if not room.approvers:
+        return ApiResponse(
+            success=False,
+            message="No approvers found, please contact support.",
+            status_code=404,
+        )
 
-        if admin:
-            payload.studentId = "-"
+    user_reservations = await count_reservation(session, keyword=payload.email, start_time=datetime.fromtimestamp(payload.startTime).replace(hour=0, minute=0, second=0, microsecond=0), end_time=datetime.fromtimestamp(payload.startTime).replace(hour=23, minute=59, second=59, microsecond=999999))
 
-        result = await create_reservation(session, payload)
+    if not admin and user_reservations >= 2:
+        return ApiResponse(
+            success=False,
+            message="You have reached your limit on reservation requests on this day.",
+            status_code=400,
+        )
 
-        background_task.add_task(
-            send_normal_update_email,
-            email_title="Reservation Created",
-            title=f"Hi {payload.studentName}! Your reservation #{result} has been created.",
-            email=payload.email,
-            details=(
-                f"Your reservation #{result} for room {room.name if room else 'Unknown'} for the time period "
-                f"<b>{datetime.fromtimestamp(payload.startTime).strftime('%Y-%m-%d %H:%M')} - "
-                f"{datetime.fromtimestamp(payload.endTime).strftime('%H:%M')}</b> has been created and is currently pending approval."
-            ),
+    if admin:
+        payload.studentId = "-"
+
+    # End the read transaction so the room lock in create_reservation takes a fresh snapshot.
+    await session.commit()
+    result = await create_reservation(session, payload, check_conflict=not admin)
+    if result is None:
+        return ApiResponse(
+            success=False,
+            message="Start or end time conflicts with existing reservation.",
+            status_code=400,
         )
 
-        if admin:
-            class_name = class_.name if class_ else None
-            await change_reservation_status_by_id(session, result, "approved", admin.id or -1)
-
-            background_task.add_task(
-                send_reservation_approval_email,
-                email_title="Reservation Approval",
-                title="Your reservation has been approved!",
-                email=payload.email,
-                details=f"Hi {payload.studentName}! Your reservation #{result} for {room.name if room else None} has been approved. Below is the detailed information.",
-                user=payload.studentName,
-                room=room.name if room else "",
-                class_name=class_name or "",
-                student_id=payload.studentId,
-                reason=payload.reason,
-                time=f"{datetime.fromtimestamp(payload.startTime).strftime('%Y-%m-%d %H:%M')} - {datetime.fromtimestamp(payload.endTime).strftime('%H:%M')}",
-            )
-            reservations = await get_reservations_by_time_range_and_room(
-                session,
-                datetime.fromtimestamp(payload.startTime),
-                datetime.fromtimestamp(payload.endTime),
-                room_id=payload.room,
-            )
-            for reservation in reservations:
-                if reservation.id != result:
-                    await change_reservation_status_by_id(
-                        session, reservation.id or -1, "rejected", admin.id or -1
-                    )
-                    background_task.add_task(
-                        send_normal_update_email,
-                        email_title="Reservation Rejected",
-                        title="Your reservation has been rejected.",
-                        email=reservation.email,
-                        details=f"Hi {reservation.studentName}! Your reservation #{reservation.id} for {room.name if room else None} has been rejected due to a higher priority reservation.",
-                    )
-            return ApiResponse(
-                success=True,
-                message="Your reservation has been created and approved.",
-                data=ReservationCreateResponse(reservationId=result),
-            )
+    await enqueue_email(
+        session,
+        "send_normal_update_email",
+        email_title="Reservation Created",
+        title=f"Hi {payload.studentName}! Your reservation #{result} has been created.",
+        email=payload.email,
+        details=(
+            f"Your reservation #{result} for room {room.name if room else 'Unknown'} for the time period "
+            f"<b>{datetime.fromtimestamp(payload.startTime).strftime('%Y-%m-%d %H:%M')} - "
+            f"{datetime.fromtimestamp(payload.endTime).strftime('%H:%M')}</b> has been created and is currently pending approval."
+        ),
+    )
 
-        
-        if ai_approval_enabled:
-            background_task.add_task(ai_approval, session, result)
-        else:
-            for approver in room.approvers:
-                admin = approver.admin
-                if not admin or not approver.notificationsEnabled:
-                    continue
-                token = secrets.token_hex(32)
-                background_task.add_task(
-                    send_normal_update_with_external_link_email,
-                    email_title="New Reservation Request",
-                    title=f"Hi {admin.name}! A new reservation request has been created.",
-                    email=admin.email,
-                    details=f"Reservation ID #{result}, click the button below for reservation details.",
-                    button_text="View Reservation",
-                    link=f"{base_url}/admin/reservation/?token={token}",
+    if admin:
+        class_name = class_.name if class_ else None
+        await change_reservation_status_by_id(session, result, "approved", admin.id or -1)
+
+        await enqueue_email(
+            session,
+            "send_reservation_approval_email",
+            email_title="Reservation Approval",
+            title="Your reservation has been approved!",
+            email=payload.email,
+            details=f"Hi {payload.studentName}! Your reservation #{result} for {room.name if room else None} has been approved. Below is the detailed information.",
+            user=payload.studentName,
+            room=room.name if room else "",
+            class_name=class_name or "",
+            student_id=payload.studentId,
+            reason=payload.reason,
+            time=f"{datetime.fromtimestamp(payload.startTime).strftime('%Y-%m-%d %H:%M')} - {datetime.fromtimestamp(payload.endTime).strftime('%H:%M')}",
+        )
+        reservations = await get_reservations_by_time_range_and_room(
+            session,
+            datetime.fromtimestamp(payload.startTime),
+            datetime.fromtimestamp(payload.endTime),
+            room_id=payload.room,
+        )
+        for reservation in reservations:
+            if reservation.id != result:
+                await change_reservation_status_by_id(
+                    session, reservation.id or -1, "rejected", admin.id or -1
+                )
+                await enqueue_email(
+                    session,
+                    "send_normal_update_email",
+                    email_title="Reservation Rejected",
+                    title="Your reservation has been rejected.",
+                    email=reservation.email,
+                    details=f"Hi {reservation.studentName}! Your reservation #{reservation.id} for {room.name if room else None} has been rejected due to a higher priority reservation.",
                 )
-                await create_temp_admin_login(session, admin.email, token)
         return ApiResponse(
             success=True,
-            message="Your reservation has been created.",
+            message="Your reservation has been created and approved.",
             data=ReservationCreateResponse(reservationId=result),
         )
 
+    
+    if ai_approval_enabled:
+        background_task.add_task(ai_approval, session, result)
+    else:
+        await notify_approvers(session, result, room.approvers)
+    return ApiResponse(
+        success=True,
+        message="Your reservation has been created.",
+        data=ReservationCreateResponse(reservationId=result),
+    )
+
 
 @app.get(
     "/reservation/get",
@@ -580,77 +592,84 @@ async def reservation_get(
     keyword: str = "",
     status: str = "",
     page: int = 0,
+    cursor: int | None = None,
     startTime: int | None = None,
     endTime: int | None = None,
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[ReservationQueryResponse | ReservationFullQueryResponse]:
-    async with AsyncSession(engine) as session:
-        if roomId and not await get_room_by_id(session, roomId):
-            return ApiResponse(
-                success=False, message="Room not found.", status_code=404
-            )
+    if roomId and not await get_room_by_id(session, roomId):
+        return ApiResponse(
+            success=False, message="Room not found.", status_code=404
+        )
 
-        if page < 0:
-            return ApiResponse(
-                success=False, message="Invalid page number.", status_code=400
-            )
+    if page < 0:
+        return ApiResponse(
+            success=False, message="Invalid page number.", status_code=400
+        )
 
-        is_admin = bool(admin_login)
+    is_admin = bool(admin_login)
+
+    reservations, total, next_cursor = await get_reservation(
+        session,
+        keyword,
+        roomId,
+        status,
+        page,
+        reservation_page_size,
+        datetime.fromtimestamp(startTime) if startTime else None,
+        datetime.fromtimestamp(endTime) if endTime else None,
+        is_admin,
+        cursor,
+        "admin" if is_admin else "list",
+    )
 
-        reservations, total = await get_reservation(
-            session,
-            keyword,
-            roomId,
-            status,
-            page,
-            20,
-            datetime.fromtimestamp(startTime) if startTime else None,
-            datetime.fromtimestamp(endTime) if endTime else None,
-            is_admin,
-        )
-
-        if is_admin:
-            admin_res: list[ReservationFullResponse] = []
-            for reservation in reservations:
-                class_name = reservation.class_.name
-                room_name = reservation.room.name
-                campus_name = reservation.room.campus.name
-                executor = reservation.latestExecutor.email if reservation.latestExecutor else None
-                admin_res.append(
-                    ReservationFullResponse(
-                        id=reservation.id,
-                        startTime=reservation.startTime,
-                        endTime=reservation.endTime,
-                        studentName=reservation.studentName,
-                        studentId=reservation.studentId,
-                        email=reservation.email,
-                        reason=reservation.reason,
-                        roomName=room_name,
-                        className=class_name,
-                        status=reservation.status,
-                        createdAt=reservation.createdAt,
-                        campusName=campus_name,
-                        latestExecutor=executor,
-                    )
+    if is_admin:
+        admin_res: list[ReservationFullResponse] = []
+        for reservation in reservations:
+            class_name = reservation.class_.name
+            room_name = reservation.room.name
+            campus_name = reservation.room.campus.name
+            executor = reservation.latestExecutor.email if reservation.latestExecutor else None
+            admin_res.append(
+                ReservationFullResponse(
+                    id=reservation.id,
+                    startTime=reservation.startTime,
+                    endTime=reservation.endTime,
+                    studentName=reservation.studentName,
+                    studentId=reservation.studentId,
+                    email=reservation.email,
+                    reason=reservation.reason,
+                    roomName=room_name,
+                    className=class_name,
+                    status=reservation.status,
+                    createdAt=reservation.createdAt,
+                    campusName=campus_name,
+                    latestExecutor=executor,
                 )
-            return ApiResponse(
-                success=True,
-                data=ReservationFullQueryResponse(reservations=admin_res, total=total),
             )
-        else:
-            res: List[ReservationResponseDetail] = []
-            for reservation in reservations:
-                room = reservation.room
-                class_ = reservation.class_
+        return ApiResponse(
+            success=True,
+            data=ReservationFullQueryResponse(
+                reservations=admin_res, total=total, nextCursor=next_cursor
+            ),
+        )
+    else:
+        res: List[ReservationResponseDetail] = []
+        for reservation in reservations:
+            room = reservation.room
+            class_ = reservation.class_
 
-                response_item = ReservationResponseDetail.model_validate(reservation)
-                response_item.className = class_.name if class_ else None
-                response_item.roomName = room.name if room else None
+            response_item = ReservationResponseDetail.model_validate(reservation)
+            response_item.className = class_.name if class_ else None
+            response_item.roomName = room.name if room else None
 
-                res.append(response_item)
-            return ApiResponse(
-                success=True,
-                data=ReservationQueryResponse(reservations=res, total=total),
-            )
+            res.append(response_item)
+        return ApiResponse(
+            success=True,
+            data=ReservationQueryResponse(
+                reservations=res, total=total, nextCursor=next_cursor
+            ),
+        )
 
 
 @app.post(
@@ -659,56 +678,58 @@ async def reservation_get(
 )
 @limiter.limit("5/second")
 async def admin_login(
-    request: Request, payload: AdminLoginRequest, admin_login=Depends(get_current_user)
+    request: Request,
+    payload: AdminLoginRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if admin_login:
         return ApiResponse(
             success=False, message="User already logged in.", status_code=400
         )
 
-    async with AsyncSession(engine) as session:
-        if payload.token:
-            temp_admin_login = await get_temp_admin_login_by_token(session, payload.token)
-            if not temp_admin_login:
-                return ApiResponse(
-                    success=False,
-                    message="Invalid token or token expired.",
-                    status_code=400,
-                )
-            cookie = secrets.token_hex(32)
-            await create_admin_login(session, temp_admin_login.email, cookie)
-            await delete_temp_admin_login(session, temp_admin_login)
-            response = ApiResponse(success=True, message="Login successful.")
-            response.set_cookie(
-                "uc", cookie, httponly=True, samesite="none", secure=True
-            )
-            return response
-        if not payload.email or not payload.password:
+    if payload.token:
+        temp_admin_login = await get_temp_admin_login_by_token(session, payload.token)
+        if not temp_admin_login:
             return ApiResponse(
                 success=False,
-                message="Email and password are required.",
+                message="Invalid token or token expired.",
                 status_code=400,
             )
-
-        if not payload.turnstileToken or not verify_turnstile_token(
-            payload.turnstileToken
-        ):
-            return ApiResponse(
-                success=False, message="Turnstile verification failed.", status_code=403
-            )
-
-        admin = await get_admin_by_email(session, payload.email)
-        if not admin or not verify_password(payload.password, admin.password):
-            return ApiResponse(
-                success=False, message="Invalid email or password.", status_code=401
-            )
         cookie = secrets.token_hex(32)
-        await create_admin_login(session, payload.email, cookie)
+        await create_admin_login(session, temp_admin_login.email, cookie)
+        await delete_temp_admin_login(session, temp_admin_login)
         response = ApiResponse(success=True, message="Login successful.")
         response.set_cookie(
             "uc", cookie, httponly=True, samesite="none", secure=True
         )
         return response
+    if not payload.email or not payload.password:
+        return ApiResponse(
+            success=False,
+            message="Email and password are required.",
+            status_code=400,
+        )
+
+    if not payload.turnstileToken or not verify_turnstile_token(
+        payload.turnstileToken
+    ):
+        return ApiResponse(
+            success=False, message="Turnstile verification failed.", status_code=403
+        )
+
+    admin = await get_admin_by_email(session, payload.email)
+    if not admin or not verify_password(payload.password, admin.password):
+        return ApiResponse(
+            success=False, message="Invalid email or password.", status_code=401
+        )
+    cookie = secrets.token_hex(32)
+    await create_admin_login(session, payload.email, cookie)
+    response = ApiResponse(success=True, message="Login successful.")
+    response.set_cookie(
+        "uc", cookie, httponly=True, samesite="none", secure=True
+    )
+    return response
 
 
 @app.get(
@@ -717,12 +738,16 @@ async def admin_login(
 )
 @limiter.limit("5/second")
 async def admin_logout(
-    request: Request, user_login=Depends(get_current_user)
+    request: Request,
+    user_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not user_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
+    await delete_admin_login_by_cookie(session, user_login.cookie)
+    login_cache.invalidate(user_login.cookie)
     response = ApiResponse(success=True, message="Logout successful.")
     response.delete_cookie("uc")
     return response
@@ -747,39 +772,40 @@ async def admin_check_login(
 )
 @limiter.limit("5/second")
 async def reservation_future(
-    request: Request, admin_login=Depends(get_current_user)
+    request: Request,
+    admin_login=Depends(get_current_user),
+    admin: Admin | None = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[list[ReservationUpcomingResponse]]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
-    async with AsyncSession(engine) as session:
-        admin = await get_admin_by_email(session, admin_login.email)
-        future_reservations = await get_future_reservations_by_approver_id(
-            session, admin.id if admin and admin.id is not None else -1
-        )
-        res: list[ReservationUpcomingResponse] = []
-        for reservation in future_reservations:
-            class_name = reservation.class_.name
-            room_name = reservation.room.name
-            campus_name = reservation.room.campus.name
-            res.append(
-                ReservationUpcomingResponse(
-                    id=reservation.id,
-                    startTime=reservation.startTime,
-                    endTime=reservation.endTime,
-                    studentName=reservation.studentName,
-                    email=reservation.email,
-                    reason=reservation.reason,
-                    roomName=room_name,
-                    className=class_name,
-                    studentId=reservation.studentId,
-                    status=reservation.status,
-                    createdAt=int(reservation.createdAt.timestamp()),
-                    campusName=campus_name,
-                )
+    future_reservations = await get_future_reservations_by_approver_id(
+        session, admin.id if admin and admin.id is not None else -1, "admin"
+    )
+    res: list[ReservationUpcomingResponse] = []
+    for reservation in future_reservations:
+        class_name = reservation.class_.name
+        room_name = reservation.room.name
+        campus_name = reservation.room.campus.name
+        res.append(
+            ReservationUpcomingResponse(
+                id=reservation.id,
+                startTime=reservation.startTime,
+                endTime=reservation.endTime,
+                studentName=reservation.studentName,
+                email=reservation.email,
+                reason=reservation.reason,
+                roomName=room_name,
+                className=class_name,
+                studentId=reservation.studentId,
+                status=reservation.status,
+                createdAt=int(reservation.createdAt.timestamp()),
+                campusName=campus_name,
             )
-        return ApiResponse(success=True, data=res)
+        )
+    return ApiResponse(success=True, data=res)
 
 
 @app.post(
@@ -790,150 +816,313 @@ async def reservation_future(
 async def reservation_approval(
     request: Request,
     payload: ReservationApproveRequest,
-    background_task: BackgroundTasks,
     admin_login: AdminLogin = Depends(get_current_user),
+    admin: Admin | None = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine, expire_on_commit=False) as session:
-        reservation = await get_reservation_by_id(session, payload.id)
-        admin = await get_admin_by_email(session, admin_login.email)
+    reservation = await get_reservation_by_id(session, payload.id, "detail")
 
-        if not admin:
-            return ApiResponse(
-                success=False, message="Admin not found.", status_code=404
-            )
+    if not admin:
+        return ApiResponse(
+            success=False, message="Admin not found.", status_code=404
+        )
 
-        if not reservation:
-            return ApiResponse(
-                success=False, message="Reservation not found.", status_code=404
-            )
+    if not reservation:
+        return ApiResponse(
+            success=False, message="Reservation not found.", status_code=404
+        )
 
-        room = reservation.room
+    room = reservation.room
 
-        if not room:
-            return ApiResponse(
-                success=False, message="Room not found.", status_code=404
-            )
+    if not room:
+        return ApiResponse(
+            success=False, message="Room not found.", status_code=404
+        )
 
-        if (
-            reservation.latestExecutorId is not None
-            and reservation.latestExecutorId != admin.id
-            if admin and admin.id
-            else -1
-        ):
-            return ApiResponse(
-                success=False,
-                message="Reservation has already been processed by another admin.",
-                status_code=403,
-            )
+    if (
+        reservation.latestExecutorId is not None
+        and reservation.latestExecutorId != admin.id
+        if admin and admin.id
+        else -1
+    ):
+        return ApiResponse(
+            success=False,
+            message="Reservation has already been processed by another admin.",
+            status_code=403,
+        )
 
-        if not payload.approved and not payload.reason:
-            return ApiResponse(
-                success=False,
-                message="Reason is required for rejection.",
-                status_code=400,
-            )
-        if reservation.startTime < datetime.now():
-            return ApiResponse(
-                success=False, message="Cannot change status of past reservations."
-            )
+    if not payload.approved and not payload.reason:
+        return ApiResponse(
+            success=False,
+            message="Reason is required for rejection.",
+            status_code=400,
+        )
+    if reservation.startTime < datetime.now():
+        return ApiResponse(
+            success=False, message="Cannot change status of past reservations."
+        )
 
-        def check_status() -> bool:
-            return reservation.status == "pending" or (
-                reservation.status != "pending"
-                and reservation.status
-                != ("approved" if payload.approved else "rejected")
-            )
+    def check_status() -> bool:
+        return reservation.status == "pending" or (
+            reservation.status != "pending"
+            and reservation.status
+            != ("approved" if payload.approved else "rejected")
+        )
 
-        if not check_status():
-            return ApiResponse(
-                success=False, message="Invalid approval request.", status_code=400
-            )
+    if not check_status():
+        return ApiResponse(
+            success=False, message="Invalid approval request.", status_code=400
+        )
 
-        authorized = any(
-            approver.adminId == admin.id if admin else False
-            for approver in room.approvers
+    authorized = any(
+        approver.adminId == admin.id if admin else False
+        for approver in room.approvers
+    )
+
+    if not authorized:
+        return ApiResponse(
+            success=False,
+            message="User is not authorized to approve this reservation.",
+            status_code=403,
         )
 
-        if not authorized:
-            return ApiResponse(
-                success=False,
-                message="User is not authorized to approve this reservation.",
-                status_code=403,
-            )
+    await change_reservation_status_by_id(
+        session,
+        payload.id,
+        "approved" if payload.approved else "rejected",
+        admin.id or -1,
+        payload.reason,
+    )
 
-        await change_reservation_status_by_id(
+    class_name = reservation.class_.name
+    if payload.approved:
+        await enqueue_email(
+            session,
+            "send_reservation_approval_email",
+            email_title="Reservation Approval",
+            title="Your reservation has been approved!",
+            email=reservation.email,
+            details=f"Hi {reservation.studentName}! Your reservation #{reservation.id} for {room.name if room else None} has been approved. Below is the detailed information.",
+            user=reservation.studentName,
+            room=room.name if room else "",
+            class_name=class_name or "",
+            student_id=reservation.studentId,
+            reason=reservation.reason,
+            time=f"{reservation.startTime.strftime('%Y-%m-%d %H:%M')} - {reservation.endTime.strftime('%H:%M')}",
+        )
+    else:
+        await enqueue_email(
             session,
-            payload.id,
-            "approved" if payload.approved else "rejected",
-            admin.id or -1,
-            payload.reason,
+            "send_normal_update_email",
+            email_title="Reservation Rejected",
+            title="Your reservation has been rejected.",
+            email=reservation.email,
+            details=f"Hi {reservation.studentName}! Your reservation #{reservation.id} for {room.name if room else None} has been rejected. Reason: {payload.reason}",
         )
+    return ApiResponse(success=True, message="Reservation updated successfully.")
+
+
+def remove_export_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def build_reservation_export(
+    startTime: int | None, endTime: int | None, mode: Literal["by-room", "single-sheet"]
+) -> str | None:
+    output = tempfile.NamedTemporaryFile(prefix="reservations_", suffix=".xlsx", delete=False)
+    try:
+        with output:
+            async with AsyncSession(engine) as session:
+                count = await write_reservations_xlsx(
+                    stream_reservation_export_rows(
+                        session,
+                        datetime.fromtimestamp(startTime) if startTime else None,
+                        datetime.fromtimestamp(endTime) if endTime else None,
+                        by_room=mode == "by-room",
+                    ),
+                    output,
+                    mode,
+                )
+    except BaseException:
+        remove_export_file(output.name)
+        raise
+    if not count:
+        remove_export_file(output.name)
+        return None
+    asyncio.get_running_loop().call_later(60, remove_export_file, output.name)
+    return output.name
 
-        class_name = reservation.class_.name
-        if payload.approved:
-            background_task.add_task(
-                send_reservation_approval_email,
-                email_title="Reservation Approval",
-                title="Your reservation has been approved!",
-                email=reservation.email,
-                details=f"Hi {reservation.studentName}! Your reservation #{reservation.id} for {room.name if room else None} has been approved. Below is the detailed information.",
-                user=reservation.studentName,
-                room=room.name if room else "",
-                class_name=class_name or "",
-                student_id=reservation.studentId,
-                reason=reservation.reason,
-                time=f"{reservation.startTime.strftime('%Y-%m-%d %H:%M')} - {reservation.endTime.strftime('%H:%M')}",
-            )
-        else:
-            background_task.add_task(
-                send_normal_update_email,
-                email_title="Reservation Rejected",
-                title="Your reservation has been rejected.",
-                email=reservation.email,
-                details=f"Hi {reservation.studentName}! Your reservation #{reservation.id} for {room.name if room else None} has been rejected. Reason: {payload.reason}",
+
+def iter_export_file(file: IO[bytes], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    with file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+async def stream_reservation_export(
+    startTime: int | None, endTime: int | None, mode: Literal["by-room", "single-sheet"]
+) -> AsyncIterator[Row[Any]]:
+    async with AsyncSession(engine) as session:
+        async for row in stream_reservation_export_rows(
+            session,
+            datetime.fromtimestamp(startTime) if startTime else None,
+            datetime.fromtimestamp(endTime) if endTime else None,
+            by_room=mode == "by-room",
+        ):
+            yield row
+
+
+@app.get("/reservation/export", response_model=None)
+@limiter.limit("1/second")
+async def reservation_export(
+    request: Request,
+    startTime: int | None = None,
+    endTime: int | None = None,
+    mode: Literal["by-room", "single-sheet"] = "by-room",
+    format: Literal["xlsx", "csv", "ndjson"] = "xlsx",
+    gzip: bool = False,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> StreamingResponse | ApiResponse[Any]:
+    if not admin_login:
+        return ApiResponse(
+            success=False, message="User is not logged in.", status_code=401
+        )
+    if startTime and endTime and startTime > endTime:
+        return ApiResponse(
+            success=False, message="Invalid time range.", status_code=400
+        )
+    if format != "xlsx":
+        total = await count_reservations_by_time_range(
+            session,
+            datetime.fromtimestamp(startTime) if startTime else None,
+            datetime.fromtimestamp(endTime) if endTime else None,
+        )
+        if not total:
+            return ApiResponse(
+                success=False, message="No reservations found.", status_code=404
             )
-        return ApiResponse(success=True, message="Reservation updated successfully.")
+        extension = reservation_export_extension(format, mode, gzip)
+        return StreamingResponse(
+            reservation_export_chunks(
+                stream_reservation_export(startTime, endTime, mode), format, mode, gzip
+            ),
+            media_type=reservation_export_media_types[extension.rsplit(".", 1)[-1]],
+            headers={
+                "Content-Disposition": f'attachment; filename="reservations_{uuid.uuid4()}.{extension}"',
+            },
+        )
+    path = await singleflight.do(
+        f"reservations-export-{startTime}-{endTime}-{mode}",
+        lambda: build_reservation_export(startTime, endTime, mode),
+    )
+    if not path:
+        return ApiResponse(
+            success=False, message="No reservations found.", status_code=404
+        )
+    file = open(path, "rb")
+    return StreamingResponse(
+        iter_export_file(file),
+        media_type=reservation_export_media_types["xlsx"],
+        headers={
+            "Content-Disposition": f'attachment; filename="reservations_{uuid.uuid4()}.xlsx"',
+            "Content-Length": str(os.fstat(file.fileno()).st_size),
+        },
+    )
+
+
+@app.post("/reservation/export/create", response_model=ApiResponseBody[Any])
+@limiter.limit("1/second")
+async def reservation_export_create(
+    request: Request,
+    payload: ReservationExportRequest,
+    admin=Depends(get_current_admin),
+    session: AsyncSession = Depends(get_session),
+) -> ApiResponse[Any]:
+    if not admin:
+        return ApiResponse(
+            success=False, message="User is not logged in.", status_code=401
+        )
+    if payload.startTime and payload.endTime and payload.startTime > payload.endTime:
+        return ApiResponse(
+            success=False, message="Invalid time range.", status_code=400
+        )
+    job = await create_export_job(
+        session,
+        ExportJob(
+            uuid=str(uuid.uuid4()),
+            adminId=admin.id,
+            startTime=datetime.fromtimestamp(payload.startTime) if payload.startTime else None,
+            endTime=datetime.fromtimestamp(payload.endTime) if payload.endTime else None,
+            mode=payload.mode,
+            format=payload.format,
+        ),
+    )
+    export_jobs.notify()
+    return ApiResponse(
+        success=True, message="Export job created successfully.", data={"uuid": job.uuid}
+    )
+
+
+@app.get("/reservation/export/status", response_model=ApiResponseBody[ExportJobResponse])
+@limiter.limit("10/second")
+async def reservation_export_status(
+    request: Request,
+    uuid: str,
+    admin=Depends(get_current_admin),
+    session: AsyncSession = Depends(get_session),
+) -> ApiResponse[Any]:
+    if not admin:
+        return ApiResponse(
+            success=False, message="User is not logged in.", status_code=401
+        )
+    job = await get_export_job_by_uuid(session, uuid)
+    if not job or job.adminId != admin.id:
+        return ApiResponse(
+            success=False, message="Export job not found.", status_code=404
+        )
+    return ApiResponse(success=True, data=ExportJobResponse.model_validate(job))
 
 
-@app.get("/reservation/export", response_model=None)
-@limiter.limit("1/second")
-async def reservation_export(
+@app.get("/reservation/export/download", response_model=None)
+@limiter.limit("5/second")
+async def reservation_export_download(
     request: Request,
-    startTime: int | None = None,
-    endTime: int | None = None,
-    mode: Literal["by-room", "single-sheet"] = "by-room",
-    admin_login=Depends(get_current_user),
+    uuid: str,
+    admin=Depends(get_current_admin),
+    session: AsyncSession = Depends(get_session),
 ) -> FileResponse | ApiResponse[Any]:
-    if not admin_login:
+    if not admin:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
-    if startTime and endTime and startTime > endTime:
+    job = await get_export_job_by_uuid(session, uuid)
+    if not job or job.adminId != admin.id:
         return ApiResponse(
-            success=False, message="Invalid time range.", status_code=400
+            success=False, message="Export job not found.", status_code=404
         )
-    async with AsyncSession(engine) as session:
-        reservations = await get_reservations_by_time_range(
-            session,
-            datetime.fromtimestamp(startTime) if startTime else None,
-            datetime.fromtimestamp(endTime) if endTime else None,
+    if job.status != "done":
+        return ApiResponse(
+            success=False, message="Export job is not finished.", status_code=409
         )
-        if not reservations:
-            return ApiResponse(
-                success=False, message="No reservations found.", status_code=404
-            )
-        workbook = get_exported_xlsx(reservations, mode)
-        export_uuid = uuid.uuid4()
-        workbook.save(f"cache/reservations_{export_uuid}.xlsx")
-        return FileResponse(
-            path=f"cache/reservations_{export_uuid}.xlsx",
-            filename=f"reservations_{export_uuid}.xlsx",
+    path = export_dir.open(export_job_filename(job))
+    if not path:
+        return ApiResponse(
+            success=False, message="Export file has expired.", status_code=410
         )
+    return FileResponse(
+        path=path,
+        filename=export_job_filename(job),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
 
 
 @app.post(
@@ -942,20 +1131,22 @@ async def reservation_export(
 )
 @limiter.limit("5/second")
 async def class_create(
-    request: Request, payload: ClassCreateRequest, admin_login=Depends(get_current_user)
+    request: Request,
+    payload: ClassCreateRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
-    async with AsyncSession(engine) as session:
-        campus = await get_campus_by_id(session, payload.campus)
-        if not campus:
-            return ApiResponse(
-                success=False, message="Invalid campus.", status_code=400
-            )
-        await create_class(session, name=payload.name, campus=campus)
-        return ApiResponse(success=True, message="Class created successfully.")
+    campus = await get_campus_by_id(session, payload.campus)
+    if not campus:
+        return ApiResponse(
+            success=False, message="Invalid campus.", status_code=400
+        )
+    await create_class(session, name=payload.name, campus=campus)
+    return ApiResponse(success=True, message="Class created successfully.")
 
 
 @app.post(
@@ -967,15 +1158,15 @@ async def campus_create(
     request: Request,
     payload: CampusCreateRequest,
     admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        await create_campus(session, name=payload.name)
-        return ApiResponse(success=True, message="Campus created successfully.")
+    await create_campus(session, name=payload.name)
+    return ApiResponse(success=True, message="Campus created successfully.")
 
 
 @app.post(
@@ -984,20 +1175,22 @@ async def campus_create(
 )
 @limiter.limit("5/second")
 async def room_create(
-    request: Request, payload: RoomCreateRequest, admin_login=Depends(get_current_user)
+    request: Request,
+    payload: RoomCreateRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
-    async with AsyncSession(engine) as session:
-        campus = await get_campus_by_id(session, payload.campus)
-        if not campus:
-            return ApiResponse(
-                success=False, message="Invalid campus.", status_code=400
-            )
-        await create_room(session, name=payload.name, campus=campus)
-        return ApiResponse(success=True, message="Room created successfully.")
+    campus = await get_campus_by_id(session, payload.campus)
+    if not campus:
+        return ApiResponse(
+            success=False, message="Invalid campus.", status_code=400
+        )
+    await create_room(session, name=payload.name, campus=campus)
+    return ApiResponse(success=True, message="Room created successfully.")
 
 
 @app.post(
@@ -1009,6 +1202,7 @@ async def policy_create(
     request: Request,
     payload: RoomPolicyCreateRequest,
     admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
@@ -1038,20 +1232,19 @@ async def policy_create(
         or not 59 >= payload.endTime[1] >= 0
     ):
         return ApiResponse(success=False, message="Invalid end times.", status_code=400)
-    async with AsyncSession(engine) as session:
-        room = await get_room_by_id(session, payload.room)
-        if not room:
-            return ApiResponse(
-                success=False, message="Room not found.", status_code=404
-            )
-        await create_policy(
-            session,
-            room=room,
-            days=sorted(payload.days),
-            startTime=payload.startTime,
-            endTime=payload.endTime,
+    room = await get_room_by_id(session, payload.room)
+    if not room:
+        return ApiResponse(
+            success=False, message="Room not found.", status_code=404
         )
-        return ApiResponse(success=True, message="Policy created successfully.")
+    await create_policy(
+        session,
+        room=room,
+        days=sorted(payload.days),
+        startTime=payload.startTime,
+        endTime=payload.endTime,
+    )
+    return ApiResponse(success=True, message="Policy created successfully.")
 
 
 @app.post(
@@ -1063,20 +1256,20 @@ async def policy_delete(
     request: Request,
     payload: RoomPolicyDeleteRequest,
     admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        policy = await get_policy_by_id(session, payload.id)
-        if not policy:
-            return ApiResponse(
-                success=False, message="Policy not found.", status_code=404
-            )
-        await delete_policy(session, policy)
-        return ApiResponse(success=True, message="Policy deleted successfully.")
+    policy = await get_policy_by_id(session, payload.id)
+    if not policy:
+        return ApiResponse(
+            success=False, message="Policy not found.", status_code=404
+        )
+    await delete_policy(session, policy)
+    return ApiResponse(success=True, message="Policy deleted successfully.")
 
 
 @app.post(
@@ -1088,20 +1281,20 @@ async def policy_toggle(
     request: Request,
     payload: RoomPolicyToggleRequest,
     admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        policy = await get_policy_by_id(session, payload.id)
-        if not policy:
-            return ApiResponse(
-                success=False, message="Policy not found.", status_code=404
-            )
-        await toggle_policy(session, policy)
-        return ApiResponse(success=True, message="Policy toggled successfully.")
+    policy = await get_policy_by_id(session, payload.id)
+    if not policy:
+        return ApiResponse(
+            success=False, message="Policy not found.", status_code=404
+        )
+    await toggle_policy(session, policy)
+    return ApiResponse(success=True, message="Policy toggled successfully.")
 
 
 @app.post(
@@ -1113,51 +1306,51 @@ async def policy_edit(
     request: Request,
     payload: RoomPolicyEditRequest,
     admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        policy = await get_policy_by_id(session, payload.id)
-        if not policy:
-            return ApiResponse(
-                success=False, message="Policy not found.", status_code=404
-            )
+    policy = await get_policy_by_id(session, payload.id)
+    if not policy:
+        return ApiResponse(
+            success=False, message="Policy not found.", status_code=404
+        )
 
-        if not all(6 >= day >= 0 for day in payload.days) or len(payload.days) > 7:
-            return ApiResponse(success=False, message="Invalid days.", status_code=400)
+    if not all(6 >= day >= 0 for day in payload.days) or len(payload.days) > 7:
+        return ApiResponse(success=False, message="Invalid days.", status_code=400)
 
-        if (
-            not len(payload.startTime) == 2
-            or not 23 >= payload.startTime[0] >= 0
-            or not 59 >= payload.startTime[1] >= 0
-        ):
-            return ApiResponse(
-                success=False, message="Invalid start times.", status_code=400
-            )
+    if (
+        not len(payload.startTime) == 2
+        or not 23 >= payload.startTime[0] >= 0
+        or not 59 >= payload.startTime[1] >= 0
+    ):
+        return ApiResponse(
+            success=False, message="Invalid start times.", status_code=400
+        )
 
-        if (
-            not len(payload.endTime) == 2
-            or not 23 >= payload.endTime[0] >= 0
-            or not 59 >= payload.endTime[1] >= 0
-        ):
-            return ApiResponse(
-                success=False, message="Invalid end times.", status_code=400
-            )
+    if (
+        not len(payload.endTime) == 2
+        or not 23 >= payload.endTime[0] >= 0
+        or not 59 >= payload.endTime[1] >= 0
+    ):
+        return ApiResponse(
+            success=False, message="Invalid end times.", status_code=400
+        )
 
-        if (
-            policy.days == payload.days
-            and policy.startTime == payload.startTime
-            and policy.endTime == payload.endTime
-        ):
-            return ApiResponse(success=True, message="No changes detected.")
-        policy.days = payload.days
-        policy.startTime = payload.startTime
-        policy.endTime = payload.endTime
-        await edit_policy(session, policy=policy)
-        return ApiResponse(success=True, message="Policy edited successfully.")
+    if (
+        policy.days == payload.days
+        and policy.startTime == payload.startTime
+        and policy.endTime == payload.endTime
+    ):
+        return ApiResponse(success=True, message="No changes detected.")
+    policy.days = payload.days
+    policy.startTime = payload.startTime
+    policy.endTime = payload.endTime
+    await edit_policy(session, policy=policy)
+    return ApiResponse(success=True, message="Policy edited successfully.")
 
 
 @app.post(
@@ -1166,25 +1359,27 @@ async def policy_edit(
 )
 @limiter.limit("5/second")
 async def room_edit(
-    request: Request, payload: RoomEditRequest, admin_login=Depends(get_current_user)
+    request: Request,
+    payload: RoomEditRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        room = await get_room_by_id(session, payload.id)
-        if not room:
-            return ApiResponse(
-                success=False, message="Room not found.", status_code=404
-            )
+    room = await get_room_by_id(session, payload.id)
+    if not room:
+        return ApiResponse(
+            success=False, message="Room not found.", status_code=404
+        )
 
-        room.name = payload.name
-        room.campusId = payload.campus
-        room.enabled = payload.enabled
-        await edit_room(session, room)
-        return ApiResponse(success=True, message="Room edited successfully.")
+    room.name = payload.name
+    room.campusId = payload.campus
+    room.enabled = payload.enabled
+    await edit_room(session, room)
+    return ApiResponse(success=True, message="Room edited successfully.")
 
 
 @app.post(
@@ -1193,23 +1388,25 @@ async def room_edit(
 )
 @limiter.limit("5/second")
 async def campus_edit(
-    request: Request, payload: CampusEditRequest, admin_login=Depends(get_current_user)
+    request: Request,
+    payload: CampusEditRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        campus = await get_campus_by_id(session, payload.id)
-        if not campus:
-            return ApiResponse(
-                success=False, message="Campus not found.", status_code=404
-            )
+    campus = await get_campus_by_id(session, payload.id)
+    if not campus:
+        return ApiResponse(
+            success=False, message="Campus not found.", status_code=404
+        )
 
-        campus.name = payload.name
-        await edit_campus(session, campus)
-        return ApiResponse(success=True, message="Campus edited successfully.")
+    campus.name = payload.name
+    await edit_campus(session, campus)
+    return ApiResponse(success=True, message="Campus edited successfully.")
 
 
 @app.post(
@@ -1218,24 +1415,26 @@ async def campus_edit(
 )
 @limiter.limit("5/second")
 async def class_edit(
-    request: Request, payload: ClassEditRequest, admin_login=Depends(get_current_user)
+    request: Request,
+    payload: ClassEditRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        class_ = await get_class_by_id(session, payload.id)
-        if not class_:
-            return ApiResponse(
-                success=False, message="Class not found.", status_code=404
-            )
+    class_ = await get_class_by_id(session, payload.id)
+    if not class_:
+        return ApiResponse(
+            success=False, message="Class not found.", status_code=404
+        )
 
-        class_.name = payload.name
-        class_.campusId = payload.campus
-        await edit_class(session, class_)
-        return ApiResponse(success=True, message="Class edited successfully.")
+    class_.name = payload.name
+    class_.campusId = payload.campus
+    await edit_class(session, class_)
+    return ApiResponse(success=True, message="Class edited successfully.")
 
 
 @app.post("/approver/toggle-notification", response_model=ApiResponseBody[Any])
@@ -1244,24 +1443,55 @@ async def approver_toggle(
     request: Request,
     payload: RoomApproverNotificationsToggleRequest,
     admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
-    async with AsyncSession(engine) as session:
-        approver = await get_room_approver_by_id(session, payload.id)
-        if not approver:
-            return ApiResponse(
-                success=False, message="Approver not found.", status_code=404
-            )
+    approver = await get_room_approver_by_id(session, payload.id)
+    if not approver:
+        return ApiResponse(
+            success=False, message="Approver not found.", status_code=404
+        )
+
+    approver.notificationsEnabled = not approver.notificationsEnabled
+    await edit_approver(session, approver)
+    return ApiResponse(
+        success=True, message="Approver notifications toggled successfully."
+    )
+
 
-        approver.notificationsEnabled = not approver.notificationsEnabled
-        await edit_approver(session, approver)
+@app.post("/approver/set-digest", response_model=ApiResponseBody[Any])
+@limiter.limit("5/second")
+async def approver_set_digest(
+    request: Request,
+    payload: RoomApproverDigestRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+) -> ApiResponse[Any]:
+    if not admin_login:
+        return ApiResponse(
+            success=False, message="User is not logged in.", status_code=401
+        )
+    if not 0 <= payload.digestMinutes <= 1440:
+        return ApiResponse(
+            success=False,
+            message="Digest interval must be between 0 and 1440 minutes.",
+            status_code=400,
+        )
+    approver = await get_room_approver_by_id(session, payload.id)
+    if not approver:
         return ApiResponse(
-            success=True, message="Approver notifications toggled successfully."
+            success=False, message="Approver not found.", status_code=404
         )
 
+    approver.digestMinutes = payload.digestMinutes
+    await edit_approver(session, approver)
+    return ApiResponse(
+        success=True, message="Approver digest interval updated successfully."
+    )
+
 
 @app.post(
     "/approver/create",
@@ -1272,36 +1502,36 @@ async def approver_create(
     request: Request,
     payload: RoomApproverCreateRequest,
     admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        room = await get_room_by_id(session, payload.room)
-        admin = await get_admin_by_id(session, payload.admin)
-        if not room:
-            return ApiResponse(
-                success=False, message="Room not found.", status_code=404
-            )
+    room = await get_room_by_id(session, payload.room)
+    admin = await get_admin_by_id(session, payload.admin)
+    if not room:
+        return ApiResponse(
+            success=False, message="Room not found.", status_code=404
+        )
 
-        if not admin:
-            return ApiResponse(
-                success=False, message="Admin not found.", status_code=404
-            )
+    if not admin:
+        return ApiResponse(
+            success=False, message="Admin not found.", status_code=404
+        )
 
-        approvers = await get_room_approvers_by_room_id(session, payload.room)
+    approvers = await get_room_approvers_by_room_id(session, payload.room)
 
-        if approvers and any(approver.admin == payload.admin for approver in approvers):
-            return ApiResponse(
-                success=False,
-                message="Admin is already an approver for this room.",
-                status_code=409,
-            )
+    if approvers and any(approver.adminId == payload.admin for approver in approvers):
+        return ApiResponse(
+            success=False,
+            message="Admin is already an approver for this room.",
+            status_code=409,
+        )
 
-        await create_room_approver(session, room=room, admin=admin)
-        return ApiResponse(success=True, message="Room approver created successfully.")
+    await create_room_approver(session, room=room, admin=admin)
+    return ApiResponse(success=True, message="Room approver created successfully.")
 
 
 @app.post(
@@ -1313,21 +1543,21 @@ async def approver_delete(
     request: Request,
     payload: RoomApproverDeleteRequest,
     admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        approver = await get_room_approver_by_id(session, payload.id)
-        if not approver:
-            return ApiResponse(
-                success=False, message="Approver not found.", status_code=404
-            )
+    approver = await get_room_approver_by_id(session, payload.id)
+    if not approver:
+        return ApiResponse(
+            success=False, message="Approver not found.", status_code=404
+        )
 
-        await delete_room_approver(session, approver=approver)
-        return ApiResponse(success=True, message="Room approver deleted successfully.")
+    await delete_room_approver(session, approver=approver)
+    return ApiResponse(success=True, message="Room approver deleted successfully.")
 
 
 @app.get(
@@ -1336,25 +1566,26 @@ async def approver_delete(
 )
 @limiter.limit("5/second")
 async def admin_list(
-    request: Request, admin_login=Depends(get_current_user)
+    request: Request,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[list[AdminResponse]]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
 
-    async with AsyncSession(engine) as session:
-        admins = await get_admins(session)
-        res = [
-            AdminResponse(
-                id=admin.id,
-                name=admin.name,
-                email=admin.email,
-                createdAt=admin.createdAt,
-            )
-            for admin in admins
-        ]
-        return ApiResponse(success=True, data=res)
+    admins = await get_admins(session)
+    res = [
+        AdminResponse(
+            id=admin.id,
+            name=admin.name,
+            email=admin.email,
+            createdAt=admin.createdAt,
+        )
+        for admin in admins
+    ]
+    return ApiResponse(success=True, data=res)
 
 
 @app.post(
@@ -1363,34 +1594,36 @@ async def admin_list(
 )
 @limiter.limit("5/second")
 async def admin_create(
-    request: Request, payload: AdminCreateRequest, admin_login=Depends(get_current_user)
+    request: Request,
+    payload: AdminCreateRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
-    async with AsyncSession(engine) as session:
-        if await get_admin_by_email(session, payload.email):
-            return ApiResponse(
-                success=False, message="Admin already exists.", status_code=409
-            )
-        if not re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", payload.email):
-            return ApiResponse(
-                success=False, message="Invalid email format.", status_code=400
-            )
-        if len(payload.password) < 6:
-            return ApiResponse(
-                success=False,
-                message="Password must be at least 6 characters.",
-                status_code=400,
-            )
-        await create_admin(
-            session,
-            name=payload.name,
-            email=payload.email,
-            password=password_hash(payload.password),
+    if await get_admin_by_email(session, payload.email):
+        return ApiResponse(
+            success=False, message="Admin already exists.", status_code=409
+        )
+    if not re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", payload.email):
+        return ApiResponse(
+            success=False, message="Invalid email format.", status_code=400
         )
-        return ApiResponse(success=True, message="Admin created successfully.")
+    if len(payload.password) < 6:
+        return ApiResponse(
+            success=False,
+            message="Password must be at least 6 characters.",
+            status_code=400,
+        )
+    await create_admin(
+        session,
+        name=payload.name,
+        email=payload.email,
+        password=password_hash(payload.password),
+    )
+    return ApiResponse(success=True, message="Admin created successfully.")
 
 
 @app.post(
@@ -1402,21 +1635,22 @@ async def admin_edit_password(
     request: Request,
     payload: AdminEditPasswordRequest,
     admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
-    async with AsyncSession(engine) as session:
-        admin = await get_admin_by_id(session, payload.admin)
-        if not admin:
-            return ApiResponse(
-                success=False, message="Admin not found.", status_code=404
-            )
-        await change_admin_password(
-            session, payload.admin, password_hash(payload.newPassword)
+    admin = await get_admin_by_id(session, payload.admin)
+    if not admin:
+        return ApiResponse(
+            success=False, message="Admin not found.", status_code=404
         )
-        return ApiResponse(success=True, message="Password changed successfully.")
+    login_cache.invalidate_email(admin.email)
+    await change_admin_password(
+        session, payload.admin, password_hash(payload.newPassword)
+    )
+    return ApiResponse(success=True, message="Password changed successfully.")
 
 
 @app.post(
@@ -1425,32 +1659,35 @@ async def admin_edit_password(
 )
 @limiter.limit("5/second")
 async def admin_edit(
-    request: Request, payload: AdminEditRequest, admin_login=Depends(get_current_user)
+    request: Request,
+    payload: AdminEditRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
-    async with AsyncSession(engine) as session:
-        admin = await get_admin_by_id(session, payload.id)
-        if not admin:
-            return ApiResponse(
-                success=False, message="Admin not found.", status_code=404
-            )
-        if admin.email != payload.email and await get_admin_by_email(session, payload.email):
-            return ApiResponse(
-                success=False, message="Email already in use.", status_code=409
-            )
-        if not re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", payload.email):
-            return ApiResponse(
-                success=False, message="Invalid email format.", status_code=400
-            )
-        if admin.name == payload.name and admin.email == payload.email:
-            return ApiResponse(success=True, message="No changes detected.")
-        admin.name = payload.name
-        admin.email = payload.email
-        await edit_admin(session, admin)
-        return ApiResponse(success=True, message="Admin edited successfully.")
+    admin = await get_admin_by_id(session, payload.id)
+    if not admin:
+        return ApiResponse(
+            success=False, message="Admin not found.", status_code=404
+        )
+    if admin.email != payload.email and await get_admin_by_email(session, payload.email):
+        return ApiResponse(
+            success=False, message="Email already in use.", status_code=409
+        )
+    if not re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", payload.email):
+        return ApiResponse(
+            success=False, message="Invalid email format.", status_code=400
+        )
+    if admin.name == payload.name and admin.email == payload.email:
+        return ApiResponse(success=True, message="No changes detected.")
+    login_cache.invalidate_email(admin.email)
+    admin.name = payload.name
+    admin.email = payload.email
+    await edit_admin(session, admin)
+    return ApiResponse(success=True, message="Admin edited successfully.")
 
 
 @app.post(
@@ -1459,20 +1696,23 @@ async def admin_edit(
 )
 @limiter.limit("5/second")
 async def admin_delete(
-    request: Request, payload: AdminDeleteRequest, admin_login=Depends(get_current_user)
+    request: Request,
+    payload: AdminDeleteRequest,
+    admin_login=Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[Any]:
     if not admin_login:
         return ApiResponse(
             success=False, message="User is not logged in.", status_code=401
         )
-    async with AsyncSession(engine) as session:
-        admin = await get_admin_by_id(session, payload.id)
-        if not admin:
-            return ApiResponse(
-                success=False, message="Admin not found.", status_code=404
-            )
-        await delete_admin(session, admin)
-        return ApiResponse(success=True, message="Admin deleted successfully.")
+    admin = await get_admin_by_id(session, payload.id)
+    if not admin:
+        return ApiResponse(
+            success=False, message="Admin not found.", status_code=404
+        )
+    login_cache.invalidate_email(admin.email)
+    await delete_admin(session, admin)
+    return ApiResponse(success=True, message="Admin deleted successfully.")
 
 
 @app.get(
@@ -1482,6 +1722,7 @@ async def admin_delete(
 @limiter.limit("1/second")
 async def analytics_overview(
     request: Request,
+    session: AsyncSession = Depends(get_session),
 ) -> ApiResponse[AnalyticsOverviewResponse]:
     daily_reservations: list[int] = []
     daily_reservation_creations: list[int] = []
@@ -1500,8 +1741,7 @@ async def analytics_overview(
     monthly_rejections: list[int] = []
     now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
     start = now - timedelta(days=365)
-    async with AsyncSession(engine) as session:
-        analytics = await get_analytics_between(session, start, now)
+    analytics = await get_analytics_between(session, start, now)
     analytics_by_date: dict[Any, Analytic] = {a.date.date(): a for a in analytics}
     for i in range(30):
         d = (now - timedelta(days=29 - i)).date()
@@ -1590,11 +1830,7 @@ async def analytics_overview(
     return ApiResponse(success=True, data=data)
 
 
-@app.get("/analytics/weekly", response_model=ApiResponseBody[AnalyticsWeeklyResponse])
-@limiter.limit("1/second")
-async def analytics_weekly(
-    request: Request,
-) -> ApiResponse[AnalyticsWeeklyResponse]:
+async def build_analytics_weekly(start: datetime, key: str) -> AnalyticsWeeklyResponse:
     def is_meaningful(token: str) -> bool:
         token = token.strip()
         if not token:
@@ -1604,17 +1840,10 @@ async def analytics_weekly(
             return False
         return True
 
-    now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    start = now - timedelta(days=now.weekday() + 7)
     end = start + timedelta(days=6, hours=23, minutes=59, seconds=59)
-
     async with AsyncSession(engine) as session:
-        if cached := await get_cache_by_key(session, f"analytics-weekly-{start.date()}"):
-            return ApiResponse(
-                success=True,
-                data=AnalyticsWeeklyResponse.model_validate(cached.value),
-            )
-
+        if cached := await get_cache_by_key(session, key):
+            return AnalyticsWeeklyResponse.model_validate(cached.value)
         analytics = await get_analytics_between(session, start, end)
         analytics_by_date: dict[Any, Analytic] = {a.date.date(): a for a in analytics}
         total_reservations = 0
@@ -1640,7 +1869,7 @@ async def analytics_weekly(
                 daily_reservation_creations[i] = (
                     analytic_for_day.reservationCreations or 0
                 )
-        all_rooms = await get_room(session)
+        all_rooms = await get_room(session, "analytics")
         hourly_reservations = [0] * 24
 
         for room in all_rooms:
@@ -1694,9 +1923,29 @@ async def analytics_weekly(
             dailyReservations=daily_reservations,
             dailyReservationCreations=daily_reservation_creations,
         )
-        cache = Cache(key=f"analytics-weekly-{start.date()}", value=data.model_dump())
+        cache = Cache(key=key, value=data.model_dump())
         await create_cache(session, cache)
-        return ApiResponse(success=True, data=data)
+        return data
+
+
+@app.get("/analytics/weekly", response_model=ApiResponseBody[AnalyticsWeeklyResponse])
+@limiter.limit("1/second")
+async def analytics_weekly(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+) -> ApiResponse[AnalyticsWeeklyResponse]:
+    now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = now - timedelta(days=now.weekday() + 7)
+    key = f"analytics-weekly-{start.date()}"
+
+    if cached := await get_cache_by_key(session, key):
+        return ApiResponse(
+            success=True,
+            data=AnalyticsWeeklyResponse.model_validate(cached.value),
+        )
+
+    data = await singleflight.do(key, lambda: build_analytics_weekly(start, key))
+    return ApiResponse(success=True, data=data)
 
 
 @app.get("/analytics/overview/export", response_model=None)
@@ -1705,33 +1954,62 @@ async def analytics_overview_export(
     request: Request,
     type: str,
     turnstileToken: str,
-) -> FileResponse | ApiResponse[Any]:
+    session: AsyncSession = Depends(get_session),
+) -> Response | ApiResponse[Any]:
+    if type not in ("pdf", "png"):
+        return ApiResponse(success=False, message="Invalid export type.", status_code=400)
     if not verify_turnstile_token(turnstileToken):
         return ApiResponse(
             success=False, message="Turnstile verification failed.", status_code=403
         )
-    export_uuid = uuid.uuid4()
-    if type == "pdf":
-        await get_exported_pdf(
-            f"{base_url}/reservation/analytics/raw/overview",
-            f"cache/overview_{export_uuid}.pdf",
-        )
-        return FileResponse(
-            f"cache/overview_{export_uuid}.pdf",
-            media_type="application/pdf",
-            filename=f"overview_{export_uuid}.pdf",
-        )
-    elif type == "png":
-        await get_screenshot(
-            f"{base_url}/reservation/analytics/raw/overview",
-            f"cache/overview_{export_uuid}.png",
-        )
-        return FileResponse(
-            f"cache/overview_{export_uuid}.png",
-            media_type="image/png",
-            filename=f"overview_{export_uuid}.png",
+    now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    # Today's counters move with every request (this one included), so the render is
+    # keyed on the settled days up to yesterday plus today's date.
+    analytics = await get_analytics_between(
+        session, now - timedelta(days=365), now - timedelta(days=1)
+    )
+    digest = analytics_digest(analytics, now.date())
+    headers = {"ETag": f'"{digest}-{type}"', "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    path, timings = await get_rendered_export("overview", type, digest)
+    return FileResponse(
+        path,
+        media_type="application/pdf" if type == "pdf" else "image/png",
+        filename=f"overview_{digest[:12]}.{type}",
+        headers={**headers, **server_timing(timings)},
+    )
+
+
+async def get_cached_export(session: AsyncSession, key: str, type: str) -> str | None:
+    cached = await get_cache_by_key(session, key)
+    if not cached:
+        return None
+    name = cached.value.get("file") or f"weekly_{cached.value['exportUuid']}.{type}"
+    if cache_dir.open(name):
+        return cached.value["exportUuid"]
+    await delete_cache(session, cached)
+    return None
+
+
+async def render_weekly_export(type: str, key: str) -> tuple[str, dict[str, float] | None]:
+    async with AsyncSession(engine) as session:
+        if export_uuid := await get_cached_export(session, key, type):
+            return export_uuid, None
+        export_uuid = str(uuid.uuid4())
+        name = f"weekly_{export_uuid}.{type}"
+        temp_path = cache_dir.temp_path(name)
+        render = get_exported_pdf if type == "pdf" else get_screenshot
+        try:
+            timings = await render(f"{base_url}/reservation/analytics/raw/weekly", temp_path)
+        except BaseException:
+            cache_dir.remove(os.path.basename(temp_path))
+            raise
+        cache_dir.publish(temp_path, name)
+        await create_cache(
+            session, Cache(key=key, value={"exportUuid": export_uuid, "file": name})
         )
-    return ApiResponse(success=False, message="Invalid export type.", status_code=400)
+        return export_uuid, timings
 
 
 @app.get("/analytics/weekly/export", response_model=None)
@@ -1740,12 +2018,16 @@ async def analytics_weekly_export(
     request: Request,
     type: str,
     turnstileToken: str,
+    session: AsyncSession = Depends(get_session),
 ) -> FileResponse | ApiResponse[Any]:
     if not verify_turnstile_token(turnstileToken):
         return ApiResponse(
             success=False, message="Turnstile verification failed.", status_code=403
         )
-    export_uuid = uuid.uuid4()
+    if type not in ("pdf", "png"):
+        return ApiResponse(
+            success=False, message="Invalid export type.", status_code=400
+        )
     start = (
         datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         - timedelta(
@@ -1755,59 +2037,15 @@ async def analytics_weekly_export(
             + 7
         )
     ).date()
-    async with AsyncSession(engine) as session:
-        if type == "pdf":
-            if cached := await get_cache_by_key(
-                session, f"analytics-weekly-export-pdf-{start}"
-            ):
-                return FileResponse(
-                    path=f"cache/weekly_{cached.value['exportUuid']}.pdf",
-                    media_type="application/pdf",
-                    filename=f"weekly_{cached.value['exportUuid']}.pdf",
-                )
-            await get_exported_pdf(
-                f"{base_url}/reservation/analytics/raw/weekly",
-                f"cache/weekly_{export_uuid}.pdf",
-            )
-            await create_cache(
-                session,
-                Cache(
-                    key=f"analytics-weekly-export-pdf-{start}",
-                    value={"exportUuid": str(export_uuid)},
-                ),
-            )
-            return FileResponse(
-                f"cache/weekly_{export_uuid}.pdf",
-                media_type="application/pdf",
-                filename=f"weekly_{export_uuid}.pdf",
-            )
-        elif type == "png":
-            if cached := await get_cache_by_key(
-                session, f"analytics-weekly-export-png-{start}"
-            ):
-                return FileResponse(
-                    path=f"cache/weekly_{cached.value['exportUuid']}.png",
-                    media_type="image/png",
-                    filename=f"weekly_{cached.value['exportUuid']}.png",
-                )
-            await get_screenshot(
-                f"{base_url}/reservation/analytics/raw/weekly",
-                f"cache/weekly_{export_uuid}.png",
-            )
-            await create_cache(
-                session,
-                Cache(
-                    key=f"analytics-weekly-export-png-{start}",
-                    value={"exportUuid": str(export_uuid)},
-                ),
-            )
-            return FileResponse(
-                f"cache/weekly_{export_uuid}.png",
-                media_type="image/png",
-                filename=f"weekly_{export_uuid}.png",
-            )
-        return ApiResponse(
-            success=False, message="Invalid export type.", status_code=400
+    key = f"analytics-weekly-export-{type}-{start}"
+    timings: dict[str, float] | None = None
+    if not (export_uuid := await get_cached_export(session, key, type)):
+        export_uuid, timings = await singleflight.do(
+            key, lambda: render_weekly_export(type, key)
         )
-
-
+    return FileResponse(
+        cache_dir.path(f"weekly_{export_uuid}.{type}"),
+        media_type="application/pdf" if type == "pdf" else "image/png",
+        filename=f"weekly_{export_uuid}.{type}",
+        headers=server_timing(timings),
+    )
@@ -0,0 +1,159 @@
+import asyncio
+import codecs
+import re
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.env import *
+from core.orm import *
+
+_redact_pattern = re.compile(
+    r'("(?:%s)"\s*:\s*)"(?:[^"\\]|\\.)*(?:"|$)'
+    % "|".join(re.escape(field) for field in access_log_redact_fields),
+    re.IGNORECASE,
+)
+
+
+def redact_payload(payload: str) -> str:
+    if not access_log_redact_fields:
+        return payload
+    return _redact_pattern.sub(r'\1"[REDACTED]"', payload)
+
+
+def access_log_sample_rate(path: str) -> float:
+    prefix = max(
+        (prefix for prefix in access_log_sample_rates if path.startswith(prefix)),
+        key=len,
+        default=None,
+    )
+    return 1.0 if prefix is None else access_log_sample_rates[prefix]
+
+
+class PayloadCapture:
+    def __init__(self, limit: int = access_log_max_payload_bytes) -> None:
+        self.limit = limit
+        self.body = bytearray()
+        self.size = 0
+
+    def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        remaining = self.limit - len(self.body)
+        if remaining > 0:
+            self.body.extend(chunk[:remaining])
+
+    def text(self) -> str | None:
+        if self.limit <= 0:
+            return None
+        truncated = self.size > len(self.body)
+        try:
+            text = codecs.getincrementaldecoder("utf-8")().decode(
+                bytes(self.body), final=not truncated
+            )
+        except UnicodeDecodeError:
+            return None
+        text = redact_payload(text)
+        if truncated:
+            text += f"...[truncated, {self.size} bytes]"
+        return text
+
+
+class AccessLogWriter:
+    def __init__(
+        self,
+        queue_size: int = access_log_queue_size,
+        batch_size: int = access_log_batch_size,
+        flush_interval: float = access_log_flush_interval,
+        block_timeout: float = access_log_block_timeout,
+    ) -> None:
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: asyncio.Queue[dict[str, Any] | None] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._engine: AsyncEngine | None = None
+
+    def start(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        self._queue = asyncio.Queue(self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if not self._queue or not self._task:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._queue = None
+        self._task = None
+
+    async def put(self, log: dict[str, Any]) -> bool:
+        if not self._queue:
+            self.dropped += 1
+            return False
+        log.setdefault("time", datetime.now())
+        try:
+            self._queue.put_nowait(log)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if self.block_timeout > 0:
+            try:
+                await asyncio.wait_for(self._queue.put(log), self.block_timeout)
+                return True
+            except asyncio.TimeoutError:
+                pass
+        self.dropped += 1
+        return False
+
+    async def _run(self) -> None:
+        assert self._queue
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[dict[str, Any]]) -> None:
+        assert self._engine
+        try:
+            async with self._engine.begin() as conn:
+                await conn.execute(insert(AccessLog), batch)
+            self.written += len(batch)
+        except Exception:
+            self.failed += len(batch)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+access_log_writer = AccessLogWriter()
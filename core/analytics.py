@@ -0,0 +1,140 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.env import *
+from core.types import *
+
+analytic_metrics = (
+    "reservations",
+    "approvals",
+    "rejections",
+    "reservationCreations",
+    "requests",
+)
+
+
+async def update_analytic(
+    session: AsyncSession,
+    date: datetime,
+    reservations: int,
+    approvals: int,
+    rejections: int,
+    reservationCreations: int,
+    requests: int,
+) -> None:
+    day = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    increments = {
+        "reservations": reservations,
+        "approvals": approvals,
+        "rejections": rejections,
+        "reservationCreations": reservationCreations,
+        "requests": requests,
+    }
+    if not any(increments.values()):
+        return
+    statement = (
+        update(Analytic)
+        .where(col(Analytic.date) == day)
+        .values(
+            {
+                name: getattr(Analytic, name) + value
+                for name, value in increments.items()
+                if value
+            }
+        )
+    )
+    result = await session.exec(statement)  # type: ignore[call-overload]
+    if result.rowcount == 0:
+        session.add(Analytic(date=day, **increments))
+        try:
+            await session.commit()
+            return
+        except IntegrityError:
+            await session.rollback()
+            await session.exec(statement)  # type: ignore[call-overload]
+    await session.commit()
+
+
+class AnalyticCounter:
+    def __init__(self, flush_interval: float = analytics_flush_interval) -> None:
+        self.flush_interval = flush_interval
+        self._counts: defaultdict[tuple[datetime, str], int] = defaultdict(int)
+        self._task: asyncio.Task[None] | None = None
+        self._stopping: asyncio.Event | None = None
+        self._engine: AsyncEngine | None = None
+
+    def increment(
+        self,
+        date: datetime,
+        reservations: int = 0,
+        approvals: int = 0,
+        rejections: int = 0,
+        reservationCreations: int = 0,
+        requests: int = 0,
+    ) -> None:
+        day = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        values = (reservations, approvals, rejections, reservationCreations, requests)
+        for name, value in zip(analytic_metrics, values):
+            if value:
+                self._counts[(day, name)] += value
+
+    def pending(self) -> dict[tuple[datetime, str], int]:
+        return dict(self._counts)
+
+    def start(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task and self._stopping:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        self._stopping = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        assert self._stopping
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    def _requeue(self, day: datetime, values: dict[str, int]) -> None:
+        for name, value in values.items():
+            self._counts[(day, name)] += value
+
+    async def flush(self, engine: AsyncEngine | None = None) -> None:
+        engine = engine or self._engine
+        if not engine or not self._counts:
+            return
+        counts, self._counts = self._counts, defaultdict(int)
+        days: defaultdict[datetime, dict[str, int]] = defaultdict(dict)
+        for (day, name), value in counts.items():
+            days[day][name] = value
+        pending = list(days.items())
+        for i, (day, values) in enumerate(pending):
+            try:
+                async with AsyncSession(engine) as session:
+                    await update_analytic(
+                        session, day, *(values.get(name, 0) for name in analytic_metrics)
+                    )
+            except Exception:
+                self._requeue(day, values)
+            except BaseException:
+                for day, values in pending[i:]:
+                    self._requeue(day, values)
+                raise
+
+
+analytic_counter = AnalyticCounter()
@@ -0,0 +1,222 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, async_playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from core.env import *
+
+
+class BrowserGeneration:
+    def __init__(self, browser: Browser) -> None:
+        self.browser = browser
+        self.renders = 0
+        self.active = 0
+        self.retired = False
+        self.idle: dict[int, list[tuple[BrowserContext, Page]]] = {}
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        size: int = browser_pool_size,
+        max_renders: int = browser_max_renders,
+    ) -> None:
+        self.size = size
+        self.max_renders = max_renders
+        self.launches = 0
+        self.restarts = 0
+        self.renders = 0
+        self.reused = 0
+        self._playwright: Playwright | None = None
+        self._current: BrowserGeneration | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._lock: asyncio.Lock | None = None
+
+    async def start(self) -> None:
+        try:
+            await self._generation()
+        except Exception:
+            pass
+
+    async def _generation(self) -> BrowserGeneration:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            current = self._current
+            if current and not current.browser.is_connected():
+                self.restarts += 1
+                await self._retire(current)
+                current = None
+            if current and current.renders >= self.max_renders:
+                await self._retire(current)
+                current = None
+            if current is None:
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                try:
+                    current = BrowserGeneration(await self._playwright.chromium.launch())
+                except Exception:
+                    await self._stop_playwright()
+                    raise
+                self.launches += 1
+                self._current = current
+            return current
+
+    async def _retire(self, generation: BrowserGeneration) -> None:
+        generation.retired = True
+        if self._current is generation:
+            self._current = None
+        if generation.active == 0:
+            await self._close_generation(generation)
+
+    async def _close_generation(self, generation: BrowserGeneration) -> None:
+        generation.idle.clear()
+        try:
+            await generation.browser.close()
+        except Exception:
+            pass
+
+    async def _checkout(
+        self, generation: BrowserGeneration, device_scale: int
+    ) -> tuple[BrowserContext, Page]:
+        idle = generation.idle.get(device_scale)
+        while idle:
+            context, page = idle.pop()
+            if not page.is_closed():
+                self.reused += 1
+                return context, page
+            await self._close_context(context)
+        context = await generation.browser.new_context(
+            viewport={"width": 800, "height": 900},
+            device_scale_factor=device_scale,
+        )
+        return context, await context.new_page()
+
+    async def _close_context(self, context: BrowserContext) -> None:
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _release(
+        self,
+        generation: BrowserGeneration,
+        device_scale: int,
+        context: BrowserContext | None,
+        page: Page | None,
+        healthy: bool,
+    ) -> None:
+        generation.active -= 1
+        if context and page and healthy and not generation.retired:
+            generation.idle.setdefault(device_scale, []).append((context, page))
+        elif context:
+            await self._close_context(context)
+        if generation.retired and generation.active == 0:
+            await self._close_generation(generation)
+
+    @asynccontextmanager
+    async def page(self, device_scale: int = 2) -> AsyncIterator[Page]:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            generation = await self._generation()
+            generation.active += 1
+            context: BrowserContext | None = None
+            page: Page | None = None
+            healthy = False
+            try:
+                context, page = await self._checkout(generation, device_scale)
+                yield page
+                await context.clear_cookies()
+                healthy = True
+                generation.renders += 1
+                self.renders += 1
+            finally:
+                if not generation.browser.is_connected():
+                    healthy = False
+                await self._release(generation, device_scale, context, page, healthy)
+
+    async def close(self) -> None:
+        if self._current:
+            await self._retire(self._current)
+        await self._stop_playwright()
+
+    async def _stop_playwright(self) -> None:
+        playwright, self._playwright = self._playwright, None
+        if playwright:
+            try:
+                await playwright.stop()
+            except Exception:
+                pass
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "launches": self.launches,
+            "restarts": self.restarts,
+            "renders": self.renders,
+            "reused": self.reused,
+            "active": self._current.active if self._current else 0,
+        }
+
+
+async def wait_for_render_ready(page: Page, timeout: float = render_ready_timeout) -> bool:
+    ready = asyncio.ensure_future(
+        page.wait_for_function("() => window.__renderReady === true", timeout=timeout)
+    )
+    idle = asyncio.ensure_future(page.wait_for_load_state("networkidle"))
+    try:
+        await asyncio.wait({ready, idle}, return_when=asyncio.FIRST_COMPLETED)
+        if not ready.done() and not await page.evaluate("() => '__renderReady' in window"):
+            return False
+        await ready
+        return True
+    except PlaywrightTimeoutError:
+        await idle
+        return False
+    finally:
+        for task in (ready, idle):
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()
+
+
+class RenderStats:
+    def __init__(self) -> None:
+        self.kinds: dict[str, dict[str, float]] = {}
+
+    def record(self, kind: str, timings: dict[str, float], ready: bool) -> None:
+        stats = self.kinds.setdefault(kind, {"count": 0, "fallbacks": 0})
+        stats["count"] += 1
+        if not ready:
+            stats["fallbacks"] += 1
+        for phase, ms in timings.items():
+            stats[f"{phase}TotalMs"] = stats.get(f"{phase}TotalMs", 0) + ms
+            stats[f"{phase}MaxMs"] = max(stats.get(f"{phase}MaxMs", 0), ms)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {
+            kind: {
+                **stats,
+                **{
+                    key.replace("TotalMs", "AvgMs"): value / stats["count"]
+                    for key, value in stats.items()
+                    if key.endswith("TotalMs")
+                },
+            }
+            for kind, stats in self.kinds.items()
+        }
+
+
+def server_timing(timings: dict[str, float] | None) -> dict[str, str]:
+    if not timings:
+        return {}
+    return {
+        "Server-Timing": ", ".join(f"{phase};dur={ms:.1f}" for phase, ms in timings.items())
+    }
+
+
+browser_pool = BrowserPool()
+render_stats = RenderStats()
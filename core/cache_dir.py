@@ -0,0 +1,111 @@
+import os
+import time
+import uuid
+
+from core.env import *
+
+
+class CacheDirectory:
+    def __init__(
+        self,
+        root: str = cache_root,
+        max_bytes: int | None = cache_max_bytes,
+        ttl: float = cache_ttl,
+        grace: float = 60,
+    ) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.grace = grace
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes: int | None = None
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def temp_path(self, name: str) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        return self.path(f".{uuid.uuid4().hex}.{name}")
+
+    def publish(self, temp_path: str, name: str) -> str:
+        path = self.path(name)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+        if self._bytes is not None:
+            self._bytes += size
+        if self.max_bytes is None:
+            return path
+        if self._bytes is None or self._bytes > self.max_bytes:
+            self.evict()
+        return path
+
+    def open(self, name: str) -> str | None:
+        path = self.path(name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self.path(name))
+
+    def remove(self, name: str) -> None:
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries: list[tuple[float, int, str]] = []
+        try:
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.name))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def evict(self, now: float | None = None) -> list[str]:
+        now = now or time.time()
+        removed: list[str] = []
+        kept: list[tuple[float, int, str]] = []
+        for accessed, size, name in self._entries():
+            expired = now - accessed > (3600 if name.startswith(".") else self.ttl)
+            if expired:
+                removed.append(name)
+            elif not name.startswith("."):
+                kept.append((accessed, size, name))
+        total = sum(size for _, size, _ in kept)
+        for accessed, size, name in sorted(kept):
+            if self.max_bytes is None or total <= self.max_bytes:
+                break
+            if now - accessed < self.grace:
+                break
+            removed.append(name)
+            total -= size
+        for name in removed:
+            self.remove(name)
+        self.evictions += len(removed)
+        self._bytes = total
+        return removed
+
+    def stats(self) -> dict[str, int]:
+        entries = self._entries()
+        return {
+            "files": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+cache_dir = CacheDirectory()
+export_dir = CacheDirectory(export_root, max_bytes=None, ttl=export_ttl)
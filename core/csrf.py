@@ -0,0 +1,111 @@
+import secrets
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import col
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.env import *
+from core.types import *
+
+csrf_methods = ("POST", "PUT", "DELETE", "PATCH")
+
+
+class CSRFTokenStore(ABC):
+    @abstractmethod
+    async def issue(self) -> str: ...
+
+    @abstractmethod
+    async def consume(self, token: str) -> bool: ...
+
+
+class MemoryCSRFTokenStore(CSRFTokenStore):
+    def __init__(
+        self, ttl: int = csrf_token_ttl, max_size: int = csrf_token_max_size
+    ) -> None:
+        self.ttl = timedelta(seconds=ttl)
+        self.max_size = max_size
+        self.evicted = 0
+        self._tokens: OrderedDict[str, datetime] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def _purge(self, now: datetime) -> None:
+        while self._tokens:
+            token, expiry = next(iter(self._tokens.items()))
+            if expiry >= now and len(self._tokens) < self.max_size:
+                break
+            self._tokens.popitem(last=False)
+            if expiry >= now:
+                self.evicted += 1
+
+    async def issue(self) -> str:
+        now = datetime.now()
+        self._purge(now)
+        token = secrets.token_hex(32)
+        self._tokens[token] = now + self.ttl
+        return token
+
+    async def consume(self, token: str) -> bool:
+        expiry = self._tokens.pop(token, None)
+        return expiry is not None and expiry >= datetime.now()
+
+
+class SQLCSRFTokenStore(CSRFTokenStore):
+    def __init__(
+        self, engine: AsyncEngine, ttl: int = csrf_token_ttl, purge_every: int = 1000
+    ) -> None:
+        self.engine = engine
+        self.ttl = timedelta(seconds=ttl)
+        self.purge_every = purge_every
+        self._issued = 0
+
+    async def issue(self) -> str:
+        now = datetime.now()
+        token = secrets.token_hex(32)
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                insert(CSRFToken).values(token=token, expiry=now + self.ttl)
+            )
+            self._issued += 1
+            if self._issued % self.purge_every == 0:
+                await conn.execute(
+                    delete(CSRFToken).where(col(CSRFToken.expiry) < now)
+                )
+        return token
+
+    async def consume(self, token: str) -> bool:
+        async with self.engine.begin() as conn:
+            result = await conn.execute(
+                delete(CSRFToken).where(
+                    col(CSRFToken.token) == token,
+                    col(CSRFToken.expiry) >= datetime.now(),
+                )
+            )
+        return result.rowcount == 1
+
+
+class CSRFMiddleware:
+    def __init__(self, app: ASGIApp, store: CSRFTokenStore) -> None:
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in csrf_methods:
+            return await self.app(scope, receive, send)
+
+        token = ""
+        for key, value in scope["headers"]:
+            if key == b"x-csrf-token":
+                token = value.decode("latin-1")
+                break
+        if not token or not await self.store.consume(token):
+            response = ApiResponse(
+                success=False, message="CSRF token missing or invalid.", status_code=403
+            )
+            return await response(scope, receive, send)
+        await self.app(scope, receive, send)
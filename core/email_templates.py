@@ -0,0 +1,118 @@
+import base64
+import os
+import re
+import string
+from email.header import Header
+
+from core.env import *
+
+email_template_dir = os.path.join(os.path.dirname(__file__), "templates", "email")
+email_boundary = "==hfi-uc-alternative=="
+email_mixed_boundary = "==hfi-uc-mixed=="
+
+_comment_pattern = re.compile(r"<!--(?!\[|<!|>).*?-->", re.S)
+_tag_gap_pattern = re.compile(r">\s*\n\s*<")
+_indent_pattern = re.compile(r"\s*\n\s*")
+
+
+def minify_html(html: str) -> str:
+    html = _comment_pattern.sub("", html)
+    html = _tag_gap_pattern.sub("><", html)
+    return _indent_pattern.sub("\n", html).strip()
+
+
+def encode_header(value: str) -> str:
+    if value.isascii():
+        return value
+    return Header(value, "utf-8").encode()
+
+
+class EmailTemplate:
+    def __init__(self, source: str) -> None:
+        self.chunks: list[str] = []
+        self.names: list[str] = []
+        self.placeholders: list[str] = []
+        literal = ""
+        position = 0
+        for match in string.Template.pattern.finditer(source):
+            literal += source[position : match.start()]
+            position = match.end()
+            if match.group("escaped") is not None:
+                literal += "$"
+                continue
+            name = match.group("named") or match.group("braced")
+            if name is None:
+                literal += match.group()
+                continue
+            self.chunks.append(literal)
+            self.names.append(name)
+            self.placeholders.append(match.group())
+            literal = ""
+        self.chunks.append(literal + source[position:])
+        self.head = (
+            f'Content-Type: multipart/alternative; boundary="{email_boundary}"\n'
+            "MIME-Version: 1.0\n"
+            f"From: HFI-UC <{smtp_email}>\n"
+        )
+        self.mixed_head = (
+            f'Content-Type: multipart/mixed; boundary="{email_mixed_boundary}"\n'
+            "MIME-Version: 1.0\n"
+            f"From: HFI-UC <{smtp_email}>\n"
+        )
+        self.mixed_part_head = (
+            f"\n--{email_mixed_boundary}\n"
+            f'Content-Type: multipart/alternative; boundary="{email_boundary}"\n'
+            "MIME-Version: 1.0\n"
+        )
+        self.part_head = (
+            f"\n--{email_boundary}\n"
+            'Content-Type: text/html; charset="utf-8"\n'
+            "MIME-Version: 1.0\n"
+            "Content-Transfer-Encoding: base64\n\n"
+        )
+        self.tail = f"--{email_boundary}--\n"
+
+    def render(self, values: dict[str, str]) -> str:
+        parts = [self.chunks[0]]
+        for name, placeholder, chunk in zip(self.names, self.placeholders, self.chunks[1:]):
+            value = values.get(name)
+            parts.append(placeholder if value is None else str(value))
+            parts.append(chunk)
+        return "".join(parts)
+
+    def message(
+        self,
+        email_title: str,
+        email: str,
+        values: dict[str, str],
+        attachments: str | None = None,
+    ) -> str:
+        body = base64.encodebytes(self.render(values).encode("utf-8")).decode("ascii")
+        headers = (
+            f"Subject: {encode_header(f'[HFI-UC] {email_title}')}\n"
+            f"To: {email}\n"
+        )
+        if attachments is None:
+            return f"{self.head}{headers}{self.part_head}{body}{self.tail}"
+        return (
+            f"{self.mixed_head}{headers}{self.mixed_part_head}"
+            f"{self.part_head}{body}{self.tail}{attachments}"
+        )
+
+
+def encode_attachment_parts(parts: list[str]) -> str:
+    return "".join(f"\n--{email_mixed_boundary}\n{part}" for part in parts) + (
+        f"\n--{email_mixed_boundary}--\n"
+    )
+
+
+email_templates: dict[str, EmailTemplate] = {}
+
+
+def get_email_template(name: str) -> EmailTemplate:
+    template = email_templates.get(name)
+    if template is None:
+        with open(os.path.join(email_template_dir, f"{name}.html"), encoding="utf-8") as f:
+            template = EmailTemplate(minify_html(f.read()))
+        email_templates[name] = template
+    return template
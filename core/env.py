@@ -16,8 +16,62 @@ domain = os.getenv("DOMAIN") or "localhost"
 daily_report_recipients: list[str] = json.loads(
     os.getenv("DAILY_REPORT_RECIPIENTS") or "[]"
 )
+daily_report_format = (os.getenv("DAILY_REPORT_FORMAT") or "xlsx").lower()
+if daily_report_format not in ("xlsx", "csv", "ndjson"):
+    raise ValueError(f"Invalid DAILY_REPORT_FORMAT: {daily_report_format}")
+daily_report_gzip = os.getenv("DAILY_REPORT_GZIP", "false").lower() == "true"
 use_proxy = os.getenv("USE_PROXY", "false").lower() == "true"
 ai_approval_url = os.getenv("AI_APPROVAL_URL") or ""
 ai_approval_secret = os.getenv("AI_APPROVAL_SECRET") or ""
 ai_approval_admin_id = int(os.getenv("AI_APPROVAL_ADMIN_ID") or 0)
-ai_approval_enabled = os.getenv("AI_APPROVAL_ENABLED", "false").lower() == "true"
\ No newline at end of file
+ai_approval_enabled = os.getenv("AI_APPROVAL_ENABLED", "false").lower() == "true"
+access_log_queue_size = int(os.getenv("ACCESS_LOG_QUEUE_SIZE") or 10000)
+access_log_batch_size = int(os.getenv("ACCESS_LOG_BATCH_SIZE") or 500)
+access_log_flush_interval = float(os.getenv("ACCESS_LOG_FLUSH_INTERVAL") or 1.0)
+access_log_block_timeout = float(os.getenv("ACCESS_LOG_BLOCK_TIMEOUT") or 0)
+analytics_flush_interval = float(os.getenv("ANALYTICS_FLUSH_INTERVAL") or 10.0)
+access_log_max_payload_bytes = int(os.getenv("ACCESS_LOG_MAX_PAYLOAD_BYTES") or 4096)
+access_log_sample_rates: dict[str, float] = json.loads(
+    os.getenv("ACCESS_LOG_SAMPLE_RATES") or "{}"
+)
+access_log_redact_fields: list[str] = json.loads(
+    os.getenv("ACCESS_LOG_REDACT_FIELDS") or '["password", "newPassword"]'
+)
+csrf_token_store = os.getenv("CSRF_TOKEN_STORE") or "memory"
+csrf_token_ttl = int(os.getenv("CSRF_TOKEN_TTL") or 3600)
+csrf_token_max_size = int(os.getenv("CSRF_TOKEN_MAX_SIZE") or 100000)
+login_cache_ttl = float(os.getenv("LOGIN_CACHE_TTL") or 60)
+login_cache_max_size = int(os.getenv("LOGIN_CACHE_MAX_SIZE") or 10000)
+db_pool_size = int(os.getenv("DB_POOL_SIZE") or 5)
+db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW") or 10)
+db_pool_timeout = float(os.getenv("DB_POOL_TIMEOUT") or 30)
+db_pool_pre_ping = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+db_pool_recycle = int(os.getenv("DB_POOL_RECYCLE") or 1800)
+db_statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE") or 500)
+smtp_port = int(os.getenv("SMTP_PORT") or 465)
+smtp_ssl = os.getenv("SMTP_SSL", "true").lower() == "true"
+smtp_starttls = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+smtp_timeout = float(os.getenv("SMTP_TIMEOUT") or 30)
+smtp_pool_size = int(os.getenv("SMTP_POOL_SIZE") or 4)
+smtp_check_after = float(os.getenv("SMTP_CHECK_AFTER") or 5)
+smtp_idle_timeout = float(os.getenv("SMTP_IDLE_TIMEOUT") or 60)
+browser_pool_size = int(os.getenv("BROWSER_POOL_SIZE") or 2)
+browser_max_renders = int(os.getenv("BROWSER_MAX_RENDERS") or 100)
+render_ready_timeout = float(os.getenv("RENDER_READY_TIMEOUT") or 5000)
+cache_root = os.getenv("CACHE_DIR") or "cache"
+cache_max_bytes = int(os.getenv("CACHE_MAX_BYTES") or 512 * 1024 * 1024)
+cache_ttl = float(os.getenv("CACHE_TTL") or 30 * 24 * 3600)
+export_batch_size = int(os.getenv("EXPORT_BATCH_SIZE") or 1000)
+export_workers = int(os.getenv("EXPORT_WORKERS") or 2)
+export_poll_interval = float(os.getenv("EXPORT_POLL_INTERVAL") or 5)
+export_lease_seconds = int(os.getenv("EXPORT_LEASE_SECONDS") or 300)
+export_max_attempts = int(os.getenv("EXPORT_MAX_ATTEMPTS") or 3)
+export_root = os.getenv("EXPORT_DIR") or os.path.join(cache_root, "exports")
+export_ttl = float(os.getenv("EXPORT_TTL") or 7 * 24 * 3600)
+email_worker_concurrency = int(os.getenv("EMAIL_WORKER_CONCURRENCY") or 4)
+email_batch_size = int(os.getenv("EMAIL_BATCH_SIZE") or 20)
+email_poll_interval = float(os.getenv("EMAIL_POLL_INTERVAL") or 5)
+email_lease_seconds = int(os.getenv("EMAIL_LEASE_SECONDS") or 300)
+email_max_attempts = int(os.getenv("EMAIL_MAX_ATTEMPTS") or 8)
+email_retry_base_delay = float(os.getenv("EMAIL_RETRY_BASE_DELAY") or 30)
+email_retry_max_delay = float(os.getenv("EMAIL_RETRY_MAX_DELAY") or 3600)
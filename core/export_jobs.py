@@ -0,0 +1,246 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.cache_dir import *
+from core.env import *
+from core.orm import *
+from core.types import *
+from core.utils import *
+
+
+def export_job_filename(job: ExportJob) -> str:
+    return f"reservations_{job.uuid}.{job.format}"
+
+
+async def export_job_rows(
+    session: AsyncSession, job: ExportJob, lease: timedelta, batch_size: int
+) -> AsyncIterator[Row[Any]]:
+    after: tuple[int, int] | None = None
+    progress = 0
+    while page := await get_reservation_export_page(
+        session, job.startTime, job.endTime, after, batch_size, job.mode == "by-room"
+    ):
+        for row in page:
+            yield row
+        progress += len(page)
+        after = (page[-1].roomId or 0, page[-1].id)
+        await update_export_job(
+            session, job.id, progress=progress, leasedUntil=datetime.now() + lease
+        )
+
+
+async def export_reservations(
+    engine: AsyncEngine, job_id: int, lease: timedelta, batch_size: int = export_batch_size
+) -> None:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        job = await session.get(ExportJob, job_id)
+        if not job or job.status != "running":
+            return
+        total = await count_reservations_by_time_range(session, job.startTime, job.endTime)
+        await update_export_job(session, job.id, progress=0, total=total)
+        name = export_job_filename(job)
+        temp_path = export_dir.temp_path(name)
+        try:
+            with open(temp_path, "wb") as output:
+                await write_reservations_xlsx(
+                    export_job_rows(session, job, lease, batch_size),
+                    output,
+                    "single-sheet" if job.mode == "single-sheet" else "by-room",
+                )
+            export_dir.publish(temp_path, name)
+        except BaseException:
+            export_dir.remove(os.path.basename(temp_path))
+            raise
+        await update_export_job(
+            session,
+            job.id,
+            status="done",
+            progress=total,
+            leasedUntil=None,
+            lastError=None,
+            finishedAt=datetime.now(),
+        )
+
+
+def run_export_job(url: str, job_id: int, lease_seconds: int, batch_size: int) -> None:
+    async def run() -> None:
+        engine = create_async_engine(url, **engine_options(url))
+        try:
+            await export_reservations(
+                engine, job_id, timedelta(seconds=lease_seconds), batch_size
+            )
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+class ExportJobRunner:
+    def __init__(
+        self,
+        workers: int = export_workers,
+        poll_interval: float = export_poll_interval,
+        lease_seconds: int = export_lease_seconds,
+        max_attempts: int = export_max_attempts,
+        batch_size: int = export_batch_size,
+    ) -> None:
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.done = 0
+        self.retried = 0
+        self.failed = 0
+        self._executor: Executor | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._engine: AsyncEngine | None = None
+
+    def notify(self) -> None:
+        if self._wakeup:
+            self._wakeup.set()
+
+    def start(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wakeup = None
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def _run(self) -> None:
+        assert self._wakeup
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                pass
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _lease(self, engine: AsyncEngine, limit: int) -> list[tuple[int, int]]:
+        now = datetime.now()
+        stale = and_(col(ExportJob.status) == "running", col(ExportJob.leasedUntil) < now)
+        claimable = and_(
+            or_(col(ExportJob.status) == "pending", stale),
+            col(ExportJob.attempts) < self.max_attempts,
+        )
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await session.exec(  # type: ignore[call-overload]
+                update(ExportJob)
+                .where(stale, col(ExportJob.attempts) >= self.max_attempts)
+                .values(
+                    status="failed",
+                    leasedUntil=None,
+                    lastError="Export worker stopped responding.",
+                    finishedAt=now,
+                )
+            )
+            jobs = (await session.exec(
+                select(ExportJob.id, ExportJob.attempts)
+                .where(claimable)
+                .order_by(col(ExportJob.id))
+                .limit(limit)
+            )).all()
+            claimed: list[tuple[int, int]] = []
+            for job_id, attempts in jobs:
+                result = await session.exec(  # type: ignore[call-overload]
+                    update(ExportJob)
+                    .where(col(ExportJob.id) == job_id, claimable)
+                    .values(
+                        status="running",
+                        attempts=attempts + 1,
+                        leasedUntil=now + timedelta(seconds=self.lease_seconds),
+                    )
+                )
+                if result.rowcount:
+                    claimed.append((job_id, attempts + 1))
+            await session.commit()
+            return claimed
+
+    async def _execute(self, engine: AsyncEngine, job_id: int, attempts: int) -> None:
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._pool(),
+                run_export_job,
+                engine.url.render_as_string(hide_password=False),
+                job_id,
+                self.lease_seconds,
+                self.batch_size,
+            )
+            self.done += 1
+            return
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._executor = None
+            values: dict[str, Any] = {"leasedUntil": None, "lastError": repr(e)[:1000]}
+            if attempts >= self.max_attempts:
+                values.update(status="failed", finishedAt=datetime.now())
+                self.failed += 1
+            else:
+                values.update(status="pending")
+                self.retried += 1
+        async with AsyncSession(engine) as session:
+            await update_export_job(session, job_id, **values)
+
+    async def flush(self, engine: AsyncEngine | None = None) -> int:
+        engine = engine or self._engine
+        if not engine:
+            return 0
+        executed = 0
+        running: set[asyncio.Task[None]] = set()
+        try:
+            while True:
+                if len(running) < self.workers:
+                    jobs = await self._lease(engine, self.workers - len(running))
+                    running.update(
+                        asyncio.create_task(self._execute(engine, *job)) for job in jobs
+                    )
+                    executed += len(jobs)
+                if not running:
+                    return executed
+                done, running = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    task.result()
+        finally:
+            for task in running:
+                task.cancel()
+
+    def stats(self) -> dict[str, int]:
+        return {"done": self.done, "retried": self.retried, "failed": self.failed}
+
+
+export_jobs = ExportJobRunner()
@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from core.env import *
+from core.types import *
+
+
+class LoginCache:
+    def __init__(
+        self, ttl: float = login_cache_ttl, max_size: int = login_cache_max_size
+    ) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[AdminLogin, Admin | None, float]] = (
+            OrderedDict()
+        )
+
+    def get(self, cookie: str) -> tuple[AdminLogin, Admin | None] | None:
+        entry = self._entries.get(cookie)
+        if entry is None:
+            self.misses += 1
+            return None
+        login, admin, cached_until = entry
+        if cached_until < time.monotonic() or login.expiry < datetime.now():
+            del self._entries[cookie]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(cookie)
+        self.hits += 1
+        return login, admin
+
+    def put(self, cookie: str, login: AdminLogin, admin: Admin | None) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[cookie] = (login, admin, time.monotonic() + self.ttl)
+        self._entries.move_to_end(cookie)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, cookie: str) -> None:
+        self._entries.pop(cookie, None)
+
+    def invalidate_email(self, email: str) -> None:
+        for cookie in [
+            cookie
+            for cookie, (login, _, _) in self._entries.items()
+            if login.email == email
+        ]:
+            del self._entries[cookie]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+login_cache = LoginCache()
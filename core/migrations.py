@@ -0,0 +1,103 @@
+from typing import Callable
+
+from sqlalchemy import Connection, Table, delete, func, insert, inspect, select, text, update
+from sqlmodel import SQLModel
+
+from core.types import *
+
+
+def _table(model: type[SQLModel]) -> Table:
+    return model.__table__  # type: ignore[attr-defined]
+
+
+def _create_indexes(conn: Connection, model: type[SQLModel], names: list[str]) -> None:
+    for index in _table(model).indexes:
+        if index.name in names:
+            index.create(conn, checkfirst=True)
+
+
+def _add_column(conn: Connection, model: type[SQLModel], name: str, ddl: str) -> None:
+    table = _table(model)
+    if name in {column["name"] for column in inspect(conn).get_columns(table.name)}:
+        return
+    preparer = conn.dialect.identifier_preparer
+    conn.execute(
+        text(
+            f"ALTER TABLE {preparer.format_table(table)} "
+            f"ADD COLUMN {preparer.quote(name)} {ddl}"
+        )
+    )
+
+
+def _merge_duplicate_analytics(conn: Connection) -> None:
+    analytic = _table(Analytic)
+    counters = ["reservations", "reservationCreations", "approvals", "rejections", "requests"]
+    duplicates = conn.execute(
+        select(analytic.c.date)
+        .group_by(analytic.c.date)
+        .having(func.count(analytic.c.id) > 1)
+    ).scalars().all()
+    for date in duplicates:
+        rows = conn.execute(
+            select(analytic).where(analytic.c.date == date).order_by(analytic.c.id)
+        ).mappings().all()
+        keep, rest = rows[0], rows[1:]
+        conn.execute(
+            update(analytic)
+            .where(analytic.c.id == keep["id"])
+            .values({c: sum(row[c] or 0 for row in rows) for c in counters})
+        )
+        conn.execute(
+            delete(analytic).where(analytic.c.id.in_([row["id"] for row in rest]))
+        )
+
+
+def _0001_hot_lookup_indexes(conn: Connection) -> None:
+    _create_indexes(conn, AdminLogin, ["ix_adminlogin_cookie"])
+    _create_indexes(conn, TempAdminLogin, ["ix_tempadminlogin_token"])
+    _create_indexes(conn, Admin, ["ix_admin_email"])
+    _create_indexes(conn, Cache, ["ix_cache_key"])
+    _create_indexes(
+        conn,
+        Reservation,
+        [
+            "ix_reservation_roomId",
+            "ix_reservation_startTime",
+            "ix_reservation_endTime",
+            "ix_reservation_status",
+            "ix_reservation_roomId_startTime_endTime",
+        ],
+    )
+    _create_indexes(conn, RoomApprover, ["ix_roomapprover_adminId"])
+    _merge_duplicate_analytics(conn)
+    _create_indexes(conn, Analytic, ["ix_analytic_date"])
+
+
+def _0002_approver_digests(conn: Connection) -> None:
+    _add_column(conn, RoomApprover, "digestMinutes", "INTEGER NOT NULL DEFAULT 0")
+    _table(ApproverNotification).create(conn, checkfirst=True)
+    _create_indexes(
+        conn,
+        ApproverNotification,
+        ["ix_approvernotification_adminId", "ix_approvernotification_dueAt"],
+    )
+
+
+migrations: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "hot lookup indexes", _0001_hot_lookup_indexes),
+    (2, "approver digests", _0002_approver_digests),
+]
+
+
+def apply_migrations(conn: Connection) -> list[int]:
+    migration_table = _table(SchemaMigration)
+    migration_table.create(conn, checkfirst=True)
+    applied = set(conn.execute(select(migration_table.c.version)).scalars())
+    versions: list[int] = []
+    for version, name, migrate in migrations:
+        if version in applied:
+            continue
+        migrate(conn)
+        conn.execute(insert(migration_table).values(version=version, name=name))
+        versions.append(version)
+    return versions
@@ -3,18 +3,88 @@ from sqlmodel import (
     SQLModel,
     select,
     or_,
+    and_,
     col,
+    func,
+    delete,
+    exists,
+    update,
 )
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import Row, make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import selectinload
 from core.env import *
-from typing import Sequence, List
+from typing import Any, AsyncIterator, Callable, Sequence, List
 from core.types import *
+from core.analytics import *
+from core.migrations import apply_migrations
+
+
+def engine_options(url: str) -> dict[str, Any]:
+    parsed = make_url(url)
+    options: dict[str, Any] = {
+        "pool_pre_ping": db_pool_pre_ping,
+        "query_cache_size": db_statement_cache_size,
+    }
+    if parsed.get_backend_name() != "sqlite" or parsed.database not in (None, "", ":memory:"):
+        options.update(
+            pool_size=db_pool_size,
+            max_overflow=db_max_overflow,
+            pool_timeout=db_pool_timeout,
+            pool_recycle=db_pool_recycle,
+        )
+    if parsed.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": db_statement_cache_size
+        }
+    return options
+
 
-engine = create_async_engine(database_url)
+engine = create_async_engine(database_url, **engine_options(database_url))
 
 session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+load_profiles: dict[type[SQLModel], dict[str, list[Any]]] = {
+    Room: {
+        "list": [selectinload(Room.policies)],
+        "admin": [selectinload(Room.policies), selectinload(Room.approvers)],
+        "detail": [
+            selectinload(Room.policies),
+            selectinload(Room.approvers).selectinload(RoomApprover.admin),
+        ],
+        "analytics": [selectinload(Room.reservations)],
+    },
+    Reservation: {
+        "list": [selectinload(Reservation.room), selectinload(Reservation.class_)],
+        "detail": [
+            selectinload(Reservation.room)
+            .selectinload(Room.approvers)
+            .selectinload(RoomApprover.admin),
+            selectinload(Reservation.class_),
+        ],
+        "admin": [
+            selectinload(Reservation.room).selectinload(Room.campus),
+            selectinload(Reservation.class_),
+            selectinload(Reservation.latestExecutor),
+        ],
+    },
+    Campus: {
+        "detail": [selectinload(Campus.rooms), selectinload(Campus.classes)],
+    },
+}
+
+
+def with_profile(query, model: type[SQLModel], profile: LoadProfile | None):
+    if profile is None:
+        return query
+    return query.options(*load_profiles[model][profile])
+
 async def create_error_log(session: AsyncSession, error_log: ErrorLog) -> None:
     try:
         session.add(error_log)
@@ -26,6 +96,7 @@ async def create_error_log(session: AsyncSession, error_log: ErrorLog) -> None:
 async def create_db_and_tables() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(apply_migrations)
 
 
 async def create_room(session: AsyncSession, name: str, campus: Campus) -> None:
@@ -70,16 +141,62 @@ async def get_class(session: AsyncSession) -> Sequence[Class]:
     return classes
 
 
-async def get_room(session: AsyncSession) -> Sequence[Room]:
-    rooms = (await session.exec(select(Room))).all()
+async def get_room(
+    session: AsyncSession, profile: LoadProfile | None = None
+) -> Sequence[Room]:
+    rooms = (await session.exec(with_profile(select(Room), Room, profile))).all()
     return rooms
 
 
-async def create_reservation(session: AsyncSession, request: ReservationCreateRequest) -> int:
+def is_sqlite(session: AsyncSession) -> bool:
+    return bool(session.bind and session.bind.dialect.name == "sqlite")
+
+
+async def has_conflicting_reservation(
+    session: AsyncSession,
+    room_id: int | None,
+    start: datetime,
+    end: datetime,
+    lock: bool = False,
+) -> bool:
+    conditions = (
+        col(Reservation.roomId) == room_id,
+        col(Reservation.startTime) < end,
+        col(Reservation.endTime) > start,
+        col(Reservation.status) != "rejected",
+    )
+    if lock and not is_sqlite(session):
+        query = select(Reservation.id).where(*conditions).limit(1).with_for_update()
+        return (await session.exec(query)).first() is not None
+    conflict = (await session.exec(select(exists().where(*conditions)))).one()
+    return bool(conflict)
+
+
+async def lock_room(session: AsyncSession, room_id: int | None) -> None:
+    if is_sqlite(session):
+        await session.exec(  # type: ignore[call-overload]
+            update(Room).where(col(Room.id) == room_id).values(id=Room.id)
+        )
+    else:
+        await session.exec(select(Room.id).where(Room.id == room_id).with_for_update())
+
+
+async def create_reservation(
+    session: AsyncSession,
+    request: ReservationCreateRequest,
+    check_conflict: bool = True,
+) -> int | None:
+    start = datetime.fromtimestamp(request.startTime)
+    end = datetime.fromtimestamp(request.endTime)
+    if check_conflict:
+        await lock_room(session, request.room)
+        if await has_conflicting_reservation(session, request.room, start, end, lock=True):
+            await session.rollback()
+            return None
     reservation = Reservation(
         roomId=request.room,
-        startTime=datetime.fromtimestamp(request.startTime),
-        endTime=datetime.fromtimestamp(request.endTime),
+        startTime=start,
+        endTime=end,
         studentName=request.studentName,
         email=request.email,
         reason=request.reason,
@@ -87,32 +204,20 @@ async def create_reservation(session: AsyncSession, request: ReservationCreateRe
         studentId=request.studentId,
     )
     session.add(reservation)
-    await session.commit()
-    await update_analytic(session, datetime.now(), 0, 0, 0, 1, 0)
-    await update_analytic(
-        session,
-        datetime.fromtimestamp(request.startTime),
-        1,
-        0,
-        0,
-        0,
-        0,
-    )
     await session.flush()
-    return reservation.id or -1
-
-
-async def get_reservation_by_room_id(
-    session: AsyncSession, room_id: int | None
-) -> Sequence[Reservation]:
-    reservations = (await session.exec(
-        select(Reservation).where(Reservation.roomId == room_id)
-    )).all()
-    return reservations
+    reservation_id = reservation.id or -1
+    await session.commit()
+    analytic_counter.increment(datetime.now(), reservationCreations=1)
+    analytic_counter.increment(start, reservations=1)
+    return reservation_id
 
 
-async def get_room_by_id(session: AsyncSession, room_id: int | None) -> Room | None:
-    room = (await session.exec(select(Room).where(Room.id == room_id))).one_or_none()
+async def get_room_by_id(
+    session: AsyncSession, room_id: int | None, profile: LoadProfile | None = None
+) -> Room | None:
+    room = (await session.exec(
+        with_profile(select(Room).where(Room.id == room_id), Room, profile)
+    )).one_or_none()
     return room
 
 
@@ -129,23 +234,27 @@ async def get_admin_login_by_cookie(session: AsyncSession, cookie: str) -> Admin
     return admin_login
 
 
+async def delete_admin_login_by_cookie(session: AsyncSession, cookie: str) -> None:
+    await session.exec(  # type: ignore[call-overload]
+        delete(AdminLogin).where(col(AdminLogin.cookie) == cookie)
+    )
+    await session.commit()
+
+
 async def get_admin_by_email(session: AsyncSession, email: str) -> Admin | None:
     admin = (await session.exec(select(Admin).where(Admin.email == email))).first()
     return admin
 
 
-async def get_reservation(
-    session: AsyncSession,
+def _filter_reservation(
+    query,
     keyword: str | None = None,
     room_id: int | None = None,
     status: str | None = None,
-    page: int = 0,
-    page_size: int = 20,
     start_time: datetime | None = None,
     end_time: datetime | None = None,
     seach_student_id: bool = False,
-) -> tuple[Sequence[Reservation], int]:
-    query = select(Reservation).order_by(col(Reservation.id).desc())
+):
     if keyword:
         query = (
             query.join(Room)
@@ -175,11 +284,79 @@ async def get_reservation(
         query = query.where(Reservation.startTime >= start_time)
     if end_time:
         query = query.where(Reservation.endTime <= end_time)
+    return query
+
 
-    total = len((await session.exec(query)).all())
+async def count_reservation(
+    session: AsyncSession,
+    keyword: str | None = None,
+    room_id: int | None = None,
+    status: str | None = None,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    seach_student_id: bool = False,
+) -> int:
+    subquery = _filter_reservation(
+        select(Reservation.id),
+        keyword,
+        room_id,
+        status,
+        start_time,
+        end_time,
+        seach_student_id,
+    ).subquery()
+    total = (await session.exec(select(func.count()).select_from(subquery))).one()
+    return total
+
+
+reservation_page_size = 20
+
+
+async def get_reservation(
+    session: AsyncSession,
+    keyword: str | None = None,
+    room_id: int | None = None,
+    status: str | None = None,
+    page: int = 0,
+    page_size: int = reservation_page_size,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    seach_student_id: bool = False,
+    before_id: int | None = None,
+    profile: LoadProfile | None = None,
+) -> tuple[Sequence[Reservation], int, int | None]:
+    query = _filter_reservation(
+        with_profile(
+            select(Reservation).order_by(col(Reservation.id).desc()),
+            Reservation,
+            profile,
+        ),
+        keyword,
+        room_id,
+        status,
+        start_time,
+        end_time,
+        seach_student_id,
+    )
+    if before_id is not None:
+        query = query.where(Reservation.id < before_id).limit(page_size + 1)
+    else:
+        query = query.offset(page * page_size).limit(page_size + 1)
 
-    reservations = (await session.exec(query.offset(page * page_size).limit(page_size))).all()
-    return reservations, total
+    total = await count_reservation(
+        session,
+        keyword,
+        room_id,
+        status,
+        start_time,
+        end_time,
+        seach_student_id,
+    )
+    reservations = (await session.exec(query)).all()
+    if len(reservations) > page_size:
+        reservations = reservations[:page_size]
+        return reservations, total, reservations[-1].id
+    return reservations, total, None
 
 
 async def create_admin_login(session: AsyncSession, email: str, cookie: str) -> None:
@@ -200,10 +377,10 @@ async def get_future_reservations(session: AsyncSession) -> Sequence[Reservation
 
 
 async def get_future_reservations_by_approver_id(
-    session: AsyncSession, approver_id: int | None
+    session: AsyncSession, approver_id: int | None, profile: LoadProfile | None = None
 ) -> Sequence[Reservation]:
     reservations = (await session.exec(
-        select(Reservation)
+        with_profile(select(Reservation), Reservation, profile)
         .join(Room)
         .join(RoomApprover)
         .where(Reservation.startTime >= datetime.now())
@@ -232,14 +409,10 @@ async def change_reservation_status_by_id(
         await create_reservation_operation_log(
             session, admin, reservation.id or -1, reservation.status, reason
         )
-        await update_analytic(
-            session,
+        analytic_counter.increment(
             datetime.now(),
-            0,
-            1 if status == "approved" else 0,
-            1 if status == "rejected" else 0,
-            0,
-            0,
+            approvals=1 if status == "approved" else 0,
+            rejections=1 if status == "rejected" else 0,
         )
 
 
@@ -257,46 +430,6 @@ async def create_reservation_operation_log(
     await session.commit()
 
 
-async def update_analytic(
-    session: AsyncSession,
-    date: datetime,
-    reservations: int,
-    approvals: int,
-    rejections: int,
-    reservationCreations: int,
-    requests: int,
-) -> None:
-    analytic = (await session.exec(
-        select(Analytic).where(
-            Analytic.date
-            == date.replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-        )
-    )).one_or_none()
-    if not analytic:
-        analytic = Analytic(
-            date=date.replace(
-                hour=0, minute=0, second=0, microsecond=0
-            ),
-            reservations=reservations,
-            approvals=approvals,
-            rejections=rejections,
-            reservationCreations=reservationCreations,
-            requests=requests,
-        )
-        session.add(analytic)
-        await session.commit()
-        return
-    if analytic:
-        analytic.reservations += reservations
-        analytic.approvals += approvals
-        analytic.rejections += rejections
-        analytic.reservationCreations += reservationCreations
-        analytic.requests += requests
-        await session.commit()
-
-
 async def get_analytic_by_date(session: AsyncSession, date: datetime) -> Analytic | None:
     analytic = (await session.exec(
         select(Analytic).where(
@@ -322,15 +455,21 @@ async def get_analytics_between(
     return analytics
 
 
-async def get_reservation_by_id(session: AsyncSession, id: int | None) -> Reservation | None:
+async def get_reservation_by_id(
+    session: AsyncSession, id: int | None, profile: LoadProfile | None = None
+) -> Reservation | None:
     reservation = (await session.exec(
-        select(Reservation).where(Reservation.id == id)
+        with_profile(select(Reservation).where(Reservation.id == id), Reservation, profile)
     )).one_or_none()
     return reservation
 
 
-async def get_campus_by_id(session: AsyncSession, id: int | None) -> Campus | None:
-    campus = (await session.exec(select(Campus).where(Campus.id == id))).one_or_none()
+async def get_campus_by_id(
+    session: AsyncSession, id: int | None, profile: LoadProfile | None = None
+) -> Campus | None:
+    campus = (await session.exec(
+        with_profile(select(Campus).where(Campus.id == id), Campus, profile)
+    )).one_or_none()
     return campus
 
 
@@ -340,9 +479,14 @@ async def get_all_reservations(session: AsyncSession) -> Sequence[Reservation]:
 
 
 async def get_reservations_by_time_range(
-    session: AsyncSession, start: datetime | None, end: datetime | None
+    session: AsyncSession,
+    start: datetime | None,
+    end: datetime | None,
+    profile: LoadProfile | None = None,
 ) -> Sequence[Reservation]:
-    query = select(Reservation).order_by(col(Reservation.id).asc())
+    query = with_profile(
+        select(Reservation).order_by(col(Reservation.id).asc()), Reservation, profile
+    )
     if start:
         query = query.where(Reservation.startTime >= start)
     if end:
@@ -351,6 +495,103 @@ async def get_reservations_by_time_range(
     return reservations
 
 
+export_room_key = func.coalesce(col(Reservation.roomId), 0)
+
+
+def reservation_export_query(start: datetime | None, end: datetime | None, by_room: bool = False):
+    query = (
+        select(
+            col(Reservation.id),
+            col(Reservation.startTime),
+            col(Reservation.endTime),
+            col(Reservation.studentName),
+            col(Reservation.studentId),
+            col(Reservation.email),
+            col(Reservation.reason),
+            col(Room.name).label("roomName"),
+            col(Class.name).label("className"),
+            col(Reservation.status),
+            col(Reservation.createdAt),
+            col(Campus.name).label("campusName"),
+            col(Reservation.roomId),
+        )
+        .outerjoin(Room, col(Reservation.roomId) == col(Room.id))
+        .outerjoin(Class, col(Reservation.classId) == col(Class.id))
+        .outerjoin(Campus, col(Room.campusId) == col(Campus.id))
+    )
+    if start:
+        query = query.where(Reservation.startTime >= start)
+    if end:
+        query = query.where(Reservation.endTime <= end)
+    if by_room:
+        return query.order_by(export_room_key, col(Reservation.id))
+    return query.order_by(col(Reservation.id))
+
+
+async def stream_reservation_export_rows(
+    session: AsyncSession,
+    start: datetime | None,
+    end: datetime | None,
+    by_room: bool = False,
+    batch_size: int = export_batch_size,
+) -> AsyncIterator[Row[Any]]:
+    query = reservation_export_query(start, end, by_room)
+    result = await session.stream(query.execution_options(yield_per=batch_size))
+    async for row in result:
+        yield row
+
+
+async def count_reservations_by_time_range(
+    session: AsyncSession, start: datetime | None, end: datetime | None
+) -> int:
+    query = select(func.count()).select_from(Reservation)
+    if start:
+        query = query.where(Reservation.startTime >= start)
+    if end:
+        query = query.where(Reservation.endTime <= end)
+    return (await session.exec(query)).one()
+
+
+async def get_reservation_export_page(
+    session: AsyncSession,
+    start: datetime | None,
+    end: datetime | None,
+    after: tuple[int, int] | None,
+    limit: int,
+    by_room: bool = False,
+) -> Sequence[Row[Any]]:
+    query = reservation_export_query(start, end, by_room)
+    if after and by_room:
+        query = query.where(
+            or_(
+                export_room_key > after[0],
+                and_(export_room_key == after[0], col(Reservation.id) > after[1]),
+            )
+        )
+    elif after:
+        query = query.where(col(Reservation.id) > after[1])
+    return (await session.exec(query.limit(limit))).all()
+
+
+async def create_export_job(session: AsyncSession, job: ExportJob) -> ExportJob:
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    return job
+
+
+async def get_export_job_by_uuid(session: AsyncSession, uuid: str) -> ExportJob | None:
+    job = (await session.exec(select(ExportJob).where(ExportJob.uuid == uuid))).first()
+    return job
+
+
+async def update_export_job(session: AsyncSession, id: int | None, **values: Any) -> None:
+    await session.exec(  # type: ignore[call-overload]
+        update(ExportJob).where(col(ExportJob.id) == id).values(**values)
+    )
+    await session.commit()
+
+
 async def get_class_by_id(session: AsyncSession, id: int | None) -> Class | None:
     class_ = (await session.exec(select(Class).where(Class.id == id))).one_or_none()
     return class_
@@ -511,6 +752,48 @@ async def create_temp_admin_login(session: AsyncSession, email: str, token: str)
     await session.commit()
 
 
+async def create_approver_notification(
+    session: AsyncSession, admin_id: int, reservation_id: int, due_at: datetime
+) -> None:
+    notification = ApproverNotification(
+        adminId=admin_id, reservationId=reservation_id, dueAt=due_at
+    )
+    session.add(notification)
+    await session.commit()
+
+
+async def get_due_approver_ids(session: AsyncSession, now: datetime) -> Sequence[int]:
+    admin_ids = (await session.exec(
+        select(ApproverNotification.adminId)
+        .where(ApproverNotification.dueAt <= now)
+        .distinct()
+    )).all()
+    return admin_ids
+
+
+async def get_approver_notifications(
+    session: AsyncSession, admin_id: int
+) -> Sequence[tuple[int | None, int, str]]:
+    notifications = (await session.exec(
+        select(
+            ApproverNotification.id,
+            ApproverNotification.reservationId,
+            Reservation.status,
+        )
+        .join(Reservation, col(Reservation.id) == ApproverNotification.reservationId)
+        .where(ApproverNotification.adminId == admin_id)
+        .order_by(col(ApproverNotification.reservationId))
+    )).all()
+    return notifications
+
+
+async def delete_approver_notifications(session: AsyncSession, ids: list[int | None]) -> None:
+    await session.exec(  # type: ignore[call-overload]
+        delete(ApproverNotification).where(col(ApproverNotification.id).in_(ids))
+    )
+    await session.commit()
+
+
 async def get_reservations_by_time_range_and_room(
     session: AsyncSession, start: datetime | None, end: datetime | None, room_id: int
 ) -> Sequence[Reservation]:
@@ -531,6 +814,12 @@ async def delete_admin(session: AsyncSession, admin: Admin) -> None:
     )).all()
     for approver in approvers:
         await delete_room_approver(session, approver)
+    await session.exec(  # type: ignore[call-overload]
+        delete(ApproverNotification).where(ApproverNotification.adminId == admin.id)
+    )
+    await session.exec(  # type: ignore[call-overload]
+        delete(ExportJob).where(ExportJob.adminId == admin.id)
+    )
     await session.delete(admin)
     await session.commit()
 
@@ -566,12 +855,31 @@ async def create_cache(session: AsyncSession, cache: Cache) -> None:
 
 
 async def get_cache_by_key(session: AsyncSession, key: str) -> Cache | None:
-    cache = (await session.exec(select(Cache).where(Cache.key == key))).one_or_none()
+    cache = (await session.exec(select(Cache).where(Cache.key == key))).first()
     return cache
 
 
-async def clear_all_cache(session: AsyncSession) -> None:
+async def delete_cache(session: AsyncSession, cache: Cache) -> None:
+    await session.delete(cache)
+    await session.commit()
+
+
+async def delete_stale_caches(
+    session: AsyncSession, file_exists: Callable[[str], bool], before: datetime
+) -> int:
     caches = (await session.exec(select(Cache))).all()
-    for cache in caches:
-        await session.delete(cache)
+    stale = [
+        cache.id
+        for cache in caches
+        if (
+            not file_exists(cache.value["file"])
+            if cache.value.get("file")
+            else cache.createdAt is not None and cache.createdAt < before
+        )
+    ]
+    if stale:
+        await session.exec(  # type: ignore[call-overload]
+            delete(Cache).where(col(Cache.id).in_(stale))
+        )
     await session.commit()
+    return len(stale)
@@ -0,0 +1,196 @@
+import asyncio
+import base64
+import secrets
+from datetime import datetime, timedelta
+from io import BytesIO
+from typing import Any
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core import email as _email
+from core.env import *
+from core.types import *
+
+
+def encode_email_payload(kwargs: dict[str, Any]) -> dict[str, Any]:
+    payload = dict(kwargs)
+    if payload.get("attachments"):
+        payload["attachments"] = [
+            [
+                filename,
+                base64.b64encode(
+                    data.getvalue() if isinstance(data, BytesIO) else bytes(data)
+                ).decode(),
+            ]
+            for filename, data in payload["attachments"]
+        ]
+    return payload
+
+
+def decode_email_payload(payload: dict[str, Any]) -> dict[str, Any]:
+    kwargs = dict(payload)
+    if kwargs.get("attachments"):
+        kwargs["attachments"] = [
+            (filename, BytesIO(base64.b64decode(content)))
+            for filename, content in kwargs["attachments"]
+        ]
+    return kwargs
+
+
+def email_retry_delay(attempts: int) -> timedelta:
+    return timedelta(
+        seconds=min(email_retry_base_delay * 2 ** (attempts - 1), email_retry_max_delay)
+    )
+
+
+def add_email(session: AsyncSession, sender: str, **kwargs: Any) -> None:
+    if not callable(getattr(_email, f"async_{sender}", None)):
+        raise ValueError(f"Unknown email sender: {sender}")
+    session.add(EmailOutbox(sender=sender, payload=encode_email_payload(kwargs)))
+
+
+async def enqueue_email(session: AsyncSession, sender: str, **kwargs: Any) -> None:
+    add_email(session, sender, **kwargs)
+    await session.commit()
+    email_outbox.notify()
+
+
+class EmailOutboxWorker:
+    def __init__(
+        self,
+        concurrency: int = email_worker_concurrency,
+        batch_size: int = email_batch_size,
+        poll_interval: float = email_poll_interval,
+        lease_seconds: int = email_lease_seconds,
+        max_attempts: int = email_max_attempts,
+    ) -> None:
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._engine: AsyncEngine | None = None
+
+    def notify(self) -> None:
+        if self._wakeup:
+            self._wakeup.set()
+
+    def start(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wakeup = None
+
+    async def _run(self) -> None:
+        assert self._wakeup
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                pass
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _lease(self, engine: AsyncEngine) -> list[EmailOutbox]:
+        now = datetime.now()
+        token = secrets.token_hex(16)
+        claimable = or_(
+            and_(
+                col(EmailOutbox.status) == "pending",
+                col(EmailOutbox.nextAttemptAt) <= now,
+            ),
+            and_(
+                col(EmailOutbox.status) == "sending",
+                col(EmailOutbox.leasedUntil) < now,
+            ),
+        )
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            ids = (await session.exec(
+                select(EmailOutbox.id)
+                .where(claimable)
+                .order_by(col(EmailOutbox.id))
+                .limit(self.batch_size)
+            )).all()
+            if not ids:
+                return []
+            await session.exec(  # type: ignore[call-overload]
+                update(EmailOutbox)
+                .where(col(EmailOutbox.id).in_(ids), claimable)
+                .values(status="sending", leaseToken=token, leasedUntil=now + self.lease)
+            )
+            await session.commit()
+            messages = (await session.exec(
+                select(EmailOutbox).where(EmailOutbox.leaseToken == token)
+            )).all()
+            return list(messages)
+
+    async def _deliver(
+        self, engine: AsyncEngine, message: EmailOutbox, slots: asyncio.Semaphore
+    ) -> None:
+        values: dict[str, Any] = {"leaseToken": None, "leasedUntil": None}
+        try:
+            sender = getattr(_email, f"async_{message.sender}")
+            async with slots:
+                await sender(**decode_email_payload(message.payload))
+            values.update(status="sent", sentAt=datetime.now(), lastError=None)
+            self.sent += 1
+        except Exception as e:
+            attempts = message.attempts + 1
+            values.update(attempts=attempts, lastError=repr(e)[:1000])
+            if isinstance(e, _email.BulkDeliveryError):
+                values.update(payload={**message.payload, "emails": e.remaining})
+            if attempts >= self.max_attempts:
+                values.update(status="failed")
+                self.failed += 1
+            else:
+                values.update(
+                    status="pending",
+                    nextAttemptAt=datetime.now() + email_retry_delay(attempts),
+                )
+                self.retried += 1
+        async with AsyncSession(engine) as session:
+            await session.exec(  # type: ignore[call-overload]
+                update(EmailOutbox)
+                .where(col(EmailOutbox.id) == message.id)
+                .values(**values)
+            )
+            await session.commit()
+
+    async def flush(self, engine: AsyncEngine | None = None) -> int:
+        engine = engine or self._engine
+        if not engine:
+            return 0
+        delivered = 0
+        slots = asyncio.Semaphore(self.concurrency)
+        while messages := await self._lease(engine):
+            await asyncio.gather(
+                *(self._deliver(engine, message, slots) for message in messages)
+            )
+            delivered += len(messages)
+        return delivered
+
+    def stats(self) -> dict[str, int]:
+        return {"sent": self.sent, "retried": self.retried, "failed": self.failed}
+
+
+email_outbox = EmailOutboxWorker()
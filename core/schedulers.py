@@ -3,66 +3,84 @@ from apscheduler.triggers.cron import CronTrigger
 from core.orm import *
 from core.utils import *
 from core.email import *
+from core.outbox import *
 from datetime import datetime, timedelta
 from io import BytesIO
 from core.env import *
-
-import shutil
+from core.cache_dir import *
 
 scheduler = AsyncIOScheduler()
 
 
 async def send_daily_reservation_report_email() -> None:
     try:
+        if not daily_report_recipients:
+            return
+        start = datetime.now().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ) + timedelta(days=1)
+        end = datetime.now().replace(
+            hour=23, minute=59, second=59, microsecond=999999
+        ) + timedelta(days=1)
         async with AsyncSession(engine) as session:
-            reservations = await get_reservations_by_time_range(
-                session,
-                datetime.now().replace(
-                    hour=0, minute=0, second=0, microsecond=0
-                )
-                + timedelta(days=1),
-                datetime.now().replace(
-                    hour=23, minute=59, second=59, microsecond=999999
+            count = await count_reservations_by_time_range(session, start, end)
+            if not count:
+                await enqueue_email(
+                    session,
+                    "send_normal_update_bulk_email_with_attached_files",
+                    email_title="Daily Reservation Report",
+                    title="Hi teachers! Check here for the daily reservation report.",
+                    emails=daily_report_recipients,
+                    details="No reservations for tomorrow. :)",
                 )
-                + timedelta(days=1),
+                return
+            output = BytesIO()
+            rows = stream_reservation_export_rows(session, start, end, by_room=True)
+            if daily_report_format == "xlsx":
+                await write_reservations_xlsx(rows, output)
+            else:
+                async for chunk in reservation_export_chunks(
+                    rows, daily_report_format, "by-room", daily_report_gzip
+                ):
+                    output.write(chunk)
+            extension = reservation_export_extension(
+                daily_report_format, "by-room", daily_report_gzip
             )
-        if not reservations:
-            for recipient in daily_report_recipients:
-                send_normal_update_email(
-                    "Daily Reservation Report",
-                    "Hi teachers! Check here for the daily reservation report.",
-                    recipient,
-                    "No reservations for tomorrow. :)",
-                )
-            return
-        workbook = get_exported_xlsx(reservations)
-        output = BytesIO()
-        workbook.save(output)
-        output.seek(0)
-        for recipient in daily_report_recipients:
-            send_normal_update_email_with_attached_files(
-                "Daily Reservation Report",
-                "Hi teachers! Check here for the daily reservation report.",
-                recipient,
-                "Please find the attached reservation report for tomorrow.",
-                [
+            await enqueue_email(
+                session,
+                "send_normal_update_bulk_email_with_attached_files",
+                email_title="Daily Reservation Report",
+                title="Hi teachers! Check here for the daily reservation report.",
+                emails=daily_report_recipients,
+                details="Please find the attached reservation report for tomorrow.",
+                attachments=[
                     (
-                        f"reservation_{(datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')}.xlsx",
+                        f"reservation_{start.strftime('%Y-%m-%d')}.{extension}",
                         output,
                     )
                 ],
             )
-            output.seek(0)
     except Exception:
         pass
 
-async def clear_cache() -> None:
+async def send_approver_digest_emails() -> None:
     try:
-        shutil.rmtree("./cache")
         async with AsyncSession(engine) as session:
-            await clear_all_cache(session)
+            await send_approver_digests(session)
+    except Exception:
+        pass
+
+async def sweep_cache() -> None:
+    try:
+        cache_dir.evict()
+        export_dir.evict()
+        async with AsyncSession(engine) as session:
+            await delete_stale_caches(
+                session, cache_dir.exists, datetime.now() - timedelta(seconds=cache_ttl)
+            )
     except Exception:
         pass
 
 scheduler.add_job(send_daily_reservation_report_email, CronTrigger(hour=20, minute=0))
-scheduler.add_job(clear_cache, CronTrigger(day=1))
\ No newline at end of file
+scheduler.add_job(send_approver_digest_emails, CronTrigger(minute="*"))
+scheduler.add_job(sweep_cache, CronTrigger(minute=0))
\ No newline at end of file
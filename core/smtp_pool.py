@@ -0,0 +1,285 @@
+import asyncio
+import base64
+import re
+import smtplib
+import ssl
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Coroutine, TypeVar
+
+from core.env import *
+
+T = TypeVar("T")
+
+_line_end_pattern = re.compile(r"\r\n|\r|\n")
+
+
+class SMTPStaleConnection(smtplib.SMTPServerDisconnected):
+    pass
+
+
+class AsyncSMTP:
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, timeout: float
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        self.features: dict[str, str] = {}
+        self.sent = 0
+
+    @classmethod
+    async def connect(
+        cls,
+        host: str,
+        port: int,
+        use_ssl: bool = False,
+        starttls: bool = True,
+        timeout: float = 30,
+    ) -> "AsyncSMTP":
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                host,
+                port,
+                ssl=ssl.create_default_context() if use_ssl else None,
+                server_hostname=host if use_ssl else None,
+            ),
+            timeout,
+        )
+        conn = cls(reader, writer, timeout)
+        try:
+            code, message = await conn.reply()
+            if code != 220:
+                raise smtplib.SMTPConnectError(code, message)
+            await conn.ehlo()
+            if starttls and not use_ssl and "starttls" in conn.features:
+                await conn.command("STARTTLS", 220)
+                await asyncio.wait_for(
+                    writer.start_tls(ssl.create_default_context(), server_hostname=host),
+                    timeout,
+                )
+                await conn.ehlo()
+        except BaseException:
+            conn.abort()
+            raise
+        return conn
+
+    async def reply(self) -> tuple[int, str]:
+        lines: list[str] = []
+        while True:
+            line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+            if not line:
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            text = line.decode("utf-8", "replace").rstrip("\r\n")
+            lines.append(text[4:])
+            if text[3:4] != "-":
+                return int(text[:3]), "\n".join(lines)
+
+    async def command(self, line: str, *expected: int) -> tuple[int, str]:
+        self.writer.write(line.encode("utf-8") + b"\r\n")
+        await self.writer.drain()
+        code, message = await self.reply()
+        if expected and code not in expected:
+            raise smtplib.SMTPResponseException(code, message)
+        return code, message
+
+    async def ehlo(self) -> None:
+        _, message = await self.command("EHLO hfi-uc", 250)
+        self.features = {}
+        for line in message.split("\n")[1:]:
+            name, _, value = line.partition(" ")
+            self.features[name.lower()] = value
+
+    async def login(self, username: str, password: str) -> None:
+        if "auth" not in self.features:
+            raise smtplib.SMTPNotSupportedError("SMTP AUTH extension not supported by server.")
+        if "PLAIN" in self.features["auth"].upper().split():
+            token = base64.b64encode(f"\0{username}\0{password}".encode()).decode()
+            await self.command(f"AUTH PLAIN {token}", 235)
+            return
+        await self.command("AUTH LOGIN", 334)
+        await self.command(base64.b64encode(username.encode()).decode(), 334)
+        await self.command(base64.b64encode(password.encode()).decode(), 235)
+
+    async def noop(self) -> int:
+        code, _ = await self.command("NOOP")
+        return code
+
+    async def sendmail(self, from_addr: str, to_addrs: str | list[str], msg: str) -> None:
+        if isinstance(to_addrs, str):
+            to_addrs = [to_addrs]
+        try:
+            await self.command(f"MAIL FROM:<{from_addr}>", 250)
+        except (smtplib.SMTPServerDisconnected, OSError) as e:
+            if self.sent:
+                raise SMTPStaleConnection(str(e)) from e
+            raise
+        refused: dict[str, tuple[int, bytes]] = {}
+        for to_addr in to_addrs:
+            code, message = await self.command(f"RCPT TO:<{to_addr}>")
+            if code not in (250, 251):
+                refused[to_addr] = (code, message.encode())
+        if len(refused) == len(to_addrs):
+            await self.command("RSET")
+            raise smtplib.SMTPRecipientsRefused(refused)  # type: ignore[arg-type]
+        await self.command("DATA", 354)
+        lines = _line_end_pattern.split(msg)
+        if lines[-1] == "":
+            lines.pop()
+        data = "".join(f".{line}\r\n" if line.startswith(".") else f"{line}\r\n" for line in lines)
+        self.writer.write(data.encode("utf-8") + b".\r\n")
+        await self.writer.drain()
+        code, message = await self.reply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, message)
+        self.sent += 1
+
+    async def quit(self) -> None:
+        try:
+            await self.command("QUIT")
+        finally:
+            self.abort()
+
+    def abort(self) -> None:
+        try:
+            self.writer.transport.abort()
+        except Exception:
+            pass
+
+
+class SMTPPool:
+    def __init__(
+        self,
+        host: str = smtp_server,
+        port: int = smtp_port,
+        username: str = smtp_email,
+        password: str = smtp_password,
+        size: int = smtp_pool_size,
+        use_ssl: bool = smtp_ssl,
+        starttls: bool = smtp_starttls,
+        timeout: float = smtp_timeout,
+        check_after: float = smtp_check_after,
+        idle_timeout: float = smtp_idle_timeout,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self.timeout = timeout
+        self.check_after = check_after
+        self.idle_timeout = idle_timeout
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self._idle: list[tuple[AsyncSMTP, float]] = []
+        self._slots: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _bind(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or loop is not self._loop:
+            for conn, _ in self._idle:
+                conn.abort()
+            self._idle = []
+            self._slots = asyncio.Semaphore(self.size)
+            self._loop = loop
+        return self._slots
+
+    async def _connect(self) -> AsyncSMTP:
+        conn = await AsyncSMTP.connect(
+            self.host, self.port, self.use_ssl, self.starttls, self.timeout
+        )
+        try:
+            if self.username:
+                await conn.login(self.username, self.password)
+        except BaseException:
+            conn.abort()
+            raise
+        self.created += 1
+        return conn
+
+    async def _close(self, conn: AsyncSMTP) -> None:
+        try:
+            await conn.quit()
+        except Exception:
+            pass
+
+    def _discard(self, conn: AsyncSMTP) -> None:
+        self.discarded += 1
+        conn.abort()
+
+    async def _checkout(self) -> AsyncSMTP:
+        while self._idle:
+            conn, last_used = self._idle.pop()
+            idle = time.monotonic() - last_used
+            if idle > self.idle_timeout:
+                self._discard(conn)
+                continue
+            if idle > self.check_after:
+                try:
+                    if await conn.noop() != 250:
+                        raise smtplib.SMTPServerDisconnected()
+                except (smtplib.SMTPException, OSError, asyncio.TimeoutError):
+                    self._discard(conn)
+                    continue
+            self.reused += 1
+            return conn
+        return await self._connect()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[AsyncSMTP]:
+        async with self._bind():
+            conn = await self._checkout()
+            try:
+                yield conn
+            except BaseException:
+                self._discard(conn)
+                raise
+            self._idle.append((conn, time.monotonic()))
+
+    async def sendmail(self, from_addr: str, to_addrs: str | list[str], msg: str) -> None:
+        while True:
+            try:
+                async with self.connection() as conn:
+                    await conn.sendmail(from_addr, to_addrs, msg)
+                return
+            except SMTPStaleConnection:
+                continue
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._close(conn) for conn, _ in idle))
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        loop = self._loop
+        if loop and loop.is_running():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is loop:
+                coro.close()
+                raise RuntimeError("Use the async email senders inside the event loop.")
+            return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+        async def once() -> T:
+            try:
+                return await coro
+            finally:
+                await self.close()
+
+        return asyncio.run(once())
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "idle": len(self._idle),
+            "created": self.created,
+            "reused": self.reused,
+            "discarded": self.discarded,
+        }
+
+
+smtp_pool = SMTPPool()
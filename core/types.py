@@ -12,6 +12,7 @@ from sqlmodel import (
     JSON,
     Column,
     BIGINT,
+    Index,
     func,
     Relationship as _relationship,
 )
@@ -19,9 +20,10 @@ from datetime import datetime, timedelta
 
 
 T = TypeVar("T")
+LoadProfile = Literal["list", "detail", "admin", "analytics"]
 
 def Relationship(*args, **kwargs) -> Any:
-    kwargs.setdefault("sa_relationship_kwargs", {"lazy": "selectin"})
+    kwargs.setdefault("sa_relationship_kwargs", {"lazy": "raise_on_sql"})
     return _relationship(*args, **kwargs)
 
 class Class(SQLModel, table=True):
@@ -66,21 +68,26 @@ class Room(SQLModel, table=True):
 class RoomApprover(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     roomId: int | None = Field(default=None, foreign_key="room.id")
-    adminId: int | None = Field(default=None, foreign_key="admin.id")
+    adminId: int | None = Field(default=None, foreign_key="admin.id", index=True)
     notificationsEnabled: bool = Field(default=True)
+    digestMinutes: int = Field(default=0)
     room: "Room" = Relationship(back_populates="approvers")
     admin: "Admin" = Relationship(back_populates="approvers")
 
 
 class Reservation(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_reservation_roomId_startTime_endTime", "roomId", "startTime", "endTime"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
-    roomId: int | None = Field(default=None, foreign_key="room.id")
+    roomId: int | None = Field(default=None, foreign_key="room.id", index=True)
     startTime: datetime = Field(
-        sa_column=Column(DateTime(), server_default=func.now()),
+        sa_column=Column(DateTime(), server_default=func.now(), index=True),
         default_factory=None,
     )
     endTime: datetime = Field(
-        sa_column=Column(DateTime(), server_default=func.now()),
+        sa_column=Column(DateTime(), server_default=func.now(), index=True),
         default_factory=None,
     )
     studentName: str
@@ -88,7 +95,7 @@ class Reservation(SQLModel, table=True):
     reason: str
     classId: int | None = Field(default=None, foreign_key="class.id")
     studentId: str
-    status: str = "pending"
+    status: str = Field(default="pending", index=True)
     latestExecutorId: int | None = Field(default=None, foreign_key="admin.id")
     createdAt: datetime = Field(
         sa_column=Column(DateTime(), server_default=func.now()),
@@ -112,7 +119,7 @@ class RoomPolicy(SQLModel, table=True):
 
 class Admin(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
-    email: str
+    email: str = Field(index=True)
     name: str
     password: str
     createdAt: datetime = Field(
@@ -131,7 +138,7 @@ class Admin(SQLModel, table=True):
 class TempAdminLogin(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     email: str
-    token: str
+    token: str = Field(index=True)
     createdAt: datetime = Field(
         sa_column=Column(DateTime(), server_default=func.now()),
         default_factory=None,
@@ -141,7 +148,7 @@ class TempAdminLogin(SQLModel, table=True):
 class AdminLogin(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     email: str
-    cookie: str
+    cookie: str = Field(index=True)
     createdAt: datetime = Field(
         sa_column=Column(DateTime(), server_default=func.now()),
         default_factory=None,
@@ -197,7 +204,7 @@ class ReservationOperationLog(SQLModel, table=True):
 class Analytic(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     date: datetime = Field(
-        sa_column=Column(DateTime()),
+        sa_column=Column(DateTime(), index=True, unique=True),
         default_factory=lambda: datetime.now().replace(
             hour=0, minute=0, second=0, microsecond=0
         ),
@@ -214,13 +221,71 @@ class Analytic(SQLModel, table=True):
 
 class Cache(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
-    key: str
+    key: str = Field(index=True)
     value: dict = Field(sa_column=Column(JSON))
     createdAt: datetime = Field(
         sa_column=Column(DateTime(), server_default=func.now()),
         default_factory=None,
     )
 
+class CSRFToken(SQLModel, table=True):
+    token: str = Field(primary_key=True)
+    expiry: datetime = Field(index=True)
+
+class EmailOutbox(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    sender: str
+    payload: dict = Field(sa_column=Column(JSON))
+    status: str = Field(default="pending", index=True)
+    attempts: int = 0
+    nextAttemptAt: datetime = Field(default_factory=datetime.now, index=True)
+    leaseToken: str | None = Field(default=None, index=True)
+    leasedUntil: datetime | None = None
+    lastError: str | None = None
+    sentAt: datetime | None = None
+    createdAt: datetime = Field(
+        sa_column=Column(DateTime(), server_default=func.now()),
+        default_factory=None,
+    )
+
+class ApproverNotification(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    adminId: int = Field(foreign_key="admin.id", index=True)
+    reservationId: int = Field(foreign_key="reservation.id")
+    dueAt: datetime = Field(index=True)
+    createdAt: datetime = Field(
+        sa_column=Column(DateTime(), server_default=func.now()),
+        default_factory=None,
+    )
+
+class ExportJob(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    uuid: str = Field(index=True, unique=True)
+    adminId: int | None = Field(default=None, foreign_key="admin.id", index=True)
+    startTime: datetime | None = None
+    endTime: datetime | None = None
+    mode: str = "by-room"
+    format: str = "xlsx"
+    status: str = Field(default="pending", index=True)
+    progress: int = 0
+    total: int = 0
+    attempts: int = 0
+    leasedUntil: datetime | None = None
+    lastError: str | None = None
+    finishedAt: datetime | None = None
+    createdAt: datetime = Field(
+        sa_column=Column(DateTime(), server_default=func.now()),
+        default_factory=None,
+    )
+
+class SchemaMigration(SQLModel, table=True):
+    version: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    name: str
+    appliedAt: datetime = Field(
+        sa_column=Column(DateTime(), server_default=func.now()),
+        default_factory=None,
+    )
+
 class AIApprovalResponse(BaseModel):
     status: Literal["approved", "rejected", "pending"]
     message: str | None = None
@@ -257,8 +322,10 @@ class ReservationApproveRequest(BaseModel):
 
 
 class ReservationExportRequest(BaseModel):
-    startTime: int
-    endTime: int
+    startTime: int | None = None
+    endTime: int | None = None
+    mode: Literal["by-room", "single-sheet"] = "by-room"
+    format: Literal["xlsx"] = "xlsx"
 
 
 class CampusDeleteRequest(BaseModel):
@@ -334,6 +401,10 @@ class RoomApproverCreateRequest(BaseModel):
 class RoomApproverNotificationsToggleRequest(BaseModel):
     id: int
 
+class RoomApproverDigestRequest(BaseModel):
+    id: int
+    digestMinutes: int
+
 class RoomApproverDeleteRequest(BaseModel):
     id: int
 
@@ -402,6 +473,7 @@ class RoomApproverResponseBase(ORMBaseModel):
     roomId: int | None
     adminId: int | None
     notificationsEnabled: bool
+    digestMinutes: int
 
 
 class AdminResponse(ORMBaseModel):
@@ -424,8 +496,20 @@ class ReservationResponseDetail(ReservationResponseBase):
     roomName: str | None = None
     className: str | None = None
 
+class ExportJobResponse(ORMBaseModel):
+    uuid: str
+    status: str
+    mode: str
+    format: str
+    progress: int
+    total: int
+    lastError: str | None = None
+    createdAt: datetime | None = None
+    finishedAt: datetime | None = None
+
 class ReservationQueryResponse(BaseModel):
     total: int
+    nextCursor: int | None = None
     reservations: List["ReservationResponseDetail"] = []
 
 
@@ -448,6 +532,7 @@ class ReservationFullResponse(ReservationResponseBase):
 
 class ReservationFullQueryResponse(BaseModel):
     total: int
+    nextCursor: int | None = None
     reservations: List["ReservationFullResponse"] = []
 
 
@@ -1,114 +1,208 @@
-from collections import defaultdict
+import asyncio
+import csv
+from datetime import date, datetime, timedelta
+import hashlib
+import io
+import json
+import os
 import secrets
-from typing import Literal, Sequence
+import time
+import zipfile
+import zlib
+from typing import IO, Any, AsyncIterator, Literal, Sequence
 
 import httpx
 from openpyxl import Workbook
-from openpyxl.worksheet.worksheet import Worksheet
-from playwright.async_api import async_playwright
 
+from core.browser import *
+from core.cache_dir import *
 from core.env import *
 from core.orm import *
 from core.email import *
+from core.outbox import *
+from core.singleflight import *
 
-def get_exported_xlsx(
-    reservations: Sequence[Reservation],
+reservation_export_headers = [
+    "ID",
+    "Start Time",
+    "End Time",
+    "Student Name",
+    "Student ID",
+    "E-mail",
+    "Reason",
+    "Room Name",
+    "Class Name",
+    "Status",
+    "Creation Time",
+    "Campus Name",
+]
+
+
+def reservation_export_row(row: Row[Any]) -> list[Any]:
+    values = list(row[:12])
+    values[9] = row.status.capitalize() if row.status else None
+    return values
+
+
+def unique_sheet_name(name: str, used: set[str]) -> str:
+    base = name[:31]
+    sheet_name = base
+    i = 1
+    while sheet_name in used:
+        suffix = f"-{i}"
+        if len(base) + len(suffix) > 31:
+            sheet_name = base[: 31 - len(suffix)] + suffix
+        else:
+            sheet_name = base + suffix
+        i += 1
+    used.add(sheet_name)
+    return sheet_name
+
+
+async def write_reservations_xlsx(
+    rows: AsyncIterator[Row[Any]],
+    output: IO[bytes],
     format: Literal["by-room", "single-sheet"] = "by-room",
-) -> Workbook:
-    os.makedirs("cache", exist_ok=True)
-    workbook = Workbook()
-    default = workbook.active
-    if default is not None:
-        workbook.remove(default)
-
-    headers = [
-        "ID",
-        "Start Time",
-        "End Time",
-        "Student Name",
-        "Student ID",
-        "E-mail",
-        "Reason",
-        "Room Name",
-        "Class Name",
-        "Status",
-        "Creation Time",
-        "Campus Name",
-    ]
-
-    if format == "single-sheet":
-        ws: Worksheet = workbook.create_sheet(title="All Reservations")
-        ws.append(headers)
-
-        for reservation in reservations:
-            room = reservation.room
-            class_ = reservation.class_
-            campus = room.campus if room and room.campus else None
-            ws.append(
-                [
-                    reservation.id,
-                    reservation.startTime,
-                    reservation.endTime,
-                    reservation.studentName,
-                    reservation.studentId,
-                    reservation.email,
-                    reservation.reason,
-                    room.name if room else None,
-                    class_.name if class_ else None,
-                    reservation.status.capitalize() if reservation.status else None,
-                    reservation.createdAt,
-                    campus.name if campus else None,
-                ]
-            )
-    else:
-        reservations_by_room: dict[int | None, list[Reservation]] = defaultdict(list)
-        for reservation in reservations:
-            reservations_by_room[reservation.roomId].append(reservation)
-
-        used = set()
-        for room_id, room_reservations in reservations_by_room.items():
-            room_obj = next((res.room for res in room_reservations if res.room), None)
-            room_name = (room_obj.name if room_obj else None) or f"Room-{room_id}"
-            base = (room_name or "")[:31]
-            sheet_name = base
-            i = 1
-            while sheet_name in used:
-                suffix = f"-{i}"
-                if len(base) + len(suffix) > 31:
-                    sheet_name = base[: 31 - len(suffix)] + suffix
-                else:
-                    sheet_name = base + suffix
-                i += 1
-            used.add(sheet_name)
-
-            ws: Worksheet = workbook.create_sheet(title=sheet_name)
-            ws.append(headers)
-
-            for reservation in room_reservations:
-                room = reservation.room
-                class_ = reservation.class_
-                campus = room.campus if room and room.campus else None
-                ws.append(
-                    [
-                        reservation.id,
-                        reservation.startTime,
-                        reservation.endTime,
-                        reservation.studentName,
-                        reservation.studentId,
-                        reservation.email,
-                        reservation.reason,
-                        room.name if room else None,
-                        class_.name if class_ else None,
-                        reservation.status.capitalize() if reservation.status else None,
-                        (
-                            reservation.createdAt
-                            if reservation.createdAt
-                            else None
-                        ),
-                        campus.name if campus else None,
-                    ]
-                )
-    return workbook
+) -> int:
+    workbook = Workbook(write_only=True)
+    sheet = None
+    room_id: int | None = None
+    used: set[str] = set()
+    count = 0
+    async for row in rows:
+        if format == "single-sheet":
+            if sheet is None:
+                sheet = workbook.create_sheet(title="All Reservations")
+                sheet.append(reservation_export_headers)
+        elif sheet is None or row.roomId != room_id:
+            room_id = row.roomId
+            room_name = row.roomName or f"Room-{room_id}"
+            sheet = workbook.create_sheet(title=unique_sheet_name(room_name, used))
+            sheet.append(reservation_export_headers)
+        sheet.append(reservation_export_row(row))
+        count += 1
+    if count:
+        await asyncio.to_thread(workbook.save, output)
+    return count
+
+
+reservation_export_media_types = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "zip": "application/zip",
+    "gz": "application/gzip",
+}
+
+
+class ExportChunkBuffer(io.RawIOBase):
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+def reservation_csv_line(values: list[Any]) -> bytes:
+    line = io.StringIO()
+    csv.writer(line).writerow(values)
+    return line.getvalue().encode("utf-8")
+
+
+async def iter_reservations_csv(
+    rows: AsyncIterator[Row[Any]], chunk_size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    buffer = ExportChunkBuffer()
+    buffer.write(reservation_csv_line(reservation_export_headers))
+    async for row in rows:
+        buffer.write(reservation_csv_line(reservation_export_row(row)))
+        if buffer.size >= chunk_size:
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+async def iter_reservations_ndjson(
+    rows: AsyncIterator[Row[Any]], chunk_size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    buffer = ExportChunkBuffer()
+    async for row in rows:
+        record = dict(zip(row._fields[:12], reservation_export_row(row)))
+        buffer.write(
+            json.dumps(record, ensure_ascii=False, default=lambda value: value.isoformat()).encode()
+            + b"\n"
+        )
+        if buffer.size >= chunk_size:
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+async def iter_reservations_csv_zip(
+    rows: AsyncIterator[Row[Any]], chunk_size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    buffer = ExportChunkBuffer()
+    archive = zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED)
+    entry: IO[bytes] | None = None
+    room_id: int | None = None
+    used: set[str] = set()
+    async for row in rows:
+        if entry is None or row.roomId != room_id:
+            if entry:
+                entry.close()
+            room_id = row.roomId
+            room_name = (row.roomName or f"Room-{room_id}").replace("/", "-")
+            entry = archive.open(f"{unique_sheet_name(room_name, used)}.csv", "w")
+            entry.write(reservation_csv_line(reservation_export_headers))
+        entry.write(reservation_csv_line(reservation_export_row(row)))
+        if buffer.size >= chunk_size:
+            yield buffer.drain()
+    if entry:
+        entry.close()
+    archive.close()
+    yield buffer.drain()
+
+
+async def iter_gzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
+
+
+def reservation_export_extension(
+    format: Literal["xlsx", "csv", "ndjson"],
+    mode: Literal["by-room", "single-sheet"],
+    gzip: bool = False,
+) -> str:
+    if format == "csv" and mode == "by-room":
+        return "zip"
+    if format == "xlsx" or not gzip:
+        return format
+    return f"{format}.gz"
+
+
+def reservation_export_chunks(
+    rows: AsyncIterator[Row[Any]],
+    format: Literal["csv", "ndjson"],
+    mode: Literal["by-room", "single-sheet"],
+    gzip: bool = False,
+) -> AsyncIterator[bytes]:
+    if format == "csv" and mode == "by-room":
+        return iter_reservations_csv_zip(rows)
+    chunks = iter_reservations_csv(rows) if format == "csv" else iter_reservations_ndjson(rows)
+    return iter_gzip(chunks) if gzip else chunks
 
 
 def verify_turnstile_token(token: str) -> bool:
@@ -127,18 +221,12 @@ def verify_turnstile_token(token: str) -> bool:
         return False
 
 
-async def get_exported_pdf(url: str, output: str, device_scale: int = 2) -> None:
-    os.makedirs("cache", exist_ok=True)
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        context = await browser.new_context(
-            viewport={"width": 800, "height": 900},
-            device_scale_factor=device_scale,
-        )
-        page = await context.new_page()
-        await page.goto(url, wait_until="networkidle")
-        await page.emulate_media(media="print")
-        await page.wait_for_timeout(2000)
+async def get_exported_pdf(url: str, output: str, device_scale: int = 2) -> dict[str, float]:
+    started = time.perf_counter()
+    async with browser_pool.page(device_scale) as page:
+        timings = {"browser": (time.perf_counter() - started) * 1000}
+        ready = await load_render_page(page, url, timings)
+        started = time.perf_counter()
         await page.pdf(
             path=output,
             format="A4",
@@ -146,30 +234,147 @@ async def get_exported_pdf(url: str, output: str, device_scale: int = 2) -> None
             prefer_css_page_size=True,
             margin={"bottom": "6mm", "top": "6mm"},
         )
-        await browser.close()
+        timings["render"] = (time.perf_counter() - started) * 1000
+    render_stats.record("pdf", timings, ready)
+    return timings
 
 
-async def get_screenshot(url: str, output: str, device_scale: int = 2) -> None:
-    os.makedirs("cache", exist_ok=True)
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        context = await browser.new_context(
-            viewport={"width": 800, "height": 900},
-            device_scale_factor=device_scale,
-        )
-        page = await context.new_page()
-        await page.goto(url, wait_until="networkidle")
-        await page.emulate_media(media="print")
-        await page.wait_for_timeout(2000)
+async def get_screenshot(url: str, output: str, device_scale: int = 2) -> dict[str, float]:
+    started = time.perf_counter()
+    async with browser_pool.page(device_scale) as page:
+        timings = {"browser": (time.perf_counter() - started) * 1000}
+        ready = await load_render_page(page, url, timings)
+        started = time.perf_counter()
         await page.screenshot(
             path=output,
             full_page=True,
         )
-        await browser.close()
+        timings["render"] = (time.perf_counter() - started) * 1000
+    render_stats.record("png", timings, ready)
+    return timings
+
+
+def analytics_digest(analytics: Sequence[Analytic], day: date) -> str:
+    digest = hashlib.sha256(day.isoformat().encode())
+    for a in sorted(analytics, key=lambda a: a.date):
+        digest.update(
+            f"|{a.date.date()}:{a.reservations or 0},{a.reservationCreations or 0},"
+            f"{a.requests or 0},{a.approvals or 0},{a.rejections or 0}".encode()
+        )
+    return digest.hexdigest()[:32]
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def get_rendered_export(
+    page: str, type: str, digest: str, device_scale: int = 2
+) -> tuple[str, dict[str, float] | None]:
+    name = f"{page}_{digest}_{device_scale}x.{type}"
+    if path := cache_dir.open(name):
+        return path, None
+    return await singleflight.do(
+        name, lambda: render_export(page, type, name, device_scale)
+    )
+
+
+async def render_export(
+    page: str, type: str, name: str, device_scale: int
+) -> tuple[str, dict[str, float] | None]:
+    if path := cache_dir.open(name):
+        return path, None
+    render = get_exported_pdf if type == "pdf" else get_screenshot
+    temp_path = cache_dir.temp_path(name)
+    try:
+        timings = await render(
+            f"{base_url}/reservation/analytics/raw/{page}", temp_path, device_scale
+        )
+    except BaseException:
+        cache_dir.remove(os.path.basename(temp_path))
+        raise
+    return cache_dir.publish(temp_path, name), timings
+
+
+async def load_render_page(page: Page, url: str, timings: dict[str, float]) -> bool:
+    started = time.perf_counter()
+    await page.goto(url, wait_until="load")
+    await page.emulate_media(media="print")
+    timings["load"] = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    ready = await wait_for_render_ready(page)
+    timings["ready"] = (time.perf_counter() - started) * 1000
+    return ready
+
+
+async def notify_approvers(
+    session: AsyncSession, reservation_id: int | None, approvers: Sequence[RoomApprover]
+) -> None:
+    for approver in approvers:
+        admin = approver.admin
+        if not admin or not approver.notificationsEnabled:
+            continue
+        if approver.digestMinutes > 0:
+            await create_approver_notification(
+                session,
+                admin.id or -1,
+                reservation_id or -1,
+                datetime.now() + timedelta(minutes=approver.digestMinutes),
+            )
+            continue
+        token = secrets.token_hex(32)
+        await enqueue_email(
+            session,
+            "send_normal_update_with_external_link_email",
+            email_title="New Reservation Request",
+            title=f"Hi {admin.name}! A new reservation request has been created.",
+            email=admin.email,
+            details=f"Reservation ID #{reservation_id}, click the button below for reservation details.",
+            button_text="View Reservation",
+            link=f"{base_url}/admin/reservation/?token={token}",
+        )
+        await create_temp_admin_login(session, admin.email, token)
+
+
+async def send_approver_digests(session: AsyncSession, now: datetime | None = None) -> int:
+    sent = 0
+    for admin_id in await get_due_approver_ids(session, now or datetime.now()):
+        notifications = await get_approver_notifications(session, admin_id)
+        ids = [id for id, _, _ in notifications]
+        pending = [
+            f"#{reservation_id}"
+            for _, reservation_id, status in notifications
+            if status == "pending"
+        ]
+        admin = await get_admin_by_id(session, admin_id)
+        if not admin or not pending:
+            # The approver is gone or every reservation was decided; nothing to send.
+            await delete_approver_notifications(session, ids)
+            continue
+        email = admin.email
+        token = secrets.token_hex(32)
+        add_email(
+            session,
+            "send_normal_update_with_external_link_email",
+            email_title="New Reservation Requests",
+            title=f"Hi {admin.name}! {len(pending)} new reservation request(s) are waiting for you.",
+            email=email,
+            details=f"Reservation ID {', '.join(pending)}, click the button below for reservation details.",
+            button_text="View Reservations",
+            link=f"{base_url}/admin/reservation/?token={token}",
+        )
+        session.add(TempAdminLogin(email=email, token=token))
+        await delete_approver_notifications(session, ids)
+        email_outbox.notify()
+        sent += 1
+    return sent
 
 
 async def ai_approval(session: AsyncSession, id: int) -> None:
-    reservation = await get_reservation_by_id(session, id)
+    reservation = await get_reservation_by_id(session, id, "detail")
     if not reservation:
         return
     async with httpx.AsyncClient(timeout=10000) as client:
@@ -188,7 +393,9 @@ async def ai_approval(session: AsyncSession, id: int) -> None:
                 data.message,
             )
         if data.status == "approved":
-            send_reservation_approval_email(
+            await enqueue_email(
+                session,
+                "send_reservation_approval_email",
                 email_title="Reservation Approval",
                 title="Your reservation has been approved!",
                 email=reservation.email,
@@ -201,24 +408,13 @@ async def ai_approval(session: AsyncSession, id: int) -> None:
                 time=f"{reservation.startTime.strftime('%Y-%m-%d %H:%M')} - {reservation.endTime.strftime('%H:%M')}",
             )
         elif data.status == "rejected":
-            send_normal_update_email(
+            await enqueue_email(
+                session,
+                "send_normal_update_email",
                 email_title="Reservation Rejected",
                 title="Your reservation has been rejected.",
                 email=reservation.email,
                 details=f"Hi {reservation.studentName}! Your reservation #{reservation.id} for {reservation.room.name if reservation.room else None} has been rejected. Reason: {data.message}",
             )
         else:
-            for approver in reservation.room.approvers:
-                admin = approver.admin
-                if not admin or not approver.notificationsEnabled:
-                    continue
-                token = secrets.token_hex(32)
-                send_normal_update_with_external_link_email(
-                    email_title="New Reservation Request",
-                    title=f"Hi {admin.name}! A new reservation request has been created.",
-                    email=admin.email,
-                    details=f"Reservation ID #{reservation.id}, click the button below for reservation details.",
-                    button_text="View Reservation",
-                    link=f"{base_url}/admin/reservation/?token={token}",
-                )
-                await create_temp_admin_login(session, admin.email, token)
\ No newline at end of file
+            await notify_approvers(session, reservation.id, reservation.room.approvers)
\ No newline at end of file
@@ -2,16 +2,43 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import SQLModel
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
-from core import app, password_hash
-from core.orm import get_admin_by_email, create_admin
+from core import LogMiddleware, app, password_hash, render_weekly_export
+from core.orm import get_admin_by_email, create_admin, delete_stale_caches, get_reservation, reservation_page_size
 from core import email
+from core.access_log import AccessLogWriter, PayloadCapture, redact_payload
+from core import analytics
+from core import utils
+from core.analytics import AnalyticCounter
+from core.browser import BrowserPool, render_stats, wait_for_render_ready
+from core.cache_dir import CacheDirectory, cache_dir
+from core.export_jobs import ExportJobRunner
+from core.utils import get_exported_pdf
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from core.csrf import CSRFTokenStore, MemoryCSRFTokenStore
+from core.login_cache import login_cache
+from core.outbox import EmailOutboxWorker, email_outbox, enqueue_email
+from core.utils import send_approver_digests
+from core.singleflight import SingleFlight, singleflight
+from core.types import AccessLog, Analytic, Cache, Campus, Class, EmailOutbox, ExportJob, Reservation, Room, RoomApprover
+from datetime import datetime, timedelta
+from io import BytesIO
+from openpyxl import load_workbook
+from sqlmodel import select
 import asyncio
+import csv
+import gzip
+import io
+import json
+import time
+import zipfile
 from collections.abc import Iterator
+from contextlib import asynccontextmanager
 from typing import Any
 
 # Override the database with an in-memory SQLite database for testing
@@ -147,10 +174,26 @@ def client_fixture(monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
         mock_send_normal_update_email_with_attached_files,
         raising=False,
     )
+
+    def mock_async_sender(name: str):
+        async def send(**kwargs: Any) -> None:
+            getattr(email, name)(**kwargs)
+
+        return send
+
+    for name in (
+        "send_normal_update_email",
+        "send_reservation_approval_email",
+        "send_normal_update_with_external_link_email",
+        "send_normal_update_email_with_attached_files",
+    ):
+        monkeypatch.setattr(email, f"async_{name}", mock_async_sender(name))
+
     async def fake_exported_pdf(_url: str, output: str, *args, **kwargs):
         os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
         with open(output, "wb") as export_file:
             export_file.write(b"")
+        return {"load": 1.0, "render": 2.0}
 
     async def fake_screenshot(_url: str, output: str, *args, **kwargs):
         os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
@@ -182,6 +225,7 @@ def client_fixture(monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
 
     asyncio.run(ensure_admin())
 
+    login_cache.clear()
     test_client = TestClient(app, base_url="https://testserver")
     test_client.sent_emails = sent_emails  # type: ignore[attr-defined]
 
@@ -194,9 +238,15 @@ def client_fixture(monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
         if csrf_token:
             headers = {**headers, "x-csrf-token": csrf_token}
         kwargs["headers"] = headers
-        return original_post(url, **kwargs)
+        response = original_post(url, **kwargs)
+        flush_outbox()
+        return response
+
+    def flush_outbox() -> int:
+        return asyncio.run(email_outbox.flush(test_engine))
 
     monkeypatch.setattr(test_client, "post", post_with_csrf)
+    test_client.flush_outbox = flush_outbox  # type: ignore[attr-defined]
 
     try:
         yield test_client
@@ -212,6 +262,37 @@ def test_csrf(client: TestClient):
     response = client.get("/_csrf")
     assert response.status_code == 200
     assert "_csrf" in response.cookies
+    token = response.cookies["_csrf"]
+    response = client.request("POST", "/admin/logout", headers={"x-csrf-token": token})
+    assert response.status_code != 403
+    response = client.request("POST", "/admin/logout", headers={"x-csrf-token": token})
+    assert response.status_code == 403
+    response = client.request("POST", "/admin/logout")
+    assert response.status_code == 403
+
+
+def test_csrf_memory_store():
+    async def run() -> None:
+        store = MemoryCSRFTokenStore(ttl=60, max_size=2)
+        first = await store.issue()
+        second = await store.issue()
+        third = await store.issue()
+        assert len(store) == 2 and store.evicted == 1
+        assert not await store.consume(first)
+        assert await store.consume(third)
+        assert not await store.consume(third)
+        expired = MemoryCSRFTokenStore(ttl=-1)
+        assert not await expired.consume(await expired.issue())
+        assert await store.consume(second)
+
+    asyncio.run(run())
+
+    class IssueOnlyStore(CSRFTokenStore):
+        async def issue(self) -> str:
+            return "token"
+
+    with pytest.raises(TypeError):
+        IssueOnlyStore()  # type: ignore[abstract]
 
 # More tests will be added here
 def test_campus_list(client: TestClient):
@@ -248,6 +329,44 @@ def test_room_list(client: TestClient):
     assert response.json()["success"] is True
     assert "approvers" in response.json()["data"][0] if response.json()["data"] else True
 
+def test_reservation_page_cursor(client: TestClient):
+    async def run() -> list[tuple[int, int | None]]:
+        async with AsyncSession(test_engine) as session:
+            start = datetime.now() + timedelta(days=1)
+            for i in range(reservation_page_size):
+                session.add(Reservation(
+                    startTime=start,
+                    endTime=start + timedelta(hours=1),
+                    studentName="Student",
+                    email="student@test.com",
+                    reason="Reason",
+                    studentId="GJ20230000",
+                ))
+            await session.commit()
+            pages = []
+            reservations, _, cursor = await get_reservation(session)
+            pages.append((len(reservations), cursor))
+            session.add(Reservation(
+                startTime=start,
+                endTime=start + timedelta(hours=1),
+                studentName="Student",
+                email="student@test.com",
+                reason="Reason",
+                studentId="GJ20230000",
+            ))
+            await session.commit()
+            reservations, _, cursor = await get_reservation(session)
+            pages.append((len(reservations), cursor))
+            reservations, _, cursor = await get_reservation(session, before_id=cursor)
+            pages.append((len(reservations), cursor))
+            return pages
+
+    pages = asyncio.run(run())
+    assert pages[0] == (reservation_page_size, None)
+    assert pages[1][0] == reservation_page_size and pages[1][1] is not None
+    assert pages[2] == (1, None)
+
+
 def test_admin_login_logout(client: TestClient):
     # Login with wrong password
     response = client.post(
@@ -281,8 +400,13 @@ def test_admin_login_logout(client: TestClient):
     response = client.get("/admin/check-login")
     assert response.status_code == 200, response.json()
     assert response.json()["success"] is True
+    hits = login_cache.hits
+    response = client.get("/admin/check-login")
+    assert response.json()["success"] is True
+    assert login_cache.hits == hits + 1
 
     # Logout
+    cookie = client.cookies.get("uc")
     response = client.get("/admin/logout")
     assert response.status_code == 200, response.json()
     assert response.json()["success"] is True
@@ -293,6 +417,11 @@ def test_admin_login_logout(client: TestClient):
     assert response.status_code == 400, response.json()
     assert response.json()["success"] is False
 
+    # The old cookie no longer works once logged out
+    client.cookies.set("uc", cookie)
+    response = client.get("/admin/check-login")
+    assert response.status_code == 400, response.json()
+
 def test_admin_management(client: TestClient):
     # Login first
     login_res = client.post(
@@ -343,7 +472,7 @@ def test_admin_management(client: TestClient):
     assert response.status_code == 200
     assert len(response.json()["data"]) == 1
 
-def test_reservation_flow(client: TestClient):
+def test_reservation_flow(client: TestClient, monkeypatch: pytest.MonkeyPatch):
     # Login first
     login_res = client.post(
         "/admin/login",
@@ -393,6 +522,13 @@ def test_reservation_flow(client: TestClient):
     assert response.json()["success"] is True
     reservation_id = response.json()["data"]["reservationId"]
 
+    response = client.post(
+        "/reservation/create",
+        json={**reservation_payload, "email": "other@test.com"},
+    )
+    assert response.status_code == 400, response.json()
+    assert "conflicts" in response.json()["message"]
+
     approver_notification = next(
         (mail for mail in sent_emails if mail["type"] == "normal_update_with_external_link"),
         None,
@@ -406,6 +542,12 @@ def test_reservation_flow(client: TestClient):
     response = client.get(f"/reservation/get?keyword={reservation_id}")
     assert response.status_code == 200
     assert len(response.json()["data"]["reservations"]) == 1
+    assert response.json()["data"]["total"] == 1
+
+    response = client.get(f"/reservation/get?cursor={reservation_id}")
+    assert response.status_code == 200
+    assert response.json()["data"]["reservations"] == []
+    assert response.json()["data"]["total"] == 1
 
     # Approve reservation
     response = client.post(
@@ -448,8 +590,49 @@ def test_reservation_flow(client: TestClient):
     response = client.get(f"/reservation/export?startTime={int(start_time.timestamp())}&endTime={int(end_time.timestamp())}")
     assert response.status_code == 200
     assert response.headers['content-type'] == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    assert int(response.headers['content-length']) == len(response.content)
+    workbook = load_workbook(BytesIO(response.content), read_only=True)
+    assert workbook.sheetnames == ["Test Room"]
+    rows = list(workbook["Test Room"].values)
+    assert rows[0][:3] == ("ID", "Start Time", "End Time")
+    assert rows[1][7:] == ("Test Room", "Test Class", rows[1][9], rows[1][10], "Test Campus")
+
+    monkeypatch.setattr(app.state.limiter, "enabled", False)
+    response = client.get(f"/reservation/export?startTime={int(start_time.timestamp())}&endTime={int(end_time.timestamp())}&mode=single-sheet")
+    assert response.status_code == 200
+    workbook = load_workbook(BytesIO(response.content), read_only=True)
+    assert workbook.sheetnames == ["All Reservations"]
+    assert len(list(workbook["All Reservations"].values)) == len(rows)
+
+    query = f"startTime={int(start_time.timestamp())}&endTime={int(end_time.timestamp())}"
+    response = client.get(f"/reservation/export?{query}&mode=single-sheet&format=csv")
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    lines = list(csv.reader(io.StringIO(response.text)))
+    assert lines[0][:3] == ["ID", "Start Time", "End Time"]
+    assert lines[1][7:9] == ["Test Room", "Test Class"]
+    assert len(lines) == len(rows)
 
-def test_analytics(client: TestClient):
+    response = client.get(f"/reservation/export?{query}&mode=single-sheet&format=ndjson&gzip=true")
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/gzip'
+    assert '.ndjson.gz' in response.headers['content-disposition']
+    records = [json.loads(line) for line in gzip.decompress(response.content).splitlines()]
+    assert len(records) == len(rows) - 1
+    assert records[0]["roomName"] == "Test Room"
+    assert records[0]["campusName"] == "Test Campus"
+
+    response = client.get(f"/reservation/export?{query}&mode=by-room&format=csv")
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/zip'
+    archive = zipfile.ZipFile(BytesIO(response.content))
+    assert archive.namelist() == ["Test Room.csv"]
+    assert len(archive.read("Test Room.csv").decode().splitlines()) == len(rows)
+
+    response = client.get("/reservation/export?startTime=1&endTime=2&format=csv")
+    assert response.status_code == 404
+
+def test_analytics(client: TestClient, monkeypatch: pytest.MonkeyPatch):
     # Login first
     login_res = client.post(
         "/admin/login",
@@ -476,10 +659,671 @@ def test_analytics(client: TestClient):
     response = client.get("/analytics/overview/export?type=pdf&turnstileToken=test")
     assert response.status_code == 200, response.json()
     assert response.headers['content-type'] == 'application/pdf'
+    assert response.headers['server-timing'] == 'load;dur=1.0, render;dur=2.0'
+    etag = response.headers['etag']
+
+    # Unchanged analytics are served from the render cache and revalidate
+    monkeypatch.setattr(app.state.limiter, "enabled", False)
+    response = client.get("/analytics/overview/export?type=pdf&turnstileToken=test")
+    assert response.status_code == 200
+    assert response.headers['etag'] == etag
+    assert 'server-timing' not in response.headers
+    response = client.get(
+        "/analytics/overview/export?type=pdf&turnstileToken=test",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 304
+
+    monkeypatch.setattr("core.verify_turnstile_token", lambda token: False)
+    response = client.get(
+        "/analytics/overview/export?type=pdf&turnstileToken=test",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 403
+    monkeypatch.setattr("core.verify_turnstile_token", lambda token: True)
+
+    async def bump_analytics(days: int) -> None:
+        async with AsyncSession(test_engine) as session:
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            session.add(Analytic(date=today - timedelta(days=days), approvals=1, requests=5))
+            await session.commit()
+
+    # Today's counters keep changing and do not invalidate the render
+    asyncio.run(bump_analytics(0))
+    response = client.get(
+        "/analytics/overview/export?type=pdf&turnstileToken=test",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 304
+
+    asyncio.run(bump_analytics(1))
+    response = client.get(
+        "/analytics/overview/export?type=pdf&turnstileToken=test",
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers['etag'] != etag
+    assert 'server-timing' in response.headers
 
     # Analytics weekly export
     response = client.get("/analytics/weekly/export?type=png&turnstileToken=test")
     assert response.status_code == 200, response.json()
     assert response.headers['content-type'] == 'image/png'
 
+def test_access_log_writer(client: TestClient):
+    async def run() -> tuple[int, dict[str, int]]:
+        writer = AccessLogWriter(queue_size=2, batch_size=10, flush_interval=0.05)
+        writer.start(test_engine)
+        for i in range(3):
+            await writer.put(
+                {
+                    "userAgent": "pytest",
+                    "uuid": f"writer-{i}",
+                    "ip": "127.0.0.1",
+                    "port": 0,
+                    "url": "/",
+                    "method": "GET",
+                    "status": 200,
+                    "payload": None,
+                    "responseTime": 1,
+                }
+            )
+        await writer.stop()
+        async with AsyncSession(test_engine) as session:
+            logs = (await session.exec(
+                select(AccessLog).where(AccessLog.userAgent == "pytest")
+            )).all()
+        return len(logs), writer.stats()
+
+    written, stats = asyncio.run(run())
+    assert written == 2
+    assert stats["written"] == 2
+    assert stats["dropped"] == 1
+
+
+def test_log_middleware_propagates_cancellation(monkeypatch: pytest.MonkeyPatch):
+    async def cancelled_app(scope, receive, send) -> None:
+        raise asyncio.CancelledError()
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message) -> None:
+        pass
+
+    monkeypatch.setattr("core.access_log_sample_rate", lambda path: 0.0)
+    middleware = LogMiddleware(cancelled_app)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(middleware({"type": "http", "path": "/", "headers": []}, receive, send))
+
+
+def test_access_log_payload_capture():
+    capture = PayloadCapture(limit=16)
+    capture.feed(b'{"email": "a@b.c", "password": "secret"}')
+    assert capture.text() == '{"email": "a@b.c...[truncated, 40 bytes]'
+    assert redact_payload('{"email": "a", "Password": "se\\"cret"}') == (
+        '{"email": "a", "Password": "[REDACTED]"}'
+    )
+    assert redact_payload('{"newPassword": "unterminat') == '{"newPassword": "[REDACTED]"'
+    capture = PayloadCapture(limit=3)
+    capture.feed("é中".encode())
+    assert capture.text() == "é...[truncated, 5 bytes]"
 
+
+def test_reservation_concurrent_create(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(app.state.limiter, "enabled", False)
+
+    async def run() -> list[int]:
+        async with AsyncSession(test_engine) as session:
+            admin = await get_admin_by_email(session, "admin@test.com")
+            assert admin is not None
+            session.add(Campus(name="Campus"))
+            session.add(Class(name="Class", campusId=1))
+            session.add(Room(name="Room", campusId=1))
+            session.add(RoomApprover(roomId=1, adminId=admin.id))
+            await session.commit()
+        start = int((datetime.now() + timedelta(days=1)).timestamp())
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="https://testserver") as http:
+            tokens = [(await http.get("/_csrf")).cookies["_csrf"] for _ in range(5)]
+
+            async def create(i: int, token: str) -> int:
+                response = await http.post(
+                    "/reservation/create",
+                    headers={"x-csrf-token": token},
+                    json={
+                        "room": 1,
+                        "startTime": start,
+                        "endTime": start + 3600,
+                        "studentName": "Student",
+                        "email": f"student{i}@test.com",
+                        "reason": "Reason",
+                        "classId": 1,
+                        "studentId": f"GJ2023000{i}",
+                    },
+                )
+                return response.status_code
+
+            return await asyncio.gather(*(create(i, token) for i, token in enumerate(tokens)))
+
+    statuses = asyncio.run(run())
+    assert sorted(statuses) == [200, 400, 400, 400, 400]
+
+
+def test_email_outbox_retries(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    attempts: list[str] = []
+
+    def flaky_send(email_title: str, title: str, email: str, details: str) -> None:
+        attempts.append(email)
+        if len(attempts) == 1:
+            raise ConnectionError("SMTP unavailable")
+
+    monkeypatch.setattr("core.email.send_normal_update_email", flaky_send)
+
+    async def run() -> EmailOutbox:
+        worker = EmailOutboxWorker(max_attempts=3)
+        async with AsyncSession(test_engine) as session:
+            await enqueue_email(
+                session,
+                "send_normal_update_email",
+                email_title="Title",
+                title="Title",
+                email="user@test.com",
+                details="Details",
+            )
+        assert await worker.flush(test_engine) == 1
+        assert await worker.flush(test_engine) == 0
+        async with AsyncSession(test_engine) as session:
+            message = (await session.exec(select(EmailOutbox))).one()
+            assert message.status == "pending" and message.attempts == 1
+            message.nextAttemptAt = datetime.now()
+            session.add(message)
+            await session.commit()
+        assert await worker.flush(test_engine) == 1
+        async with AsyncSession(test_engine) as session:
+            return (await session.exec(select(EmailOutbox))).one()
+
+    message = asyncio.run(run())
+    assert attempts == ["user@test.com", "user@test.com"]
+    assert message.status == "sent"
+    assert message.sentAt is not None
+
+
+def test_approver_digest(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    login_res = client.post(
+        "/admin/login",
+        json={
+            "email": "admin@test.com",
+            "password": "password",
+            "turnstileToken": "test",
+            "token": None,
+        },
+    )
+    assert login_res.status_code == 200
+    sent_emails: list[dict[str, Any]] = getattr(client, "sent_emails", [])
+    client.post("/campus/create", json={"name": "Test Campus"})
+    client.post("/class/create", json={"name": "Test Class", "campus": 1})
+    client.post("/room/create", json={"name": "Test Room", "campus": 1})
+    admin_id = client.get("/admin/list").json()["data"][0]["id"]
+    client.post("/approver/create", json={"room": 1, "admin": admin_id})
+
+    response = client.post("/approver/set-digest", json={"id": 1, "digestMinutes": -1})
+    assert response.status_code == 400, response.json()
+    response = client.post("/approver/set-digest", json={"id": 1, "digestMinutes": 15})
+    assert response.status_code == 200, response.json()
+
+    reservation_ids = []
+    for hours in (1, 3):
+        start_time = datetime.now() + timedelta(hours=hours)
+        response = client.post(
+            "/reservation/create",
+            json={
+                "room": 1,
+                "startTime": int(start_time.timestamp()),
+                "endTime": int((start_time + timedelta(hours=1)).timestamp()),
+                "studentName": "Test Student",
+                "studentId": "GJ20230000",
+                "email": "student@test.com",
+                "reason": "Test Reason",
+                "classId": 1,
+            },
+        )
+        assert response.status_code == 200, response.json()
+        reservation_ids.append(response.json()["data"]["reservationId"])
+
+    def approver_emails() -> list[dict[str, Any]]:
+        return [mail for mail in sent_emails if mail["type"] == "normal_update_with_external_link"]
+
+    assert approver_emails() == []
+
+    async def run(now: datetime) -> int:
+        async with AsyncSession(test_engine) as session:
+            return await send_approver_digests(session, now)
+
+    assert asyncio.run(run(datetime.now())) == 0
+
+    def failing_add_email(*args: Any, **kwargs: Any) -> None:
+        raise RuntimeError("outbox unavailable")
+
+    with monkeypatch.context() as m:
+        m.setattr(utils, "add_email", failing_add_email)
+        with pytest.raises(RuntimeError):
+            asyncio.run(run(datetime.now() + timedelta(minutes=16)))
+    assert asyncio.run(run(datetime.now() + timedelta(minutes=16))) == 1
+    assert asyncio.run(run(datetime.now() + timedelta(minutes=16))) == 0
+    client.flush_outbox()  # type: ignore[attr-defined]
+    digests = approver_emails()
+    assert len(digests) == 1
+    assert digests[0]["email"] == "admin@test.com"
+    assert all(f"#{id}" in digests[0]["details"] for id in reservation_ids)
+    token = digests[0]["link"].split("token=")[1]
+    client.cookies.clear()
+    response = client.post(
+        "/admin/login",
+        json={"email": "", "password": "", "turnstileToken": "test", "token": token},
+    )
+    assert response.status_code == 200, response.json()
+
+
+class FakePage:
+    def __init__(self) -> None:
+        self.closed = False
+        self.ready = True
+        self.ready_after = 0.0
+        self.declares_ready = False
+        self.waited_for: list[str] = []
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def goto(self, url: str, wait_until: str) -> None:
+        self.waited_for.append(wait_until)
+
+    async def emulate_media(self, media: str) -> None:
+        pass
+
+    async def wait_for_function(self, expression: str, timeout: float) -> None:
+        await asyncio.sleep(self.ready_after if self.ready else timeout / 1000)
+        if not self.ready:
+            raise PlaywrightTimeoutError("not ready")
+        self.waited_for.append("renderReady")
+
+    async def wait_for_load_state(self, state: str) -> None:
+        await asyncio.sleep(0.01)
+        self.waited_for.append(state)
+
+    async def evaluate(self, expression: str) -> bool:
+        return self.declares_ready
+
+    async def pdf(self, path: str, **kwargs: Any) -> None:
+        pass
+
+
+class FakeContext:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def new_page(self) -> FakePage:
+        return FakePage()
+
+    async def clear_cookies(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self) -> None:
+        self.connected = True
+        self.contexts: list[FakeContext] = []
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def new_context(self, **kwargs: Any) -> FakeContext:
+        self.contexts.append(FakeContext())
+        return self.contexts[-1]
+
+    async def close(self) -> None:
+        self.connected = False
+
+
+class FakePlaywright:
+    def __init__(self) -> None:
+        self.browsers: list[FakeBrowser] = []
+        self.chromium = self
+
+    async def start(self) -> "FakePlaywright":
+        return self
+
+    async def launch(self) -> FakeBrowser:
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+    async def stop(self) -> None:
+        pass
+
+
+def test_browser_pool(monkeypatch: pytest.MonkeyPatch):
+    playwright = FakePlaywright()
+    monkeypatch.setattr("core.browser.async_playwright", lambda: playwright)
+    pool = BrowserPool(size=2, max_renders=3)
+
+    async def render() -> Any:
+        async with pool.page() as page:
+            await asyncio.sleep(0.01)
+            return page
+
+    async def run() -> None:
+        await pool.start()
+        pages = await asyncio.gather(render(), render())
+        assert pages[0] is not pages[1]
+        assert await render() in pages
+        assert len(playwright.browsers) == 1
+        # The fourth render recycles the browser after max_renders
+        await render()
+        assert len(playwright.browsers) == 2
+        assert not playwright.browsers[0].connected
+        playwright.browsers[1].connected = False
+        await render()
+        assert len(playwright.browsers) == 3
+        await pool.close()
+        assert not playwright.browsers[2].connected
+
+    asyncio.run(run())
+    assert pool.stats()["restarts"] == 1
+    assert pool.stats()["launches"] == 3
+    assert pool.stats()["reused"] == 1
+
+
+def test_render_ready_protocol(monkeypatch: pytest.MonkeyPatch):
+    page = FakePage()
+
+    class FakePool:
+        @asynccontextmanager
+        async def page(self, device_scale: int = 2):
+            yield page
+
+    monkeypatch.setattr("core.utils.browser_pool", FakePool())
+    render_stats.kinds.clear()
+    timings = asyncio.run(get_exported_pdf("https://testserver", "cache/test.pdf"))
+    assert set(timings) == {"browser", "load", "ready", "render"}
+    assert page.waited_for == ["load", "renderReady"]
+    page.ready = False
+    page.waited_for.clear()
+    started = time.perf_counter()
+    asyncio.run(get_exported_pdf("https://testserver", "cache/test.pdf"))
+    assert time.perf_counter() - started < 1
+    assert page.waited_for == ["load", "networkidle"]
+    assert render_stats.stats()["pdf"]["count"] == 2
+    assert render_stats.stats()["pdf"]["fallbacks"] == 1
+    assert asyncio.run(wait_for_render_ready(page, timeout=200)) is False
+    page.declares_ready = True
+    started = time.perf_counter()
+    assert asyncio.run(wait_for_render_ready(page, timeout=200)) is False
+    assert time.perf_counter() - started >= 0.2
+    page.ready = True
+    page.ready_after = 0.1
+    page.waited_for.clear()
+    assert asyncio.run(wait_for_render_ready(page, timeout=200)) is True
+    assert page.waited_for == ["networkidle", "renderReady"]
+    assert "renderAvgMs" in render_stats.stats()["pdf"]
+
+
+def test_singleflight():
+    flight = SingleFlight()
+    calls: list[int] = []
+
+    async def compute() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("render failed")
+        return len(calls)
+
+    async def run() -> tuple[list[Any], list[int]]:
+        failed = await asyncio.gather(
+            *(flight.do("key", compute) for _ in range(3)), return_exceptions=True
+        )
+        succeeded = await asyncio.gather(*(flight.do("key", compute) for _ in range(3)))
+        return failed, succeeded
+
+    failed, succeeded = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in failed)
+    assert succeeded == [2, 2, 2]
+    assert flight.stats() == {"inFlight": 0, "started": 2, "shared": 4}
+
+
+def test_weekly_export_single_flight(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    renders: list[str] = []
+
+    async def slow_exported_pdf(_url: str, output: str, *args, **kwargs):
+        renders.append(output)
+        await asyncio.sleep(0.05)
+        with open(output, "wb") as export_file:
+            export_file.write(b"")
+        return {}
+
+    monkeypatch.setattr("core.get_exported_pdf", slow_exported_pdf)
+    key = "analytics-weekly-export-pdf-test"
+
+    async def run() -> tuple[list[Any], int]:
+        results = await asyncio.gather(
+            *(singleflight.do(key, lambda: render_weekly_export("pdf", key)) for _ in range(5))
+        )
+        async with AsyncSession(test_engine) as session:
+            rows = (await session.exec(select(Cache).where(Cache.key == key))).all()
+        return results, len(rows)
+
+    os.makedirs("cache", exist_ok=True)
+    results, rows = asyncio.run(run())
+    assert len(renders) == 1
+    assert len({export_uuid for export_uuid, _ in results}) == 1
+    assert rows == 1
+
+
+def test_export_jobs(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(app.state.limiter, "enabled", False)
+    login_res = client.post(
+        "/admin/login",
+        json={
+            "email": "admin@test.com",
+            "password": "password",
+            "turnstileToken": "test",
+            "token": None,
+        },
+    )
+    assert login_res.status_code == 200
+    client.post("/campus/create", json={"name": "Test Campus"})
+    client.post("/class/create", json={"name": "Test Class", "campus": 1})
+    admin_id = client.get("/admin/list").json()["data"][0]["id"]
+    for room, name in enumerate(("Room A", "Room B"), 1):
+        client.post("/room/create", json={"name": name, "campus": 1})
+        client.post("/approver/create", json={"room": room, "admin": admin_id})
+    for hours in range(1, 6):
+        start_time = datetime.now() + timedelta(hours=hours)
+        response = client.post(
+            "/reservation/create",
+            json={
+                "room": hours % 2 + 1,
+                "startTime": int(start_time.timestamp()),
+                "endTime": int((start_time + timedelta(hours=1)).timestamp()),
+                "studentName": "Test Student",
+                "studentId": f"GJ2023000{hours}",
+                "email": f"student{hours}@test.com",
+                "reason": "Test Reason",
+                "classId": 1,
+            },
+        )
+        assert response.status_code == 200, response.json()
+
+    response = client.post("/reservation/export/create", json={"mode": "by-room"})
+    assert response.status_code == 200, response.json()
+    job_uuid = response.json()["data"]["uuid"]
+    response = client.get(f"/reservation/export/status?uuid={job_uuid}")
+    assert response.json()["data"]["status"] == "pending"
+    response = client.get(f"/reservation/export/download?uuid={job_uuid}")
+    assert response.status_code == 409
+
+    async def add_stale_job() -> None:
+        async with AsyncSession(test_engine) as session:
+            session.add(ExportJob(
+                uuid="stale",
+                adminId=admin_id,
+                status="running",
+                attempts=3,
+                leasedUntil=datetime.now() - timedelta(minutes=1),
+            ))
+            session.add(ExportJob(uuid="foreign", adminId=admin_id + 1, status="done"))
+            await session.commit()
+
+    asyncio.run(add_stale_job())
+    runner = ExportJobRunner(workers=1, max_attempts=3, batch_size=2)
+    try:
+        assert asyncio.run(runner.flush(test_engine)) == 1
+    finally:
+        asyncio.run(runner.stop())
+    assert runner.stats() == {"done": 1, "retried": 0, "failed": 0}
+
+    status = client.get(f"/reservation/export/status?uuid={job_uuid}").json()["data"]
+    assert status["status"] == "done"
+    assert status["progress"] == status["total"] == 5
+    assert client.get("/reservation/export/status?uuid=stale").json()["data"]["status"] == "failed"
+    assert client.get("/reservation/export/status?uuid=foreign").status_code == 404
+    assert client.get("/reservation/export/download?uuid=foreign").status_code == 404
+    monkeypatch.setattr(cache_dir, "max_bytes", 0)
+    monkeypatch.setattr(cache_dir, "grace", 0)
+    cache_dir.evict()
+    response = client.get(f"/reservation/export/download?uuid={job_uuid}")
+    assert response.status_code == 200
+    workbook = load_workbook(BytesIO(response.content), read_only=True)
+    assert workbook.sheetnames == ["Room A", "Room B"]
+    assert sum(len(list(sheet.values)) - 1 for sheet in workbook.worksheets) == 5
+
+
+def test_export_job_runner_refills_workers(client: TestClient):
+    async def run() -> list[tuple[str, int]]:
+        async with AsyncSession(test_engine) as session:
+            for i in range(4):
+                session.add(ExportJob(uuid=f"job-{i}"))
+            await session.commit()
+        events: list[tuple[str, int]] = []
+
+        async def execute(engine: Any, job_id: int, attempts: int) -> None:
+            events.append(("start", job_id))
+            await asyncio.sleep(0.3 if job_id == 1 else 0.05)
+            events.append(("end", job_id))
+
+        runner = ExportJobRunner(workers=2)
+        runner._execute = execute  # type: ignore[method-assign]
+        assert await runner.flush(test_engine) == 4
+        return events
+
+    events = asyncio.run(run())
+    assert events.index(("start", 4)) < events.index(("end", 1))
+    assert events[-1] == ("end", 1)
+
+
+def test_cache_directory(client: TestClient, tmp_path):
+    cache = CacheDirectory(str(tmp_path), max_bytes=1000, ttl=100, grace=0)
+    now = time.time()
+    for name, age in (("a.pdf", 50), ("b.pdf", 40), ("c.pdf", 30), ("d.pdf", 200)):
+        temp_path = cache.temp_path(name)
+        with open(temp_path, "wb") as f:
+            f.write(b"x" * 100)
+        path = cache.publish(temp_path, name)
+        os.utime(path, (now - age, now - age))
+    orphan = cache.temp_path("e.pdf")
+    with open(orphan, "wb") as f:
+        f.write(b"x")
+    os.utime(orphan, (now - 7200, now - 7200))
+
+    assert cache.open("a.pdf") is not None
+    assert cache.open("missing.pdf") is None
+    cache.max_bytes = 250
+    removed = cache.evict()
+    assert sorted(removed) == sorted(["d.pdf", "b.pdf", os.path.basename(orphan)])
+    assert sorted(os.listdir(tmp_path)) == ["a.pdf", "c.pdf"]
+
+    temp_path = cache.temp_path("f.pdf")
+    with open(temp_path, "wb") as f:
+        f.write(b"x" * 100)
+    cache.publish(temp_path, "f.pdf")
+    assert sorted(os.listdir(tmp_path)) == ["a.pdf", "f.pdf"]
+
+    async def run() -> list[str]:
+        async with AsyncSession(test_engine) as session:
+            session.add(Cache(key="kept", value={"file": "a.pdf"}))
+            session.add(Cache(key="evicted", value={"file": "b.pdf"}))
+            session.add(Cache(key="expired", value={"total": 1}))
+            await session.commit()
+            assert await delete_stale_caches(
+                session, cache.exists, datetime.now() + timedelta(seconds=1)
+            ) == 2
+            return [row.key for row in (await session.exec(select(Cache))).all()]
+
+    assert asyncio.run(run()) == ["kept"]
+
+
+def test_analytic_counter(client: TestClient):
+    from datetime import datetime
+
+    async def run() -> Analytic | None:
+        counter = AnalyticCounter()
+        now = datetime.now()
+        for _ in range(3):
+            counter.increment(now, requests=1)
+        counter.increment(now, approvals=1, reservationCreations=2)
+        await counter.flush(test_engine)
+        counter.increment(now, requests=2)
+        await asyncio.gather(counter.flush(test_engine), counter.flush(test_engine))
+        assert counter.pending() == {}
+        async with AsyncSession(test_engine) as session:
+            return (await session.exec(
+                select(Analytic).where(
+                    Analytic.date == now.replace(hour=0, minute=0, second=0, microsecond=0)
+                )
+            )).one_or_none()
+
+    analytic = asyncio.run(run())
+    assert analytic is not None
+    assert analytic.requests == 5
+    assert analytic.approvals == 1
+    assert analytic.reservationCreations == 2
+
+
+def test_analytic_counter_shutdown(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    update_analytic = analytics.update_analytic
+
+    async def slow_update_analytic(*args: Any) -> None:
+        await asyncio.sleep(0.05)
+        await update_analytic(*args)
+
+    monkeypatch.setattr(analytics, "update_analytic", slow_update_analytic)
+    now = datetime.now()
+
+    async def run() -> Analytic | None:
+        counter = AnalyticCounter(flush_interval=0.01)
+        counter.increment(now, requests=1)
+        flush = asyncio.create_task(counter.flush(test_engine))
+        await asyncio.sleep(0.01)
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+        assert sum(counter.pending().values()) == 1
+
+        counter.start(test_engine)
+        await asyncio.sleep(0.03)
+        await counter.stop()
+        assert counter.pending() == {}
+        async with AsyncSession(test_engine) as session:
+            return (await session.exec(
+                select(Analytic).where(
+                    Analytic.date == now.replace(hour=0, minute=0, second=0, microsecond=0)
+                )
+            )).one_or_none()
+
+    analytic = asyncio.run(run())
+    assert analytic is not None
+    assert analytic.requests == 1
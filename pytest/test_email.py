@@ -0,0 +1,250 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import asyncio
+import smtplib
+import socketserver
+import threading
+import time
+from collections.abc import Iterator
+from core.smtp_pool import SMTPPool
+from core.email_templates import EmailTemplate, get_email_template
+from io import BytesIO
+import core.email
+import email
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        server: "StubSMTPServer" = self.server  # type: ignore[assignment]
+        server.connections += 1
+        self.wfile.write(b"220 stub ESMTP\r\n")
+        while line := self.rfile.readline():
+            command = line.decode().strip().upper()
+            if command.startswith("EHLO"):
+                self.wfile.write(b"250-stub\r\n250 AUTH PLAIN\r\n")
+            elif command.startswith("AUTH"):
+                self.wfile.write(b"235 OK\r\n")
+            elif command.startswith("DATA"):
+                self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                data = b""
+                while (line := self.rfile.readline()) not in (b".\r\n", b""):
+                    data += line
+                server.messages += 1
+                server.data.append(data.decode())
+                if server.drop_after_data:
+                    server.drop_after_data = False
+                    return
+                time.sleep(server.delay)
+                self.wfile.write(b"250 OK\r\n")
+            elif command.startswith("QUIT"):
+                self.wfile.write(b"221 Bye\r\n")
+                return
+            elif server.drop_next:
+                server.drop_next = False
+                return
+            else:
+                self.wfile.write(b"250 OK\r\n")
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), StubSMTPHandler)
+        self.connections = 0
+        self.messages = 0
+        self.data: list[str] = []
+        self.drop_next = False
+        self.drop_after_data = False
+        self.delay = 0.0
+
+
+@pytest.fixture(name="smtp_server")
+def smtp_server_fixture() -> Iterator[StubSMTPServer]:
+    server = StubSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def make_pool(server: StubSMTPServer, **kwargs) -> SMTPPool:
+    return SMTPPool(
+        host="127.0.0.1",
+        port=server.server_address[1],
+        username="no-reply@test.com",
+        password="password",
+        use_ssl=False,
+        **kwargs,
+    )
+
+
+def test_smtp_pool_reuses_connections(smtp_server: StubSMTPServer):
+    pool = make_pool(smtp_server, size=2)
+
+    async def run() -> None:
+        for _ in range(5):
+            await pool.sendmail("no-reply@test.com", "user@test.com", "Subject: test\r\n\r\nbody")
+        await pool.close()
+
+    asyncio.run(run())
+    assert smtp_server.messages == 5
+    assert smtp_server.connections == 1
+    assert pool.stats()["reused"] == 4
+
+
+def test_smtp_pool_reconnects_after_failed_health_check(smtp_server: StubSMTPServer):
+    pool = make_pool(smtp_server, check_after=0)
+
+    async def run() -> None:
+        await pool.sendmail("no-reply@test.com", "user@test.com", "Subject: test\r\n\r\nbody")
+        smtp_server.drop_next = True
+        await pool.sendmail("no-reply@test.com", "user@test.com", "Subject: test\r\n\r\nbody")
+        await pool.close()
+
+    asyncio.run(run())
+    assert smtp_server.messages == 2
+    assert smtp_server.connections == 2
+    assert pool.stats()["discarded"] == 1
+
+
+def test_smtp_pool_retries_stale_connection_before_mail_from(smtp_server: StubSMTPServer):
+    pool = make_pool(smtp_server)
+
+    async def run() -> None:
+        await pool.sendmail("no-reply@test.com", "user@test.com", "Subject: test\r\n\r\nbody")
+        smtp_server.drop_next = True
+        await pool.sendmail("no-reply@test.com", "user@test.com", "Subject: test\r\n\r\nbody")
+        await pool.close()
+
+    asyncio.run(run())
+    assert smtp_server.messages == 2
+    assert smtp_server.connections == 2
+
+
+def test_smtp_pool_does_not_retry_after_data(smtp_server: StubSMTPServer):
+    pool = make_pool(smtp_server)
+
+    async def run() -> None:
+        await pool.sendmail("no-reply@test.com", "user@test.com", "Subject: test\r\n\r\nbody")
+        smtp_server.drop_after_data = True
+        with pytest.raises(smtplib.SMTPServerDisconnected):
+            await pool.sendmail("no-reply@test.com", "user@test.com", "Subject: test\r\n\r\nbody")
+        await pool.close()
+
+    asyncio.run(run())
+    assert smtp_server.messages == 2
+    assert smtp_server.connections == 1
+
+
+def test_email_template_render():
+    template = EmailTemplate("<p>$title</p><p>${details}</p><p>$$5 $missing</p>")
+    assert template.render({"title": "Hi", "details": "There"}) == (
+        "<p>Hi</p><p>There</p><p>$5 $missing</p>"
+    )
+    message = email.message_from_string(
+        get_email_template("normal_update").message(
+            "Réservation", "user@test.com", {"title": "Hi", "details": "There"}
+        )
+    )
+    assert message["To"] == "user@test.com"
+    assert str(email.header.make_header(email.header.decode_header(message["Subject"]))) == (
+        "[HFI-UC] Réservation"
+    )
+    html = message.get_payload()[0].get_payload(decode=True).decode()
+    assert "There" in html and "$details" not in html
+
+
+def test_bulk_email_shares_connection_and_attachment(smtp_server: StubSMTPServer, monkeypatch):
+    pool = make_pool(smtp_server)
+    monkeypatch.setattr(core.email, "smtp_pool", pool)
+    recipients = ["a@test.com", "b@test.com", "c@test.com"]
+    core.email.send_normal_update_bulk_email_with_attached_files(
+        "Daily Reservation Report",
+        "Hi",
+        recipients,
+        "There",
+        [("report.xlsx", BytesIO(b"report-bytes"))],
+        {"b@test.com": {"details": "Hello B"}},
+    )
+    assert smtp_server.connections == 1
+    assert smtp_server.messages == 3
+    for recipient, data in zip(recipients, smtp_server.data):
+        message = email.message_from_string(data)
+        assert message["To"] == recipient
+        html, attachment = message.get_payload()
+        body = html.get_payload()[0].get_payload(decode=True).decode()
+        assert ("Hello B" in body) == (recipient == "b@test.com")
+        assert attachment.get_filename() == "report.xlsx"
+        assert attachment.get_payload(decode=True) == b"report-bytes"
+        assert len(attachment.get_all("Content-Transfer-Encoding")) == 1
+
+
+def test_bulk_email_reports_remaining_recipients(smtp_server: StubSMTPServer, monkeypatch):
+    pool = make_pool(smtp_server)
+    monkeypatch.setattr(core.email, "smtp_pool", pool)
+    real_message = EmailTemplate.message
+
+    def message(self, email_title, email, values, attachments=None):
+        if email == "b@test.com":
+            raise OSError("connection lost")
+        return real_message(self, email_title, email, values, attachments)
+
+    monkeypatch.setattr(EmailTemplate, "message", message)
+    with pytest.raises(core.email.BulkDeliveryError) as error:
+        core.email.send_normal_update_bulk_email_with_attached_files(
+            "Report", "Hi", ["a@test.com", "b@test.com", "c@test.com"], "There"
+        )
+    assert smtp_server.messages == 1
+    assert error.value.remaining == ["b@test.com", "c@test.com"]
+
+
+def test_async_sender_does_not_block_event_loop(smtp_server: StubSMTPServer, monkeypatch):
+    smtp_server.delay = 0.2
+    pool = make_pool(smtp_server)
+    monkeypatch.setattr(core.email, "smtp_pool", pool)
+
+    async def measure(send) -> tuple[float, float]:
+        lag = 0.0
+        done = False
+
+        async def ticker() -> None:
+            nonlocal lag
+            while not done:
+                started = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lag = max(lag, time.perf_counter() - started - 0.005)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        await send()
+        elapsed = time.perf_counter() - started
+        done = True
+        await task
+        return elapsed, lag
+
+    async def blocking() -> None:
+        with smtplib.SMTP("127.0.0.1", smtp_server.server_address[1]) as conn:
+            conn.sendmail("no-reply@test.com", "user@test.com", "Subject: test\r\n\r\nbody")
+
+    async def native() -> None:
+        await core.email.async_send_normal_update_email("Title", "Hi", "user@test.com", "There")
+
+    async def run() -> None:
+        _, blocked_lag = await measure(blocking)
+        elapsed, lag = await measure(native)
+        await pool.close()
+        assert blocked_lag >= 0.15
+        assert elapsed >= 0.2
+        assert lag < 0.1
+
+    asyncio.run(run())
+    assert smtp_server.messages == 2